@@ -0,0 +1,245 @@
+"""Resumenes de asignaciones por atleta y por coach, mantenidos incrementalmente.
+
+Las escrituras de asignaciones acumulan sus deltas en un CambiosResumen y lo
+aplican antes del commit, asi el resumen cambia en la misma transaccion. Para
+revisar o reparar la deriva:
+
+    python -m app.aggregates verificar
+    python -m app.aggregates reconstruir
+"""
+import argparse
+import json
+import sys
+from collections import defaultdict
+
+from sqlalchemy import Date, bindparam, case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models import AsignacionAtleta, Entrenamiento, ResumenAtleta, ResumenEntrenador
+
+CONTADORES = ("pendientes", "en_progreso", "completadas", "calificadas", "suma_calificaciones")
+COLUMNA_ESTADO = {"pendiente": "pendientes", "en_progreso": "en_progreso", "completado": "completadas"}
+COLUMNAS = (*CONTADORES, "ultima_completada")
+
+
+def _aporte(estado, calificacion) -> dict:
+    """Lo que suma una asignacion a los contadores de su atleta y de su coach"""
+    aporte = dict.fromkeys(CONTADORES, 0)
+    if estado is not None:
+        aporte[COLUMNA_ESTADO[estado]] = 1
+    if calificacion is not None:
+        aporte["calificadas"] = 1
+        aporte["suma_calificaciones"] = calificacion
+    return aporte
+
+
+class _Tabla:
+    def __init__(self, modelo, llave):
+        self.tabla = modelo.__table__
+        self.llave = self.tabla.c[llave]
+        self.deltas = defaultdict(lambda: dict.fromkeys(CONTADORES, 0))
+        self.ultimas = {}
+        self.recalcular = set()
+
+    def agregar(self, id_, antes, despues):
+        delta = self.deltas[id_]
+        for signo, asignacion in ((-1, antes), (1, despues)):
+            if asignacion is not None:
+                for columna, valor in _aporte(asignacion[0], asignacion[1]).items():
+                    delta[columna] += signo * valor
+
+        estado, _, fecha_completado = despues or (None, None, None)
+        if estado == "completado" and fecha_completado is not None:
+            self.ultimas[id_] = max(fecha_completado, self.ultimas.get(id_, fecha_completado))
+        # Si deja de estar completada la fecha maxima puede bajar: se recalcula
+        if antes is not None and antes[0] == "completado" and estado != "completado":
+            self.recalcular.add(id_)
+
+    def aplicar(self, db: Session, subconsulta_ultima):
+        if not self.deltas:
+            return
+        ids = sorted(self.deltas)  # mismo orden en todas las transacciones: sin deadlocks entre ellas
+        t = self.tabla
+
+        # La fila puede no existir todavia (atleta o coach sin asignaciones previas)
+        crear = insert(t).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+        db.execute(crear, [{self.llave.key: i} for i in ids])
+
+        # col = col + delta en la base: dos transacciones a la vez no se pisan
+        ultima = bindparam("b_ultima", type_=Date)
+        sumar = (
+            update(t)
+            .where(self.llave == bindparam("b_id"))
+            .values(
+                **{c: t.c[c] + bindparam("d_" + c) for c in CONTADORES},
+                ultima_completada=case(
+                    (t.c.ultima_completada.is_(None), ultima),
+                    (ultima > t.c.ultima_completada, ultima),
+                    else_=t.c.ultima_completada,
+                ),
+            )
+        )
+        db.execute(sumar, [
+            {"b_id": i, "b_ultima": self.ultimas.get(i), **{"d_" + c: v for c, v in self.deltas[i].items()}}
+            for i in ids
+        ])
+
+        if self.recalcular:
+            db.execute(
+                update(t)
+                .where(self.llave.in_(sorted(self.recalcular)))
+                .values(ultima_completada=subconsulta_ultima(self.llave))
+            )
+
+
+class CambiosResumen:
+    """Deltas de una transaccion; aplicar() los escribe con un UPDATE por tabla (executemany).
+
+    Cada asignacion se describe como (estado, calificacion, fecha_completado);
+    antes=None es una asignacion nueva y despues=None una borrada.
+    """
+
+    def __init__(self):
+        self.atletas = _Tabla(ResumenAtleta, "id_atleta")
+        self.entrenadores = _Tabla(ResumenEntrenador, "id_entrenador")
+
+    def agregar(self, id_atleta: int, id_entrenador: int, antes=None, despues=None):
+        self.atletas.agregar(id_atleta, antes, despues)
+        self.entrenadores.agregar(id_entrenador, antes, despues)
+
+    def aplicar(self, db: Session):
+        """Llamar antes del commit de la escritura que origino los cambios"""
+        self.atletas.aplicar(db, _ultima_atleta)
+        self.entrenadores.aplicar(db, _ultima_entrenador)
+
+
+def resumen_a_dict(resumen) -> dict:
+    """Fila de resumen (None si todavia no tiene asignaciones) -> campos de ResumenAsignaciones"""
+    if resumen is None:
+        return {**dict.fromkeys(CONTADORES[:-1], 0), "calificacion_promedio": None, "ultima_completada": None}
+    return {
+        **{c: getattr(resumen, c) for c in CONTADORES[:-1]},
+        "calificacion_promedio": (
+            round(resumen.suma_calificaciones / resumen.calificadas, 3) if resumen.calificadas else None
+        ),
+        "ultima_completada": resumen.ultima_completada,
+    }
+
+
+def _ultima_atleta(llave):
+    return (
+        select(func.max(AsignacionAtleta.fecha_completado))
+        .where(AsignacionAtleta.id_atleta == llave, AsignacionAtleta.estado == "completado")
+        .scalar_subquery()
+    )
+
+
+def _ultima_entrenador(llave):
+    return (
+        select(func.max(AsignacionAtleta.fecha_completado))
+        .join(Entrenamiento, Entrenamiento.id_entrenamiento == AsignacionAtleta.id_entrenamiento)
+        .where(Entrenamiento.id_entrenador == llave, AsignacionAtleta.estado == "completado")
+        .scalar_subquery()
+    )
+
+
+def _agregado(llave, *joins):
+    """SELECT llave, contadores... GROUP BY llave sobre asignaciones_atletas"""
+    a = AsignacionAtleta
+    columnas = [
+        func.sum(case((a.estado == estado, 1), else_=0)).label(columna) for estado, columna in COLUMNA_ESTADO.items()
+    ]
+    stmt = select(
+        llave,
+        *columnas,
+        func.count(a.calificacion).label("calificadas"),
+        func.coalesce(func.sum(a.calificacion), 0).label("suma_calificaciones"),
+        func.max(case((a.estado == "completado", a.fecha_completado))).label("ultima_completada"),
+    ).select_from(a)
+    for tabla, condicion in joins:
+        stmt = stmt.join(tabla, condicion)
+    return stmt.group_by(llave)
+
+
+def _agregado_atletas():
+    return _agregado(AsignacionAtleta.id_atleta)
+
+
+def _agregado_entrenadores():
+    return _agregado(
+        Entrenamiento.id_entrenador,
+        (Entrenamiento, Entrenamiento.id_entrenamiento == AsignacionAtleta.id_entrenamiento),
+    )
+
+
+TABLAS = (
+    ("resumen_atletas", ResumenAtleta, "id_atleta", _agregado_atletas),
+    ("resumen_entrenadores", ResumenEntrenador, "id_entrenador", _agregado_entrenadores),
+)
+
+
+def _normalizar(fila):
+    # SUM de MySQL llega como Decimal y el MAX de SQLite como texto
+    *contadores, ultima = fila
+    return (*(int(c or 0) for c in contadores), str(ultima) if ultima is not None else None)
+
+
+def verificar(db: Session, max_ejemplos: int = 10) -> dict:
+    """Compara cada tabla de resumen contra un recalculo completo; no escribe nada"""
+    reporte = {}
+    vacia = (0,) * len(CONTADORES) + (None,)
+    for nombre, modelo, llave, agregado in TABLAS:
+        esperado = {fila[0]: _normalizar(fila[1:]) for fila in db.execute(agregado())}
+        columnas = [modelo.__table__.c[c] for c in (llave, *COLUMNAS)]
+        actual = {fila[0]: _normalizar(fila[1:]) for fila in db.execute(select(*columnas))}
+
+        diferencias = []
+        for id_ in sorted(esperado.keys() | actual.keys()):
+            e, a = esperado.get(id_, vacia), actual.get(id_, vacia)
+            if e != a:
+                diferencias.append({
+                    llave: id_,
+                    "esperado": dict(zip(COLUMNAS, e)),
+                    "actual": dict(zip(COLUMNAS, a)) if id_ in actual else None,
+                })
+        reporte[nombre] = {
+            "filas": len(actual),
+            "con_deriva": len(diferencias),
+            "ejemplos": diferencias[:max_ejemplos],
+        }
+    return reporte
+
+
+def reconstruir(db: Session) -> dict:
+    """Borra y rellena los resumenes con un INSERT ... SELECT por tabla, en una transaccion"""
+    filas = {}
+    for nombre, modelo, llave, agregado in TABLAS:
+        db.execute(delete(modelo))
+        resultado = db.execute(insert(modelo).from_select([llave, *COLUMNAS], agregado()))
+        filas[nombre] = resultado.rowcount
+    db.commit()
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("accion", choices=["verificar", "reconstruir"])
+    args = parser.parse_args()
+
+    from app.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.accion == "reconstruir":
+            print(json.dumps({"reconstruidas": reconstruir(db)}, indent=2))
+            return 0
+        reporte = verificar(db)
+        print(json.dumps(reporte, indent=2, default=str))
+        # Codigo 1 si hay deriva, para poder usarlo desde cron o CI
+        return 1 if any(r["con_deriva"] for r in reporte.values()) else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import math
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import PerfilAtleta, Entrenamiento, AsignacionAtleta
+
+# Carga de una sesion = minutos * factor de intensidad por nivel (sRPE simplificado)
+FACTOR_NIVEL = {"principiante": 1.0, "intermedio": 1.5, "avanzado": 2.0}
+VENTANA_AGUDA = 7
+VENTANA_CRONICA = 28
+# Zona "segura" del ratio agudo:cronico; fuera de ella se cuenta en la escuadra
+ACWR_BAJO = 0.8
+ACWR_ALTO = 1.5
+
+
+class Historial:
+    """Asignaciones de un roster como columnas de NumPy; idx es la posicion del atleta en ids"""
+
+    def __init__(self, ids, filas, hasta: date):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.hasta = hasta
+        columnas = list(zip(*filas)) if filas else [()] * 7
+        id_atleta, estado, asignada, completada, calificacion, duracion, nivel = columnas
+
+        self.idx = np.searchsorted(self.ids, np.fromiter(id_atleta, dtype=np.int64, count=len(filas)))
+        self.completado = np.array(estado, dtype=object) == "completado"
+        # Dias hacia atras desde `hasta` (0 = ese mismo dia); None queda en -1
+        self.dias_asignada = self._dias(asignada)
+        self.dias_completada = self._dias(completada)
+        self.calificacion = np.array(calificacion, dtype=float).reshape(-1)
+        self.duracion = np.nan_to_num(np.array(duracion, dtype=float).reshape(-1))
+        factor = np.fromiter((FACTOR_NIVEL.get(n, 1.0) for n in nivel), dtype=float, count=len(filas))
+        self.carga = self.duracion * factor
+
+    def _dias(self, fechas):
+        # Via ordinal: np.array sobre objetos date es ~50x mas lento
+        hasta = self.hasta.toordinal()
+        return np.fromiter(
+            (-1 if f is None else hasta - f.toordinal() for f in fechas), dtype=np.int64, count=len(fechas)
+        )
+
+    def _suma(self, mascara, pesos=None):
+        # Sin pesos es un conteo (enteros); con pesos, suma de floats por atleta
+        return np.bincount(
+            self.idx[mascara], weights=None if pesos is None else pesos[mascara], minlength=len(self.ids)
+        )
+
+    def completadas_en(self, dias: int):
+        return self.completado & (self.dias_completada >= 0) & (self.dias_completada < dias)
+
+
+def _consulta_historial(hasta: date, semanas: int):
+    desde = hasta - timedelta(days=max(semanas * 7, VENTANA_CRONICA))
+    return (
+        select(
+            AsignacionAtleta.id_atleta,
+            AsignacionAtleta.estado,
+            AsignacionAtleta.fecha_asignacion,
+            AsignacionAtleta.fecha_completado,
+            AsignacionAtleta.calificacion,
+            Entrenamiento.duracion_estimada,
+            Entrenamiento.nivel_dificultad,
+        )
+        .join(Entrenamiento, Entrenamiento.id_entrenamiento == AsignacionAtleta.id_entrenamiento)
+        .where(AsignacionAtleta.fecha_asignacion <= hasta)
+        .where((AsignacionAtleta.fecha_asignacion >= desde) | (AsignacionAtleta.fecha_completado >= desde))
+    )
+
+
+def cargar_historial(db: Session, ids, hasta: date, semanas: int) -> Historial:
+    """Un solo SELECT con todo el historial de la ventana para los atletas dados"""
+    ids = sorted(ids)
+    filas = []
+    if ids:
+        filas = db.execute(_consulta_historial(hasta, semanas).where(AsignacionAtleta.id_atleta.in_(ids))).all()
+    return Historial(ids, filas, hasta)
+
+
+def cargar_historial_coach(db: Session, id_entrenador: int, hasta: date, semanas: int) -> Historial:
+    ids = db.execute(
+        select(PerfilAtleta.id_atleta).where(PerfilAtleta.id_entrenador == id_entrenador).order_by(PerfilAtleta.id_atleta)
+    ).scalars().all()
+    # JOIN en vez de un IN con miles de ids: el roster puede ser de 10k atletas
+    filas = []
+    if ids:
+        filas = db.execute(
+            _consulta_historial(hasta, semanas)
+            .join(PerfilAtleta, PerfilAtleta.id_atleta == AsignacionAtleta.id_atleta)
+            .where(PerfilAtleta.id_entrenador == id_entrenador)
+        ).all()
+    return Historial(ids, filas, hasta)
+
+
+def _pendiente(n, sx, sy, sxx, sxy):
+    # Minimos cuadrados por atleta a partir de las sumas; pendiente por semana
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denominador = n * sxx - sx * sx
+        pendiente = (n * sxy - sx * sy) / denominador * 7
+    return np.where((n >= 2) & (denominador > 0), pendiente, np.nan)
+
+
+def _dividir(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(b > 0, a / b, np.nan)
+
+
+def calcular(historial: Historial, semanas: int) -> dict:
+    """Metricas por atleta (arrays alineados con historial.ids) y de la escuadra completa"""
+    h = historial
+    n_atletas = len(h.ids)
+
+    aguda = h._suma(h.completadas_en(VENTANA_AGUDA), h.carga)
+    # Cronica como promedio semanal de las ultimas 4 semanas, comparable con la aguda
+    cronica = h._suma(h.completadas_en(VENTANA_CRONICA), h.carga) / (VENTANA_CRONICA / 7)
+
+    # Minutos completados por semana, de la mas vieja a la actual
+    en_ventana = h.completadas_en(semanas * 7)
+    celda = h.idx[en_ventana] * semanas + h.dias_completada[en_ventana] // 7
+    volumen = np.bincount(celda, weights=h.duracion[en_ventana], minlength=n_atletas * semanas)
+    volumen = volumen.reshape(n_atletas, semanas)[:, ::-1]
+
+    asignadas = (h.dias_asignada >= 0) & (h.dias_asignada < semanas * 7)
+    total = h._suma(asignadas)
+    completadas = h._suma(asignadas & h.completado)
+
+    calificadas = en_ventana & ~np.isnan(h.calificacion)
+    x = -h.dias_completada.astype(float)  # dias, creciente hacia `hasta`
+    y = np.nan_to_num(h.calificacion)
+    sumas = [h._suma(calificadas, p) for p in (None, x, y, x * x, x * y)]
+
+    acwr = _dividir(aguda, cronica)
+    return {
+        "atletas": {
+            "carga_aguda": aguda,
+            "carga_cronica": cronica,
+            "acwr": acwr,
+            "volumen_semanal": volumen,
+            "tasa_completado": _dividir(completadas, total),
+            "calificacion_promedio": _dividir(sumas[2], sumas[0]),
+            "tendencia_calificacion": _pendiente(*sumas),
+            "asignadas": total,
+            "completadas": completadas,
+        },
+        "escuadra": {
+            "atletas": n_atletas,
+            "carga_aguda": aguda.sum(),
+            "carga_cronica": cronica.sum(),
+            "acwr": _dividir(aguda.sum(), cronica.sum()),
+            "volumen_semanal": volumen.sum(axis=0),
+            "tasa_completado": _dividir(completadas.sum(), total.sum()),
+            "calificacion_promedio": _dividir(sumas[2].sum(), sumas[0].sum()),
+            "tendencia_calificacion": _pendiente(*(s.sum() for s in sumas)),
+            "atletas_acwr_bajo": int(np.sum(acwr < ACWR_BAJO)),
+            "atletas_acwr_alto": int(np.sum(acwr > ACWR_ALTO)),
+        },
+    }
+
+
+def _json(valor):
+    """ndarray/escalar de NumPy -> listas y floats de Python con NaN como None"""
+    if isinstance(valor, np.ndarray) and valor.ndim > 0:
+        if valor.dtype.kind in "iu":
+            return valor.tolist()
+        lista = np.round(valor, 3).tolist()
+        if not np.isnan(valor).any():
+            return lista
+        return [None if v != v else v for v in lista]
+    if isinstance(valor, (int, np.integer)):
+        return int(valor)
+    valor = float(valor)
+    return None if math.isnan(valor) else round(valor, 3)
+
+
+def metricas_atletas(historial: Historial, metricas: dict) -> list:
+    nombres = ["id_atleta", *metricas["atletas"]]
+    columnas = [historial.ids.tolist(), *map(_json, metricas["atletas"].values())]
+    return [dict(zip(nombres, fila)) for fila in zip(*columnas)]
+
+
+def metricas_escuadra(metricas: dict) -> dict:
+    return {nombre: _json(valor) for nombre, valor in metricas["escuadra"].items()}
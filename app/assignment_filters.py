@@ -0,0 +1,94 @@
+"""Filtros, orden y keyset de los listados de asignaciones.
+
+Cada combinacion de filtros es un solo SELECT asignaciones JOIN entrenamientos
+(el entrenamiento sale en el mismo JOIN). Por atleta lo resuelven
+ix_asignaciones_atleta_fecha / ix_asignaciones_atleta_estado_fecha, que ya
+vienen ordenados por fecha_asignacion; para todo un coach se entra por sus
+entrenamientos (ix_entrenamientos_entrenador_fecha) y
+ix_asignaciones_entrenamiento_estado_fecha.
+"""
+from datetime import date
+from typing import List, Literal, Optional
+
+from fastapi import HTTPException, Query
+from sqlalchemy.orm import Session, contains_eager
+
+from app.models import AsignacionAtleta, Entrenamiento
+from app.pagination import MAX_LIMIT, paginar_ordenado
+from app.schemas import EstadoAsignacion
+
+ORDENES = {
+    "fecha_asignacion": AsignacionAtleta.fecha_asignacion,
+    "fecha_completado": AsignacionAtleta.fecha_completado,
+    "calificacion": AsignacionAtleta.calificacion,
+    "id_asignacion": AsignacionAtleta.id_asignacion,
+}
+# Historiales largos: sin limit explicito se manda esta pagina, no todo
+LIMIT_DEFAULT = 100
+
+
+class FiltrosAsignaciones:
+    """Parametros de los listados: filtros, orden (-campo = descendente) y keyset con cursor opaco"""
+
+    def __init__(
+        self,
+        estado: Optional[List[EstadoAsignacion]] = Query(None),
+        desde: Optional[date] = Query(None, description="fecha_asignacion >= desde"),
+        hasta: Optional[date] = Query(None, description="fecha_asignacion <= hasta"),
+        dificultad: Optional[List[Literal["principiante", "intermedio", "avanzado"]]] = Query(None),
+        calificacion_min: Optional[int] = Query(None),
+        calificacion_max: Optional[int] = Query(None),
+        orden: str = Query("-fecha_asignacion", pattern=f"^-?({'|'.join(ORDENES)})$"),
+        limit: int = Query(LIMIT_DEFAULT, ge=1, le=MAX_LIMIT),
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor de la pagina anterior"),
+    ):
+        if desde and hasta and desde > hasta:
+            raise HTTPException(status_code=400, detail="desde no puede ser posterior a hasta")
+        if calificacion_min is not None and calificacion_max is not None and calificacion_min > calificacion_max:
+            raise HTTPException(status_code=400, detail="calificacion_min no puede ser mayor que calificacion_max")
+
+        self.estado = estado
+        self.desde = desde
+        self.hasta = hasta
+        self.dificultad = dificultad
+        self.calificacion_min = calificacion_min
+        self.calificacion_max = calificacion_max
+        self.descendente = orden.startswith("-")
+        self.columna_orden = ORDENES[orden.lstrip("-")]
+        self.limit = limit
+        self.cursor = cursor
+
+    def condiciones(self) -> list:
+        # Solo los filtros presentes: las columnas del indice primero, despues las que filtran sobre el JOIN
+        condiciones = []
+        if self.estado:
+            condiciones.append(AsignacionAtleta.estado.in_([e.value for e in self.estado]))
+        if self.desde:
+            condiciones.append(AsignacionAtleta.fecha_asignacion >= self.desde)
+        if self.hasta:
+            condiciones.append(AsignacionAtleta.fecha_asignacion <= self.hasta)
+        if self.calificacion_min is not None:
+            condiciones.append(AsignacionAtleta.calificacion >= self.calificacion_min)
+        if self.calificacion_max is not None:
+            condiciones.append(AsignacionAtleta.calificacion <= self.calificacion_max)
+        if self.dificultad:
+            condiciones.append(Entrenamiento.nivel_dificultad.in_(self.dificultad))
+        return condiciones
+
+
+def listar(db: Session, filtros: FiltrosAsignaciones, *alcance):
+    """Una pagina de asignaciones con su entrenamiento; alcance = condiciones del atleta o del coach"""
+    query = (
+        db.query(AsignacionAtleta)
+        .join(AsignacionAtleta.entrenamiento)
+        .options(contains_eager(AsignacionAtleta.entrenamiento))
+        .filter(*alcance, *filtros.condiciones())
+    )
+    return paginar_ordenado(
+        query,
+        filtros.columna_orden,
+        AsignacionAtleta.id_asignacion,
+        filtros.descendente,
+        filtros.limit,
+        filtros.cursor,
+    )
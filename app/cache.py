@@ -0,0 +1,222 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+# CACHE_BACKEND: "memory" (LRU+TTL por proceso), "redis" (compartida entre workers) o "none"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CACHE_PREFIX = os.getenv("CACHE_PREFIX", "apipi:")
+# Cada cuanto se reintentan las invalidaciones que fallaron con Redis caido (segundos)
+CACHE_REINTENTO = float(os.getenv("CACHE_REINTENTO", "1"))
+
+logger = logging.getLogger("app.cache")
+
+
+def cache_key(ruta: str, *ids) -> str:
+    return ":".join([ruta, *map(str, ids)])
+
+
+class CacheBackend(ABC):
+    """Interfaz comun; los valores son estructuras JSON (lo que devuelve model_dump(mode="json"))"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidaciones = 0
+
+    async def get(self, clave: str):
+        valor = await self._get(clave)
+        if valor is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return valor
+
+    async def set(self, clave: str, valor, ttl: int = None):
+        await self._set(clave, valor, CACHE_TTL if ttl is None else ttl)
+
+    async def delete(self, *claves: str):
+        claves = [c for c in claves if c]
+        if claves:
+            self.invalidaciones += len(claves)
+            await self._delete(claves)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "invalidaciones": self.invalidaciones,
+        }
+
+    @abstractmethod
+    async def _get(self, clave):
+        ...
+
+    @abstractmethod
+    async def _set(self, clave, valor, ttl):
+        ...
+
+    @abstractmethod
+    async def _delete(self, claves):
+        ...
+
+
+class NullCache(CacheBackend):
+    async def _get(self, clave):
+        return None
+
+    async def _set(self, clave, valor, ttl):
+        pass
+
+    async def _delete(self, claves):
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """LRU con TTL en memoria del proceso; con varios workers cada uno tiene la suya"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        super().__init__()
+        self.max_entries = max_entries
+        self.entradas = OrderedDict()
+        self.lock = threading.Lock()
+
+    async def _get(self, clave):
+        with self.lock:
+            entrada = self.entradas.get(clave)
+            if entrada is None:
+                return None
+            valor, expira = entrada
+            if expira < time.monotonic():
+                del self.entradas[clave]
+                return None
+            self.entradas.move_to_end(clave)
+            return valor
+
+    async def _set(self, clave, valor, ttl):
+        with self.lock:
+            self.entradas[clave] = (valor, time.monotonic() + ttl)
+            self.entradas.move_to_end(clave)
+            while len(self.entradas) > self.max_entries:
+                self.entradas.popitem(last=False)
+
+    async def _delete(self, claves):
+        with self.lock:
+            for clave in claves:
+                self.entradas.pop(clave, None)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "entradas": len(self.entradas)}
+
+
+def _errores_redis() -> tuple:
+    try:
+        from redis.exceptions import RedisError
+    except ImportError:
+        return (OSError,)
+    return (RedisError, OSError)
+
+
+# Marca de "Redis no respondio", distinta de un None legitimo (miss)
+_FALLO = object()
+
+
+class RedisCache(CacheBackend):
+    """Backend sobre cualquier servidor que hable el protocolo de Redis.
+
+    Si el servidor no responde la cache se comporta como NullCache (todo es
+    miss, set no hace nada) en vez de tirar 500; se avisa en el log al caerse
+    y al volver. Las claves que no se pudieron borrar quedan pendientes: se
+    reintentan en segundo plano cada CACHE_REINTENTO segundos y antes de
+    cualquier otra operacion de este proceso, que mientras tanto es miss. Asi
+    al volver Redis ningun worker lee un dashboard que ya se habia invalidado.
+    """
+
+    def __init__(self, cliente=None, url: str = REDIS_URL, prefijo: str = CACHE_PREFIX,
+                 reintento: float = CACHE_REINTENTO):
+        super().__init__()
+        if cliente is None:
+            import redis.asyncio as redis_asyncio  # dependencia opcional
+
+            cliente = redis_asyncio.from_url(url)
+        self.cliente = cliente
+        self.prefijo = prefijo
+        self.errores = _errores_redis()
+        self.fallos = 0
+        self.caido = False
+        self.pendientes = set()  # claves (con prefijo) que quedan por borrar
+        self.reintento = reintento
+        self.tarea_reintento = None
+
+    async def _llamar(self, operacion: str, *args, **kwargs):
+        try:
+            resultado = await getattr(self.cliente, operacion)(*args, **kwargs)
+        except self.errores as e:
+            self.fallos += 1
+            if not self.caido:
+                self.caido = True
+                logger.warning("Redis no responde (%s), la cache queda desactivada hasta que vuelva", e)
+            return _FALLO
+        if self.caido:
+            self.caido = False
+            logger.warning("Redis responde de nuevo, se reactiva la cache")
+        return resultado
+
+    async def _vaciar_pendientes(self) -> bool:
+        """Borra las invalidaciones que fallaron; False si Redis sigue sin responder"""
+        if not self.pendientes:
+            return True
+        claves = list(self.pendientes)
+        if await self._llamar("delete", *claves) is _FALLO:
+            return False
+        self.pendientes.difference_update(claves)
+        logger.warning("Redis: se aplicaron %d invalidaciones pendientes", len(claves))
+        return True
+
+    async def _reintentar(self):
+        while self.pendientes:
+            await asyncio.sleep(self.reintento)
+            await self._vaciar_pendientes()
+
+    def _programar_reintento(self):
+        if self.tarea_reintento is None or self.tarea_reintento.done():
+            self.tarea_reintento = asyncio.get_running_loop().create_task(self._reintentar())
+
+    async def _get(self, clave):
+        if not await self._vaciar_pendientes():
+            return None
+        valor = await self._llamar("get", self.prefijo + clave)
+        return None if valor is None or valor is _FALLO else json.loads(valor)
+
+    async def _set(self, clave, valor, ttl):
+        if await self._vaciar_pendientes():
+            await self._llamar("set", self.prefijo + clave, json.dumps(valor), ex=ttl)
+
+    async def _delete(self, claves):
+        self.pendientes.update(self.prefijo + c for c in claves)
+        if not await self._vaciar_pendientes():
+            self._programar_reintento()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "fallos": self.fallos, "caido": self.caido, "pendientes": len(self.pendientes)}
+
+
+def crear_cache(backend: str = CACHE_BACKEND) -> CacheBackend:
+    if backend == "redis":
+        return RedisCache()
+    if backend == "none":
+        return NullCache()
+    return MemoryCache()
+
+
+cache = crear_cache()
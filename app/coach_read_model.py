@@ -0,0 +1,122 @@
+"""Modelo de lectura de los coaches (tabla lectura_entrenadores).
+
+entrenadores y perfiles_entrenadores comparten id_entrenador pero no tienen
+relacion en el ORM; esta tabla junta nombre, especialidad, usuario y conteos
+para que los dashboards lo lean con un JOIN. Cada escritura que toca a un
+coach llama a refrescar() antes de su commit. Para revisar o reparar:
+
+    python -m app.coach_read_model verificar
+    python -m app.coach_read_model reconstruir
+"""
+import argparse
+import json
+import sys
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models import Entrenador, PerfilEntrenador, PerfilAtleta, Entrenamiento, LecturaEntrenador
+
+COLUMNAS = ("id_entrenador", "id_usuario", "nombre_completo", "especialidad", "atletas", "entrenamientos")
+
+
+def _consulta():
+    """Filas del modelo de lectura calculadas desde las tablas fuente"""
+    atletas = (
+        select(func.count()).select_from(PerfilAtleta)
+        .where(PerfilAtleta.id_entrenador == Entrenador.id_entrenador)
+        .correlate(Entrenador).scalar_subquery()
+    )
+    entrenamientos = (
+        select(func.count()).select_from(Entrenamiento)
+        .where(Entrenamiento.id_entrenador == Entrenador.id_entrenador)
+        .correlate(Entrenador).scalar_subquery()
+    )
+    return (
+        select(
+            Entrenador.id_entrenador,
+            PerfilEntrenador.id_usuario,
+            func.coalesce(PerfilEntrenador.nombre_completo, Entrenador.nombre),
+            PerfilEntrenador.especialidad,
+            atletas,
+            entrenamientos,
+        )
+        .select_from(Entrenador)
+        .outerjoin(PerfilEntrenador, PerfilEntrenador.id_entrenador == Entrenador.id_entrenador)
+    )
+
+
+def refrescar(db: Session, *ids_entrenador):
+    """Recalcula las filas de esos coaches en la transaccion actual.
+
+    Los conteos salen de indices (id_entrenador en perfiles y entrenamientos),
+    y las escrituras que tocan coaches son pocas: se recalcula en vez de llevar deltas.
+    """
+    ids = sorted({i for i in ids_entrenador if i is not None})
+    if not ids:
+        return
+    # Lo pendiente del ORM tiene que estar en la base antes del INSERT ... SELECT
+    db.flush()
+    db.execute(delete(LecturaEntrenador).where(LecturaEntrenador.id_entrenador.in_(ids)))
+    db.execute(insert(LecturaEntrenador).from_select(COLUMNAS, _consulta().where(Entrenador.id_entrenador.in_(ids))))
+
+
+def crear_entrenadores(db: Session, nombres: list) -> list:
+    """Filas nuevas en entrenadores para coaches que se registran; devuelve sus ids en el mismo orden.
+
+    El id sale del autoincremental y el perfil se crea despues con ese id (FK
+    de perfiles_entrenadores a entrenadores): nunca se reusa una fila que ya
+    estaba, aunque tenga el id o el nombre que le tocaria al coach nuevo.
+    """
+    filas = [Entrenador(nombre=nombre) for nombre in nombres]
+    db.add_all(filas)
+    db.flush()
+    return [f.id_entrenador for f in filas]
+
+
+def verificar(db: Session, max_ejemplos: int = 10) -> dict:
+    """Compara la tabla contra un recalculo completo; no escribe nada"""
+    esperado = {fila[0]: tuple(fila) for fila in db.execute(_consulta())}
+    columnas = [LecturaEntrenador.__table__.c[c] for c in COLUMNAS]
+    actual = {fila[0]: tuple(fila) for fila in db.execute(select(*columnas))}
+
+    diferencias = []
+    for id_ in sorted(esperado.keys() | actual.keys()):
+        e, a = esperado.get(id_), actual.get(id_)
+        if e != a:
+            diferencias.append({
+                "id_entrenador": id_,
+                "esperado": dict(zip(COLUMNAS, e)) if e else None,
+                "actual": dict(zip(COLUMNAS, a)) if a else None,
+            })
+    return {"filas": len(actual), "con_deriva": len(diferencias), "ejemplos": diferencias[:max_ejemplos]}
+
+
+def reconstruir(db: Session) -> int:
+    db.execute(delete(LecturaEntrenador))
+    filas = db.execute(insert(LecturaEntrenador).from_select(COLUMNAS, _consulta())).rowcount
+    db.commit()
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("accion", choices=["verificar", "reconstruir"])
+    args = parser.parse_args()
+
+    from app.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.accion == "reconstruir":
+            print(json.dumps({"reconstruidas": reconstruir(db)}, indent=2))
+            return 0
+        reporte = verificar(db)
+        print(json.dumps(reporte, indent=2, default=str))
+        return 1 if reporte["con_deriva"] else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+import hashlib
+
+from fastapi import Request, Response
+
+
+def calcular_etag(*partes) -> str:
+    """ETag fuerte a partir de las versiones de las filas que forman la respuesta"""
+    return '"' + hashlib.sha1(repr(partes).encode()).hexdigest() + '"'
+
+
+def coincide(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match usa comparacion debil: se ignora el prefijo W/
+    etiquetas = [e.strip().removeprefix("W/") for e in if_none_match.split(",")]
+    return etag in etiquetas
+
+
+def no_modificado(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import hmac
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+# bcrypt tarda ~250 ms de CPU por llamada: se hace en un pool de procesos aparte
+# para que un pico de logins no se coma los hilos de los dashboards.
+# HASH_WORKERS=0 desactiva los procesos y usa el threadpool de siempre.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+# Cuantas peticiones pueden esperar turno ademas de las que ya se estan calculando
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "64"))
+
+# Costo de bcrypt centralizado. min/max iguales al default hacen que needs_update
+# marque cualquier hash con otro costo, asi en el login se sube o se baja al actual
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Cache de credenciales ya verificadas (clientes moviles que re-autentican seguido).
+# LOGIN_CACHE_TTL=0 la desactiva
+LOGIN_CACHE_TTL = float(os.getenv("LOGIN_CACHE_TTL", "300"))
+LOGIN_CACHE_SIZE = int(os.getenv("LOGIN_CACHE_SIZE", "1024"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+_executor = None
+_pendientes = 0
+
+
+def _hash(contrasena: str) -> str:
+    return pwd_context.hash(contrasena)
+
+
+def _verify(contrasena: str, contrasena_hash: str) -> bool:
+    return pwd_context.verify(contrasena, contrasena_hash)
+
+
+def _verify_and_update(contrasena: str, contrasena_hash: str):
+    return pwd_context.verify_and_update(contrasena, contrasena_hash)
+
+
+class VerifiedCredentialCache:
+    """LRU con TTL de pares (email, HMAC de la contraseña) ya verificados.
+
+    Cada entrada guarda el hash contra el que se verifico: si el hash del
+    usuario cambia la entrada deja de valer y se descarta. La contraseña nunca
+    se guarda, solo un HMAC con una llave aleatoria propia de cada proceso.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.llave = secrets.token_bytes(32)
+        self.entradas = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _huella(self, contrasena: str) -> bytes:
+        return hmac.new(self.llave, contrasena.encode(), hashlib.sha256).digest()
+
+    def hit(self, email: str, contrasena: str, contrasena_hash: str) -> bool:
+        if self.ttl <= 0:
+            return False
+        with self.lock:
+            entrada = self.entradas.get(email)
+            if entrada is None:
+                return False
+            huella, hash_verificado, expira = entrada
+            if hash_verificado != contrasena_hash or expira < time.monotonic():
+                del self.entradas[email]
+                return False
+            if not hmac.compare_digest(huella, self._huella(contrasena)):
+                return False
+            self.entradas.move_to_end(email)
+            return True
+
+    def put(self, email: str, contrasena: str, contrasena_hash: str):
+        if self.ttl <= 0:
+            return
+        with self.lock:
+            self.entradas[email] = (self._huella(contrasena), contrasena_hash, time.monotonic() + self.ttl)
+            self.entradas.move_to_end(email)
+            while len(self.entradas) > self.max_size:
+                self.entradas.popitem(last=False)
+
+    def invalidate(self, email: str):
+        with self.lock:
+            self.entradas.pop(email, None)
+
+    def clear(self):
+        with self.lock:
+            self.entradas.clear()
+
+
+credential_cache = VerifiedCredentialCache(LOGIN_CACHE_TTL, LOGIN_CACHE_SIZE)
+
+
+def get_executor():
+    global _executor
+    if _executor is None and HASH_WORKERS > 0:
+        _executor = ProcessPoolExecutor(
+            max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _ocupado() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Servidor ocupado, intenta de nuevo",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def _ejecutar(fn, *args):
+    global _pendientes
+    if _pendientes >= max(HASH_WORKERS, 1) + HASH_MAX_QUEUE:
+        raise _ocupado()
+
+    _pendientes += 1
+    try:
+        executor = get_executor()
+        if executor is None:
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+    finally:
+        _pendientes -= 1
+
+
+async def hash_password(contrasena: str) -> str:
+    return await _ejecutar(_hash, contrasena)
+
+
+async def verify_password(contrasena: str, contrasena_hash: str) -> bool:
+    return await _ejecutar(_verify, contrasena, contrasena_hash)
+
+
+async def verify_and_update(contrasena: str, contrasena_hash: str):
+    """Devuelve (valida, hash_nuevo); hash_nuevo es None si el costo ya es el actual"""
+    return await _ejecutar(_verify_and_update, contrasena, contrasena_hash)
+
+
+async def hash_passwords(contrasenas: list) -> list:
+    """Hashea muchas contraseñas usando todos los procesos del pool.
+
+    Va en olas del tamaño del pool: asi no quedan miles de tareas encoladas
+    delante de los logins que lleguen mientras tanto. Cada hash pasa por
+    _ejecutar, asi que cuenta contra el mismo limite de cola. Si la cola se
+    llena a mitad de camino lo ya calculado no se tira: desde ahi se deja de
+    hashear y esas contraseñas vuelven como None, para que quien llama las
+    reporte como filas a reintentar. Si no entro ninguna, 503 como siempre.
+    """
+    # Sin procesos, bcrypt suelta el GIL y los hilos tambien corren en paralelo
+    ola = HASH_WORKERS if get_executor() is not None else min(os.cpu_count() or 1, 1 + HASH_MAX_QUEUE)
+    hashes = []
+    for i in range(0, len(contrasenas), ola):
+        resultados = await asyncio.gather(
+            *(_ejecutar(_hash, c) for c in contrasenas[i:i + ola]), return_exceptions=True
+        )
+        for r in resultados:
+            if isinstance(r, BaseException) and not (isinstance(r, HTTPException) and r.status_code == 503):
+                raise r
+        hashes += [None if isinstance(r, HTTPException) else r for r in resultados]
+        if None in hashes:
+            break
+    if contrasenas and not any(hashes):
+        raise _ocupado()
+    return hashes + [None] * (len(contrasenas) - len(hashes))
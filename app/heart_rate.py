@@ -0,0 +1,182 @@
+"""Frecuencia cardiaca maxima por edad y zonas de Karvonen precalculadas.
+
+Las zonas se guardan en perfiles_atletas.zonas_frecuencia y se recalculan solo
+cuando cambian las entradas (registro, edicion del perfil). La maxima estimada
+(220 - edad) envejece: el job la refresca para todos en lotes.
+
+    python -m app.heart_rate --lote 1000
+"""
+import argparse
+import asyncio
+import json
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.engine import Connection
+
+from app.models import PerfilAtleta
+
+# Limites de las 5 zonas como fraccion de la reserva cardiaca (max - reposo)
+LIMITES_ZONAS = (0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+def edad(fecha_nacimiento: date, hoy: date = None) -> int:
+    hoy = hoy or date.today()
+    return hoy.year - fecha_nacimiento.year - ((hoy.month, hoy.day) < (fecha_nacimiento.month, fecha_nacimiento.day))
+
+
+def fc_maxima_estimada(fecha_nacimiento: date, hoy: date = None) -> int:
+    return 220 - edad(fecha_nacimiento, hoy)
+
+
+def zonas_karvonen(reposo: Optional[int], maxima: Optional[int]) -> Optional[list]:
+    """[{zona, minima, maxima}] con FC = reposo + % * (max - reposo); None si falta algun dato"""
+    if reposo is None or maxima is None or maxima <= reposo:
+        return None
+    reserva = maxima - reposo
+    limites = [round(reposo + p * reserva) for p in LIMITES_ZONAS]
+    return [
+        {"zona": i + 1, "minima": limites[i], "maxima": limites[i + 1]}
+        for i in range(len(limites) - 1)
+    ]
+
+
+def calcular(fecha_nacimiento: date, reposo, maxima, manual: bool, hoy: date = None) -> dict:
+    """Valores derivados de un perfil: la maxima solo se estima si no es manual"""
+    if not manual:
+        maxima = fc_maxima_estimada(fecha_nacimiento, hoy)
+    return {"frecuencia_cardiaca_maxima": maxima, "zonas_frecuencia": zonas_karvonen(reposo, maxima)}
+
+
+def aplicar_a_perfil(perfil: PerfilAtleta, cambios: dict = None):
+    """Recalcula maxima y zonas si cambio alguna entrada; cambios son los campos que mando el cliente.
+
+    Una maxima explicita distinta de la estimada queda como manual (medida en
+    prueba de esfuerzo) y el job no la toca; null o la estimada vuelven al calculo por edad.
+    Devolver la misma estimada que ya estaba guardada (GET y PUT del perfil
+    entero) no cuenta como medida: sigue siendo estimada y se recalcula.
+    """
+    cambios = cambios or {}
+    enviada = cambios.get("frecuencia_cardiaca_maxima")
+    eco = not perfil.frecuencia_cardiaca_maxima_manual and enviada == perfil.frecuencia_cardiaca_maxima
+    if "frecuencia_cardiaca_maxima" in cambios and not eco:
+        perfil.frecuencia_cardiaca_maxima_manual = (
+            enviada is not None and enviada != fc_maxima_estimada(perfil.fecha_nacimiento)
+        )
+        if perfil.frecuencia_cardiaca_maxima_manual:
+            perfil.frecuencia_cardiaca_maxima = enviada
+
+    for campo, valor in calcular(
+        perfil.fecha_nacimiento,
+        perfil.frecuencia_cardiaca_minima,
+        perfil.frecuencia_cardiaca_maxima,
+        bool(perfil.frecuencia_cardiaca_maxima_manual),
+    ).items():
+        # Sin asignar si no cambia: asi no sube la version (y el ETag) de balde
+        if getattr(perfil, campo) != valor:
+            setattr(perfil, campo, valor)
+
+
+def refrescar(conn: Connection, lote: int = 1000, hoy: date = None, al_terminar_lote=None) -> dict:
+    """Recorre perfiles_atletas por id en lotes y actualiza con un executemany solo los que cambiaron.
+
+    al_terminar_lote(conn) se llama despues de cada lote (el job hace commit ahi);
+    devuelve totales y los ids tocados para invalidar los dashboards (el del coach lista a sus atletas).
+    """
+    hoy = hoy or date.today()
+    t = PerfilAtleta.__table__
+    leer = (
+        select(
+            t.c.id_atleta,
+            t.c.id_usuario,
+            t.c.id_entrenador,
+            t.c.fecha_nacimiento,
+            t.c.frecuencia_cardiaca_minima,
+            t.c.frecuencia_cardiaca_maxima,
+            t.c.frecuencia_cardiaca_maxima_manual,
+            t.c.zonas_frecuencia,
+        )
+        .where(t.c.id_atleta > bindparam("desde"))
+        .order_by(t.c.id_atleta)
+        .limit(lote)
+    )
+    escribir = (
+        update(t)
+        .where(t.c.id_atleta == bindparam("b_id"))
+        .values(
+            frecuencia_cardiaca_maxima=bindparam("b_maxima"),
+            zonas_frecuencia=bindparam("b_zonas", type_=t.c.zonas_frecuencia.type),
+        )
+    )
+
+    revisados, usuarios, entrenadores = 0, [], set()
+    desde = 0
+    while True:
+        filas = conn.execute(leer, {"desde": desde}).all()
+        if not filas:
+            break
+        desde = filas[-1].id_atleta
+        revisados += len(filas)
+
+        cambiados = []
+        for f in filas:
+            nuevo = calcular(
+                f.fecha_nacimiento, f.frecuencia_cardiaca_minima, f.frecuencia_cardiaca_maxima,
+                bool(f.frecuencia_cardiaca_maxima_manual), hoy,
+            )
+            if (nuevo["frecuencia_cardiaca_maxima"], nuevo["zonas_frecuencia"]) != (
+                f.frecuencia_cardiaca_maxima, f.zonas_frecuencia
+            ):
+                cambiados.append({
+                    "b_id": f.id_atleta,
+                    "b_maxima": nuevo["frecuencia_cardiaca_maxima"],
+                    "b_zonas": nuevo["zonas_frecuencia"],
+                })
+                usuarios.append(f.id_usuario)
+                entrenadores.add(f.id_entrenador)
+
+        if cambiados:
+            conn.execute(escribir, cambiados)
+        if al_terminar_lote is not None:
+            al_terminar_lote(conn)
+
+    return {
+        "revisados": revisados,
+        "actualizados": len(usuarios),
+        "id_usuarios": usuarios,
+        "id_entrenadores": sorted(e for e in entrenadores if e is not None),
+    }
+
+
+async def _invalidar(claves):
+    from app.cache import cache
+
+    for i in range(0, len(claves), 500):
+        await cache.delete(*claves[i:i + 500])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lote", type=int, default=1000)
+    args = parser.parse_args()
+
+    from app.db import engine, SessionLocal
+    from app.invalidation import claves_dashboard_atletas, claves_dashboard_coaches
+
+    with engine.connect() as conn:
+        resultado = refrescar(conn, args.lote, al_terminar_lote=lambda c: c.commit())
+
+    db = SessionLocal()
+    try:
+        claves = claves_dashboard_atletas(*resultado.pop("id_usuarios"))
+        claves += claves_dashboard_coaches(db, *resultado.pop("id_entrenadores"))
+    finally:
+        db.close()
+    # Con CACHE_BACKEND=redis se borran los dashboards cacheados; en memoria expiran por TTL
+    asyncio.run(_invalidar(claves))
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == "__main__":
+    main()
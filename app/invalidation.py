@@ -0,0 +1,34 @@
+from sqlalchemy.orm import Session
+
+from app.cache import cache_key
+from app.models import PerfilAtleta, PerfilEntrenador
+
+# Claves de cache que dependen de cada tabla; las escrituras calculan aqui
+# exactamente que borrar y lo borran despues del commit
+
+
+def claves_dashboard_atletas(*ids_usuario) -> list:
+    return [cache_key("atleta_dashboard", i) for i in ids_usuario if i is not None]
+
+
+def claves_dashboard_coaches(db: Session, *ids_entrenador) -> list:
+    ids = {i for i in ids_entrenador if i is not None}
+    if not ids:
+        return []
+    ids_usuario = db.query(PerfilEntrenador.id_usuario).filter(PerfilEntrenador.id_entrenador.in_(ids))
+    return [cache_key("coach_dashboard", i) for (i,) in ids_usuario]
+
+
+def claves_dashboard_atletas_de_coach(db: Session, id_entrenador) -> list:
+    # El dashboard del atleta lista los entrenamientos de su coach
+    if id_entrenador is None:
+        return []
+    ids_usuario = db.query(PerfilAtleta.id_usuario).filter(PerfilAtleta.id_entrenador == id_entrenador)
+    return claves_dashboard_atletas(*(i for (i,) in ids_usuario))
+
+
+def claves_entrenamientos(id_entrenador, *ids_entrenamiento) -> list:
+    claves = [cache_key("entrenamiento", i) for i in ids_entrenamiento]
+    if id_entrenador is not None:
+        claves.append(cache_key("entrenamientos_coach", id_entrenador))
+    return claves
@@ -1,19 +1,41 @@
+from importlib import import_module
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import atleta, entrenador, register  # 👈 Importa también register
-from app.routes import auth
-from app.routes import atletas_dashboard
-from app.routes import coach_dashboard
-
+from app.hashing import shutdown_executor
+from app.db import dispose_async_engine, PinPrimarioMiddleware
+from app.query_metrics import QueryMetricsMiddleware
+from app.responses import RespuestaJSON
+from app.precarga import precalentar
 
+# Routers que se montan: (modulo, atributo). Solo se importan los de esta tabla;
+# atleta y entrenador estan vacios y ya no se cargan. El presupuesto de arranque
+# lo mide benchmarks/arranque.py
+ROUTERS = (
+    ("app.routes.register", "router"),
+    ("app.routes.auth", "router"),
+    ("app.routes.atletas_dashboard", "router"),
+    ("app.routes.coach_dashboard", "router"),
+    ("app.routes.export", "router"),
+    ("app.routes.internal", "router"),
+    ("app.routes.internal", "metrics_router"),
+)
 
 
 app = FastAPI(
     title="API PI",
     description="API creada para la aplicación móvil del PI",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson en vez de json.dumps para todo lo que no devuelve su propia Response
+    default_response_class=RespuestaJSON,
 )
 
+# NumPy de las analiticas se carga en un hilo con el worker ya arrancado
+app.add_event_handler("startup", precalentar)
+# Cerrar el pool de procesos de bcrypt al apagar el worker
+app.add_event_handler("shutdown", shutdown_executor)
+app.add_event_handler("shutdown", dispose_async_engine)
+
 # Configuración CORS para aceptar peticiones desde tu app móvil o localhost (ajusta la URL si usas producción)
 app.add_middleware(
     CORSMiddleware,
@@ -23,10 +45,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Consultas, tiempo de DB y consulta mas lenta por peticion (Server-Timing, log y /metrics)
+app.add_middleware(QueryMetricsMiddleware)
+
+# Con replicas de lectura: quien escribe lee del primario un rato (no hace nada sin replicas)
+app.add_middleware(PinPrimarioMiddleware)
+
 # Incluir las rutas
-# app.include_router(atleta.router)
-# app.include_router(entrenador.router)
-app.include_router(register.router) 
-app.include_router(auth.router)
-app.include_router(atletas_dashboard.router)
-app.include_router(coach_dashboard.router)
\ No newline at end of file
+for modulo, atributo in ROUTERS:
+    app.include_router(getattr(import_module(modulo), atributo))
@@ -1,8 +1,14 @@
-from sqlalchemy import Column, Integer, String, Enum, DateTime, Boolean, ForeignKey, DECIMAL, Date, Text
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Enum, DateTime, Boolean, ForeignKey, DECIMAL, Date, Text, JSON
+from sqlalchemy import Index, UniqueConstraint
+from sqlalchemy.sql import func, literal_column
 from sqlalchemy.orm import relationship
 from app.db import Base
 
+
+def columna_version():
+    # Se incrementa en cada UPDATE (ORM o core); sirve para calcular ETags
+    return Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version + 1"))
+
 class Usuario(Base):
     __tablename__ = 'usuarios'
 
@@ -17,6 +23,10 @@ class Usuario(Base):
 
 class PerfilAtleta(Base):
     __tablename__ = 'perfiles_atletas'
+    __table_args__ = (
+        UniqueConstraint('id_usuario', name='uq_perfiles_atletas_id_usuario'),
+        Index('ix_perfiles_atletas_id_entrenador', 'id_entrenador'),
+    )
 
     id_atleta = Column(Integer, primary_key=True, autoincrement=True)
     id_usuario = Column(Integer, ForeignKey('usuarios.id_usuario'), nullable=False)
@@ -28,7 +38,13 @@ class PerfilAtleta(Base):
     id_entrenador = Column(Integer, ForeignKey('entrenadores.id_entrenador'), nullable=True)
     frecuencia_cardiaca_maxima = Column(Integer, nullable=True)
     frecuencia_cardiaca_minima = Column(Integer, nullable=True)
+    # Maxima medida por el atleta: el refresco por edad de app/heart_rate.py no la pisa
+    frecuencia_cardiaca_maxima_manual = Column(Boolean, nullable=False, default=False, server_default="0")
+    # Zonas de Karvonen precalculadas: [{zona, minima, maxima}]
+    zonas_frecuencia = Column(JSON(none_as_null=True), nullable=True)
+    version = columna_version()
 
+    usuario = relationship("Usuario")
     entrenador = relationship("Entrenador", back_populates="atletas")
     asignaciones = relationship("AsignacionAtleta", back_populates="atleta", cascade="all, delete-orphan")
 
@@ -45,6 +61,10 @@ class Entrenador(Base):
 
 class Entrenamiento(Base):
     __tablename__ = "entrenamientos"
+    # El compuesto tambien sirve para filtrar solo por id_entrenador (prefijo)
+    __table_args__ = (
+        Index("ix_entrenamientos_entrenador_fecha", "id_entrenador", "fecha_creacion"),
+    )
 
     id_entrenamiento = Column(Integer, primary_key=True, index=True)
     id_entrenador = Column(Integer, ForeignKey("entrenadores.id_entrenador"), nullable=False)
@@ -54,6 +74,7 @@ class Entrenamiento(Base):
     duracion_estimada = Column(Integer)
     fecha_creacion = Column(DateTime)
     nivel_dificultad = Column(Enum("principiante", "intermedio", "avanzado"))
+    version = columna_version()
 
     entrenador = relationship("Entrenador", back_populates="entrenamientos")
     asignaciones = relationship("AsignacionAtleta", back_populates="entrenamiento", cascade="all, delete-orphan")
@@ -61,8 +82,12 @@ class Entrenamiento(Base):
 
 class PerfilEntrenador(Base):
     __tablename__ = 'perfiles_entrenadores'
+    __table_args__ = (
+        UniqueConstraint('id_usuario', name='uq_perfiles_entrenadores_id_usuario'),
+    )
 
-    id_entrenador = Column(Integer, primary_key=True, autoincrement=True)
+    # Mismo id que su fila en entrenadores, que se crea primero (app/coach_read_model.py)
+    id_entrenador = Column(Integer, ForeignKey('entrenadores.id_entrenador'), primary_key=True, autoincrement=False)
     id_usuario = Column(Integer, ForeignKey('usuarios.id_usuario'), nullable=False)
     nombre_completo = Column(String(100), nullable=False)
     fecha_nacimiento = Column(Date, nullable=True)
@@ -72,6 +97,13 @@ class PerfilEntrenador(Base):
 
 class AsignacionAtleta(Base):
     __tablename__ = "asignaciones_atletas"
+    # Los listados filtran por atleta (o por entrenamiento) [+ estado] y ordenan por
+    # fecha_asignacion; los prefijos cubren tambien las busquedas por id_atleta / id_entrenamiento
+    __table_args__ = (
+        Index("ix_asignaciones_atleta_fecha", "id_atleta", "fecha_asignacion"),
+        Index("ix_asignaciones_atleta_estado_fecha", "id_atleta", "estado", "fecha_asignacion"),
+        Index("ix_asignaciones_entrenamiento_estado_fecha", "id_entrenamiento", "estado", "fecha_asignacion"),
+    )
 
     id_asignacion = Column(Integer, primary_key=True, autoincrement=True)
     id_entrenamiento = Column(Integer, ForeignKey("entrenamientos.id_entrenamiento"), nullable=False)
@@ -82,6 +114,43 @@ class AsignacionAtleta(Base):
     estado = Column(Enum("pendiente", "en_progreso", "completado"), nullable=False, default="pendiente")
     feedback = Column(Text, nullable=True)
     calificacion = Column(Integer, nullable=True)
+    version = columna_version()
 
     atleta = relationship("PerfilAtleta", back_populates="asignaciones")
     entrenamiento = relationship("Entrenamiento", back_populates="asignaciones")
+
+
+class _ColumnasResumen:
+    # Contadores de asignaciones; los mantiene app/aggregates.py en la misma transaccion
+    pendientes = Column(Integer, nullable=False, default=0, server_default="0")
+    en_progreso = Column(Integer, nullable=False, default=0, server_default="0")
+    completadas = Column(Integer, nullable=False, default=0, server_default="0")
+    calificadas = Column(Integer, nullable=False, default=0, server_default="0")
+    suma_calificaciones = Column(Integer, nullable=False, default=0, server_default="0")
+    ultima_completada = Column(Date, nullable=True)
+
+
+class ResumenAtleta(_ColumnasResumen, Base):
+    __tablename__ = "resumen_atletas"
+
+    id_atleta = Column(Integer, ForeignKey("perfiles_atletas.id_atleta"), primary_key=True, autoincrement=False)
+
+
+class ResumenEntrenador(_ColumnasResumen, Base):
+    # Por coach del entrenamiento asignado (no cambia aunque el atleta cambie de coach)
+    __tablename__ = "resumen_entrenadores"
+
+    id_entrenador = Column(Integer, ForeignKey("entrenadores.id_entrenador"), primary_key=True, autoincrement=False)
+
+
+class LecturaEntrenador(Base):
+    # Modelo de lectura del coach: identidad (entrenadores) + perfil (perfiles_entrenadores,
+    # que comparte el id_entrenador) + conteos. Lo refresca app/coach_read_model.py en cada escritura
+    __tablename__ = "lectura_entrenadores"
+
+    id_entrenador = Column(Integer, ForeignKey("entrenadores.id_entrenador"), primary_key=True, autoincrement=False)
+    id_usuario = Column(Integer, nullable=True)
+    nombre_completo = Column(String(100), nullable=True)
+    especialidad = Column(String(50), nullable=True)
+    atletas = Column(Integer, nullable=False, default=0, server_default="0")
+    entrenamientos = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,134 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, or_
+
+from app.responses import respuesta_json
+
+# Sin limit se devuelve todo como antes; con limit nunca mas de MAX_LIMIT por pagina
+MAX_LIMIT = 500
+
+
+class Paginacion:
+    """Parametros de keyset pagination (cursor = ultimo id de la pagina anterior) y proyeccion"""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+        cursor: Optional[int] = Query(None, ge=0),
+        fields: Optional[str] = Query(None, description="Campos separados por coma, ej. id_atleta,nombre_completo"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = fields
+
+    def sin_parametros(self) -> bool:
+        return self.limit is None and self.cursor is None and not self.fields
+
+
+def columnas_proyectadas(fields: Optional[str], modelo, schema, pk):
+    """Convierte ?fields= en columnas del modelo; la llave primaria siempre va para poder paginar"""
+    if not fields:
+        return None
+
+    nombres = [f.strip() for f in fields.split(",") if f.strip()]
+    invalidos = [n for n in nombres if n not in schema.model_fields]
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"Campos no válidos: {', '.join(invalidos)}")
+
+    if pk.key not in nombres:
+        nombres.insert(0, pk.key)
+    return [getattr(modelo, n) for n in nombres]
+
+
+def paginar(query, pk, paginacion: Paginacion):
+    """Aplica el keyset sobre pk y devuelve (filas, siguiente_cursor)"""
+    if paginacion.cursor is not None:
+        query = query.filter(pk > paginacion.cursor)
+    query = query.order_by(pk)
+
+    if paginacion.limit is None:
+        return query.all(), None
+
+    # Se pide uno de mas para saber si hay otra pagina sin hacer un COUNT
+    filas = query.limit(paginacion.limit + 1).all()
+    siguiente = None
+    if len(filas) > paginacion.limit:
+        filas = filas[:paginacion.limit]
+        siguiente = getattr(filas[-1], pk.key)
+    return filas, siguiente
+
+
+def codificar_cursor(valor, id_) -> str:
+    """Cursor opaco para keyset sobre (columna de orden, pk)"""
+    if isinstance(valor, (date, datetime)):
+        valor = valor.isoformat()
+    crudo = json.dumps([valor, id_], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, columna):
+    """(valor, id) del cursor, con el valor convertido al tipo de la columna; 400 si no es valido"""
+    try:
+        valor, id_ = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        tipo = columna.type.python_type
+        if valor is not None and tipo in (date, datetime):
+            valor = tipo.fromisoformat(valor)
+        elif valor is not None:
+            valor = tipo(valor)
+        return valor, int(id_)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor no válido")
+
+
+def paginar_ordenado(query, columna, pk, descendente: bool, limit: int, cursor: Optional[str] = None):
+    """Keyset sobre (columna, pk) en el sentido pedido; devuelve (filas, siguiente_cursor).
+
+    Con una columna nullable los NULL van al final en los dos sentidos; sobre
+    una NOT NULL el ORDER BY queda igual al indice y no hace falta ordenar aparte.
+    """
+    mayor = (lambda a, b: a < b) if descendente else (lambda a, b: a > b)
+    nullable = columna.nullable
+
+    if cursor is not None:
+        valor, id_ = decodificar_cursor(cursor, columna)
+        if valor is None:
+            # Ya estamos en el tramo de los NULL
+            query = query.filter(columna.is_(None), mayor(pk, id_))
+        else:
+            siguiente_valor = or_(mayor(columna, valor), and_(columna == valor, mayor(pk, id_)))
+            query = query.filter(or_(siguiente_valor, columna.is_(None)) if nullable else siguiente_valor)
+
+    orden = [columna.desc(), pk.desc()] if descendente else [columna.asc(), pk.asc()]
+    if nullable:
+        orden.insert(0, columna.is_(None))
+    filas = query.order_by(*orden).limit(limit + 1).all()
+
+    siguiente = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(getattr(ultima, columna.key), getattr(ultima, pk.key))
+    return filas, siguiente
+
+
+def filas_a_dicts(filas, columnas):
+    if columnas is None:
+        return filas
+    return [dict(f._mapping) for f in filas]
+
+
+def cabeceras_cursor(siguiente) -> dict:
+    return {"X-Next-Cursor": str(siguiente)} if siguiente is not None else {}
+
+
+def poner_cursor(response: Response, siguiente):
+    response.headers.update(cabeceras_cursor(siguiente))
+
+
+def respuesta_proyectada(contenido, siguiente):
+    # Con proyeccion la respuesta no cumple el response_model completo, se manda tal cual
+    return respuesta_json(contenido, headers=cabeceras_cursor(siguiente))
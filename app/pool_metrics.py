@@ -0,0 +1,170 @@
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# Limites (en segundos) de los buckets del histograma de espera en el pool
+BUCKETS_ESPERA = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolMetrics:
+    """Contadores de checkout/checkin/overflow y tiempos de espera del pool"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.checkouts_overflow = 0
+            self.conexiones_nuevas = 0
+            self.timeouts = 0
+            self.espera_total = 0.0
+            self.espera_max = 0.0
+            self.espera_buckets = [0] * (len(BUCKETS_ESPERA) + 1)
+
+    def registrar_espera(self, segundos: float):
+        with self.lock:
+            self.espera_total += segundos
+            self.espera_max = max(self.espera_max, segundos)
+            self.espera_buckets[bisect_left(BUCKETS_ESPERA, segundos)] += 1
+
+    def registrar_timeout(self):
+        with self.lock:
+            self.timeouts += 1
+
+    def on_checkout(self, pool):
+        with self.lock:
+            self.checkouts += 1
+            if isinstance(pool, QueuePool) and pool.overflow() > 0:
+                self.checkouts_overflow += 1
+
+    def on_checkin(self):
+        with self.lock:
+            self.checkins += 1
+
+    def on_connect(self):
+        with self.lock:
+            self.conexiones_nuevas += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            esperas = sum(self.espera_buckets)
+            acumulado = 0
+            histograma = {}
+            for limite, n in zip(list(BUCKETS_ESPERA) + ["+Inf"], self.espera_buckets):
+                acumulado += n
+                histograma[str(limite)] = acumulado
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "checkouts_overflow": self.checkouts_overflow,
+                "conexiones_nuevas": self.conexiones_nuevas,
+                "timeouts": self.timeouts,
+                "espera": {
+                    "count": esperas,
+                    "total_segundos": self.espera_total,
+                    "max_segundos": self.espera_max,
+                    "promedio_segundos": self.espera_total / esperas if esperas else 0.0,
+                    "buckets": histograma,
+                },
+            }
+
+
+class MetricasPools:
+    """Un PoolMetrics por pool ("primario", "primario_async", "replica:<url>"...),
+    asi los numeros de una replica no se suman a los del primario"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pools = {}
+
+    def get(self, nombre: str) -> PoolMetrics:
+        with self.lock:
+            if nombre not in self.pools:
+                self.pools[nombre] = PoolMetrics()
+            return self.pools[nombre]
+
+    def reset(self):
+        with self.lock:
+            metricas = list(self.pools.values())
+        for m in metricas:
+            m.reset()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            pools = dict(self.pools)
+        return {nombre: m.snapshot() for nombre, m in pools.items()}
+
+
+pool_metrics = MetricasPools()
+
+
+class _EsperaMedidaMixin:
+    # Las pone instrumentar_pool; recreate() (dispose, conexion invalidada) arma un pool nuevo
+    # con los mismos eventos pero sin los atributos, por eso se pasan a mano
+    metricas = None
+
+    def recreate(self):
+        nuevo = super().recreate()
+        nuevo.metricas = self.metricas
+        return nuevo
+
+    # _do_get es donde el QueuePool se bloquea esperando una conexion libre
+    def _do_get(self):
+        if self.metricas is None:
+            return super()._do_get()
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.metricas.registrar_timeout()
+            raise
+        finally:
+            self.metricas.registrar_espera(time.perf_counter() - inicio)
+
+
+class MeteredQueuePool(_EsperaMedidaMixin, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(_EsperaMedidaMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrumentar_pool(engine, nombre: str = "primario"):
+    """Engancha los eventos del pool del engine (sync o el sync_engine de uno async);
+    las metricas van a pool_metrics.get(nombre)"""
+    metricas = pool_metrics.get(nombre)
+    engine.pool.metricas = metricas
+
+    # engine.pool y no el pool de ahora: despues de un recreate() el overflow es el del nuevo
+    @event.listens_for(engine.pool, "checkout")
+    def _checkout(dbapi_conn, conn_record, conn_proxy):
+        metricas.on_checkout(engine.pool)
+
+    @event.listens_for(engine.pool, "checkin")
+    def _checkin(dbapi_conn, conn_record):
+        metricas.on_checkin()
+
+    @event.listens_for(engine.pool, "connect")
+    def _connect(dbapi_conn, conn_record):
+        metricas.on_connect()
+
+
+def estado_pool(engine) -> dict:
+    pool = engine.pool
+    estado = {"clase": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        estado.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    return estado
@@ -0,0 +1,28 @@
+"""app.analytics (NumPy) sin bloquear el event loop.
+
+No se importa con app.main (presupuesto de benchmarks/arranque.py). Al arrancar
+el worker precalentar() lo carga en un hilo aparte, y los handlers lo piden con
+await analytics(): si ese hilo todavia no termino, la espera es en el
+threadpool y no en el loop. app.serve lo importa en el maestro antes del fork,
+asi los workers lo heredan ya cargado y comparten sus paginas.
+"""
+import threading
+from importlib import import_module
+
+from starlette.concurrency import run_in_threadpool
+
+MODULO = "app.analytics"
+
+_modulo = None
+
+
+def precalentar():
+    threading.Thread(target=import_module, args=(MODULO,), name="precarga-analytics", daemon=True).start()
+
+
+async def analytics():
+    global _modulo
+    if _modulo is None:
+        # El lock de import hace que este hilo espere al de precalentar() si ya empezo
+        _modulo = await run_in_threadpool(import_module, MODULO)
+    return _modulo
@@ -0,0 +1,225 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+
+logger = logging.getLogger("app.sql")
+log_peticiones = logging.getLogger("app.peticiones")
+
+# Consultas que tarden mas que esto (ms) se loguean con el SQL y la forma de sus parametros
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Los valores van a parar a hashes de contraseña, emails y tokens: por defecto solo
+# se loguean cuantos y de que tipo. SLOW_QUERY_LOG_VALORES=1 los muestra (solo para depurar)
+SLOW_QUERY_LOG_VALORES = os.getenv("SLOW_QUERY_LOG_VALORES", "0") == "1"
+# En executemany solo se loguean las primeras filas de parametros
+SLOW_QUERY_MAX_PARAMS = 20
+
+# Limites de los histogramas por ruta (segundos y numero de consultas)
+BUCKETS_DURACION = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class EstadisticasPeticion:
+    """Lo que hizo una peticion contra la base: consultas, tiempo total y la mas lenta"""
+
+    __slots__ = ("consultas", "tiempo_db", "mas_lenta", "sql_mas_lenta")
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.mas_lenta = 0.0
+        self.sql_mas_lenta = None
+
+    def registrar(self, segundos: float, sql: str):
+        self.consultas += 1
+        self.tiempo_db += segundos
+        if segundos > self.mas_lenta:
+            self.mas_lenta = segundos
+            self.sql_mas_lenta = sql
+
+
+# Objeto mutable por peticion: el threadpool y run_sync copian el contexto,
+# asi que las consultas hechas ahi suman sobre el mismo objeto
+estadisticas_actuales = contextvars.ContextVar("estadisticas_actuales", default=None)
+
+
+def _tipos(fila):
+    if isinstance(fila, dict):
+        return {clave: type(valor).__name__ for clave, valor in fila.items()}
+    if isinstance(fila, (list, tuple)):
+        return [type(valor).__name__ for valor in fila]
+    return type(fila).__name__
+
+
+def _parametros_log(parametros, executemany: bool):
+    if not SLOW_QUERY_LOG_VALORES:
+        if executemany and isinstance(parametros, (list, tuple)):
+            return {"filas": len(parametros), "tipos": _tipos(parametros[0]) if parametros else None}
+        return {"tipos": _tipos(parametros)}
+    if executemany and isinstance(parametros, (list, tuple)) and len(parametros) > SLOW_QUERY_MAX_PARAMS:
+        return repr(list(parametros[:SLOW_QUERY_MAX_PARAMS])) + f" ... (+{len(parametros) - SLOW_QUERY_MAX_PARAMS} filas)"
+    return repr(parametros)
+
+
+def instrumentar_consultas(engine):
+    """Engancha before/after_cursor_execute del engine (sync o el sync_engine de uno async)"""
+
+    # El inicio va en el contexto de ejecucion de cada sentencia: si falla no hay
+    # after_cursor_execute, pero el contexto se descarta con ella y no queda nada colgado
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        context._inicio_consulta = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        segundos = time.perf_counter() - context._inicio_consulta
+
+        estadisticas = estadisticas_actuales.get()
+        if estadisticas is not None:
+            estadisticas.registrar(segundos, statement)
+
+        if segundos * 1000 >= SLOW_QUERY_MS:
+            route_metrics.registrar_consulta_lenta()
+            logger.warning(json.dumps({
+                "evento": "consulta_lenta",
+                "ms": round(segundos * 1000, 3),
+                "sql": statement,
+                "parametros": _parametros_log(parameters, executemany),
+            }, ensure_ascii=False))
+
+
+class _Histograma:
+    def __init__(self, limites):
+        self.limites = limites
+        self.buckets = [0] * (len(limites) + 1)
+        self.suma = 0.0
+        self.count = 0
+
+    def observar(self, valor):
+        self.buckets[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.count += 1
+
+    def lineas(self, nombre: str, etiquetas: str):
+        acumulado = 0
+        for limite, n in zip(list(self.limites) + ["+Inf"], self.buckets):
+            acumulado += n
+            yield f'{nombre}_bucket{{{etiquetas},le="{limite}"}} {acumulado}'
+        yield f"{nombre}_sum{{{etiquetas}}} {self.suma}"
+        yield f"{nombre}_count{{{etiquetas}}} {self.count}"
+
+
+class RouteMetrics:
+    """Histogramas por (metodo, ruta, status) de duracion, tiempo de DB y consultas"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.rutas = {}
+            self.consultas_lentas = 0
+
+    def registrar(self, metodo: str, ruta: str, status: int, duracion: float, estadisticas: EstadisticasPeticion):
+        with self.lock:
+            h = self.rutas.get((metodo, ruta, status))
+            if h is None:
+                h = self.rutas[(metodo, ruta, status)] = (
+                    _Histograma(BUCKETS_DURACION),
+                    _Histograma(BUCKETS_DURACION),
+                    _Histograma(BUCKETS_CONSULTAS),
+                )
+            h[0].observar(duracion)
+            h[1].observar(estadisticas.tiempo_db)
+            h[2].observar(estadisticas.consultas)
+
+    def registrar_consulta_lenta(self):
+        with self.lock:
+            self.consultas_lentas += 1
+
+    def prometheus(self) -> str:
+        """Formato de texto de Prometheus (version 0.0.4)"""
+        metricas = (
+            ("http_request_duration_seconds", "Duracion de la peticion"),
+            ("http_request_db_seconds", "Tiempo total en la base por peticion"),
+            ("http_request_db_queries", "Consultas SQL por peticion"),
+        )
+        lineas = []
+        with self.lock:
+            for i, (nombre, ayuda) in enumerate(metricas):
+                lineas.append(f"# HELP {nombre} {ayuda}")
+                lineas.append(f"# TYPE {nombre} histogram")
+                for (metodo, ruta, status), h in sorted(self.rutas.items()):
+                    etiquetas = f'method="{metodo}",route="{ruta}",status="{status}"'
+                    lineas.extend(h[i].lineas(nombre, etiquetas))
+            lineas.append("# HELP db_slow_queries_total Consultas por encima de SLOW_QUERY_MS")
+            lineas.append("# TYPE db_slow_queries_total counter")
+            lineas.append(f"db_slow_queries_total {self.consultas_lentas}")
+        return "\n".join(lineas) + "\n"
+
+
+route_metrics = RouteMetrics()
+
+
+class QueryMetricsMiddleware:
+    """Middleware ASGI: cuenta las consultas de cada peticion, agrega Server-Timing,
+    deja una linea de log JSON y alimenta los histogramas de /metrics"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        estadisticas = EstadisticasPeticion()
+        token = estadisticas_actuales.set(estadisticas)
+        inicio = time.perf_counter()
+        status = 500
+
+        async def enviar(mensaje):
+            nonlocal status
+            if mensaje["type"] == "http.response.start":
+                status = mensaje["status"]
+                # Lo de una StreamingResponse posterior a los headers ya no entra aqui, si en el log
+                mensaje.setdefault("headers", [])
+                mensaje["headers"] = list(mensaje["headers"]) + [
+                    (b"server-timing", _server_timing(estadisticas, time.perf_counter() - inicio).encode())
+                ]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            estadisticas_actuales.reset(token)
+            duracion = time.perf_counter() - inicio
+            # Plantilla de la ruta (/atletas/{id_usuario}), no la URL: asi no explotan las series
+            ruta = getattr(scope.get("route"), "path", "sin_ruta")
+            route_metrics.registrar(scope["method"], ruta, status, duracion, estadisticas)
+            if log_peticiones.isEnabledFor(logging.INFO):
+                log_peticiones.info(json.dumps({
+                    "evento": "peticion",
+                    "metodo": scope["method"],
+                    "ruta": ruta,
+                    "path": scope["path"],
+                    "status": status,
+                    "ms": round(duracion * 1000, 3),
+                    "consultas": estadisticas.consultas,
+                    "db_ms": round(estadisticas.tiempo_db * 1000, 3),
+                    "consulta_mas_lenta_ms": round(estadisticas.mas_lenta * 1000, 3),
+                    "sql_mas_lenta": estadisticas.sql_mas_lenta,
+                }, ensure_ascii=False))
+
+
+def _server_timing(estadisticas: EstadisticasPeticion, total: float) -> str:
+    return ", ".join([
+        f'db;dur={estadisticas.tiempo_db * 1000:.3f};desc="{estadisticas.consultas} queries"',
+        f"db-max;dur={estadisticas.mas_lenta * 1000:.3f}",
+        f"app;dur={total * 1000:.3f}",
+    ])
@@ -0,0 +1,29 @@
+from decimal import Decimal
+
+import orjson
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel
+
+
+def _default(valor):
+    # orjson ya maneja date/datetime/enum; DECIMAL de MySQL llega como Decimal
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError
+
+
+class RespuestaJSON(ORJSONResponse):
+    """ORJSONResponse que ademas acepta Decimal; es la response_class por defecto de la app"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def respuesta_json(contenido, headers: dict = None) -> Response:
+    """Manda contenido ya listo (dicts del cache, model_dump) sin pasar otra vez por response_model"""
+    return RespuestaJSON(contenido, headers=headers)
+
+
+def respuesta_modelo(modelo: BaseModel, headers: dict = None) -> Response:
+    """Modelo ya validado: lo serializa pydantic-core directo a bytes, sin re-validarlo"""
+    return Response(modelo.model_dump_json(), media_type="application/json", headers=headers)
@@ -1,60 +1,143 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from app.db import get_db
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app.db import get_session, get_session_lectura, run_db, es_replica
 from app import models, schemas
-from app.models import PerfilAtleta, Entrenador, Entrenamiento
-from app.schemas import PerfilAtletaDashboardResponse, EntrenamientoSchema, AtletaOut, AtletaUpdateSchema
+from app.models import PerfilAtleta, Entrenamiento, AsignacionAtleta, ResumenAtleta, LecturaEntrenador
+from app.schemas import (
+    PerfilAtletaDashboardResponse,
+    EntrenamientoSchema,
+    AtletaOut,
+    AtletaUpdateSchema,
+    AtletaEditado,
+    AtletaActualizadoResponse,
+    AnaliticaAtletaResponse,
+    AsignacionEstadoUpdate,
+    AsignacionResponse,
+    AsignacionDetalleResponse,
+    ResumenAtletaResponse,
+    TokenPayload,
+)
+from app.security import require_tipo, verificar_atleta
+from app.cache import cache, cache_key
+from app.invalidation import claves_dashboard_atletas, claves_dashboard_coaches
+from app.etag import calcular_etag, coincide, no_modificado
+from app.responses import respuesta_json, respuesta_modelo
+from app.aggregates import CambiosResumen, resumen_a_dict
+from app.heart_rate import aplicar_a_perfil
+from app.coach_read_model import refrescar as refrescar_coaches
+from app.assignment_filters import FiltrosAsignaciones, listar as listar_asignaciones
+from app.pagination import poner_cursor
+from app.precarga import analytics as cargar_analytics
 
 router = APIRouter(prefix="/atletas", tags=["Atleta Dashboard"])
 
+
+# Dashboard del atleta autenticado: id y rol salen del token, sin consultar Usuario
+@router.get("/me", response_model=PerfilAtletaDashboardResponse)
+async def get_mi_dashboard(
+    request: Request,
+    usuario: TokenPayload = Depends(require_tipo("atleta")),
+    db=Depends(get_session_lectura),
+):
+    return await get_atleta_dashboard(usuario.id_usuario, request, db)
+
 # Dashboard detallado por ID de usuario
 @router.get("/{id_usuario}", response_model=PerfilAtletaDashboardResponse)
-def get_atleta_dashboard(id_usuario: int, db: Session = Depends(get_db)):
-    atleta = db.query(PerfilAtleta).filter(PerfilAtleta.id_usuario == id_usuario).first()
+async def get_atleta_dashboard(id_usuario: int, request: Request, db=Depends(get_session_lectura)):
+    clave = cache_key("atleta_dashboard", id_usuario)
+    cacheado = await cache.get(clave)
+    if cacheado is not None:
+        if coincide(request, cacheado["etag"]):
+            return no_modificado(cacheado["etag"])
+        # Lo cacheado ya paso por el schema: se manda tal cual, sin re-validar
+        return respuesta_json(cacheado["datos"], headers={"ETag": cacheado["etag"]})
 
-    if not atleta:
+    def version(db: Session):
+        # Una sola consulta: version del perfil + pares (id, version) de los entrenamientos del coach
+        return [
+            tuple(fila) for fila in (
+                db.query(
+                    PerfilAtleta.id_atleta,
+                    PerfilAtleta.version,
+                    PerfilAtleta.id_entrenador,
+                    Entrenamiento.id_entrenamiento,
+                    Entrenamiento.version,
+                )
+                .outerjoin(Entrenamiento, Entrenamiento.id_entrenador == PerfilAtleta.id_entrenador)
+                .filter(PerfilAtleta.id_usuario == id_usuario)
+                .order_by(Entrenamiento.id_entrenamiento)
+                .all()
+            )
+        ]
+
+    filas_version = await run_db(db, version)
+    if not filas_version:
         raise HTTPException(status_code=404, detail="Atleta no encontrado")
 
-    nombre_entrenador = None
-    if atleta.id_entrenador:
-        entrenador = db.query(Entrenador).filter(Entrenador.id_entrenador == atleta.id_entrenador).first()
-        if entrenador:
-            nombre_entrenador = entrenador.nombre_completo
-
-    entrenamientos = []
-    if atleta.id_entrenador:
-        entrenamientos_db = db.query(Entrenamiento).filter(Entrenamiento.id_entrenador == atleta.id_entrenador).all()
-        entrenamientos = [
-            EntrenamientoSchema(
-                id=e.id_entrenamiento,
-                titulo=e.titulo,
-                descripcion=e.descripcion,
-                duracion=e.duracion_estimada,
-                fecha_creacion=e.fecha_creacion,
-                dificultad=e.nivel_dificultad,
-                estado="pendiente"
-            ) for e in entrenamientos_db
-        ]
+    etag = calcular_etag("atleta_dashboard", filas_version)
+    if coincide(request, etag):
+        return no_modificado(etag)
+
+    def consulta(db: Session):
+        # El nombre del coach viene del modelo de lectura en el mismo SELECT
+        fila = (
+            db.query(PerfilAtleta, LecturaEntrenador.nombre_completo)
+            .outerjoin(LecturaEntrenador, LecturaEntrenador.id_entrenador == PerfilAtleta.id_entrenador)
+            .filter(PerfilAtleta.id_usuario == id_usuario)
+            .first()
+        )
+
+        if not fila:
+            raise HTTPException(status_code=404, detail="Atleta no encontrado")
+        atleta, nombre_entrenador = fila
+
+        entrenamientos = []
+        if atleta.id_entrenador:
+            entrenamientos_db = db.query(Entrenamiento).filter(Entrenamiento.id_entrenador == atleta.id_entrenador).all()
+            entrenamientos = [
+                EntrenamientoSchema(
+                    id=e.id_entrenamiento,
+                    titulo=e.titulo,
+                    descripcion=e.descripcion,
+                    duracion=e.duracion_estimada,
+                    fecha_creacion=e.fecha_creacion,
+                    dificultad=e.nivel_dificultad,
+                    estado="pendiente"
+                ) for e in entrenamientos_db
+            ]
 
-    return {
-        "id_atleta": atleta.id_atleta,
-        "id_usuario": atleta.id_usuario,
-        "nombre_completo": atleta.nombre_completo,
-        "fecha_nacimiento": atleta.fecha_nacimiento,
-        "altura": atleta.altura,
-        "peso": atleta.peso,
-        "deporte": atleta.deporte,
-        "frecuencia_cardiaca_minima": atleta.frecuencia_cardiaca_minima,
-        "frecuencia_cardiaca_maxima": atleta.frecuencia_cardiaca_maxima,
-        "nombre_entrenador": nombre_entrenador,
-        "entrenamientos": entrenamientos
-    }
+        return {
+            "id_atleta": atleta.id_atleta,
+            "id_usuario": atleta.id_usuario,
+            "nombre_completo": atleta.nombre_completo,
+            "fecha_nacimiento": atleta.fecha_nacimiento,
+            "altura": atleta.altura,
+            "peso": atleta.peso,
+            "deporte": atleta.deporte,
+            "frecuencia_cardiaca_minima": atleta.frecuencia_cardiaca_minima,
+            "frecuencia_cardiaca_maxima": atleta.frecuencia_cardiaca_maxima,
+            "zonas_frecuencia": atleta.zonas_frecuencia,
+            "nombre_entrenador": nombre_entrenador,
+            "entrenamientos": entrenamientos
+        }
+
+    # Se valida una sola vez aqui; FastAPI no vuelve a pasarlo por response_model
+    dashboard = PerfilAtletaDashboardResponse.model_validate(await run_db(db, consulta)).model_dump(mode="json")
+    if not es_replica(db):
+        await cache.set(clave, {"etag": etag, "datos": dashboard})
+    return respuesta_json(dashboard, headers={"ETag": etag})
 
 
 # Datos básicos por id_atleta (opcional)
 @router.get("/basico/{atleta_id}", response_model=AtletaOut)
-def get_atleta_by_id(atleta_id: int, db: Session = Depends(get_db)):
-    atleta = db.query(PerfilAtleta).filter(PerfilAtleta.id_atleta == atleta_id).first()
+async def get_atleta_by_id(atleta_id: int, db=Depends(get_session_lectura)):
+    def consulta(db: Session):
+        return db.query(PerfilAtleta).filter(PerfilAtleta.id_atleta == atleta_id).first()
+
+    atleta = await run_db(db, consulta)
     if not atleta:
         raise HTTPException(status_code=404, detail="Atleta no encontrado")
     return atleta
@@ -62,77 +145,232 @@ def get_atleta_by_id(atleta_id: int, db: Session = Depends(get_db)):
 
 # Obtener atleta por id_usuario (para login)
 @router.get("/usuario/{id_usuario}", response_model=AtletaOut)
-def get_atleta_by_usuario(id_usuario: int, db: Session = Depends(get_db)):
-    atleta = db.query(PerfilAtleta).filter(PerfilAtleta.id_usuario == id_usuario).first()
+async def get_atleta_by_usuario(id_usuario: int, db=Depends(get_session_lectura)):
+    def consulta(db: Session):
+        return db.query(PerfilAtleta).filter(PerfilAtleta.id_usuario == id_usuario).first()
+
+    atleta = await run_db(db, consulta)
     if not atleta:
         raise HTTPException(status_code=404, detail="Perfil de atleta no encontrado")
     return atleta
 
 
 # Obtener un atleta por ID de perfil (id_atleta)
+@router.get("/perfil/me", response_model=schemas.AtletaResponse)
+async def obtener_mi_perfil(
+    usuario: TokenPayload = Depends(require_tipo("atleta")),
+    db=Depends(get_session_lectura),
+):
+    if usuario.id_perfil is None:
+        raise HTTPException(status_code=404, detail="Perfil de atleta no encontrado")
+    return await obtener_atleta(usuario.id_perfil, db)
+
+
 @router.get("/perfil/{atleta_id}", response_model=schemas.AtletaResponse)
-def obtener_atleta(atleta_id: int, db: Session = Depends(get_db)):
-    perfil = db.query(models.PerfilAtleta).filter_by(id_atleta=atleta_id).first()
+async def obtener_atleta(atleta_id: int, db=Depends(get_session_lectura)):
+    def consulta(db: Session):
+        # Perfil + usuario en un JOIN y asignaciones + entrenamientos en un SELECT ... IN,
+        # asi el numero de queries no depende de cuantas asignaciones tenga el atleta
+        return (
+            db.query(models.PerfilAtleta)
+            .options(
+                joinedload(models.PerfilAtleta.usuario),
+                selectinload(models.PerfilAtleta.asignaciones).joinedload(models.AsignacionAtleta.entrenamiento),
+            )
+            .filter(models.PerfilAtleta.id_atleta == atleta_id)
+            .first()
+        )
+
+    perfil = await run_db(db, consulta)
     if not perfil:
         raise HTTPException(status_code=404, detail="Perfil de atleta no encontrado")
-    
-    usuario = db.query(models.Usuario).filter_by(id_usuario=perfil.id_usuario).first()
+
+    usuario = perfil.usuario
     if not usuario or usuario.tipo != "atleta":
         raise HTTPException(status_code=404, detail="Usuario atleta no encontrado")
 
-    # Obtener las asignaciones del atleta
-    asignaciones_db = db.query(models.AsignacionAtleta).filter_by(id_atleta=atleta_id).all()
-
-    asignaciones = []
-    for a in asignaciones_db:
-        entrenamiento_db = db.query(models.Entrenamiento).filter_by(id_entrenamiento=a.id_entrenamiento).first()
-
-        entrenamiento_schema = None
-        if entrenamiento_db:
-            entrenamiento_schema = schemas.EntrenamientoAsignadoResponse.from_orm(entrenamiento_db)
-
-        asignacion_schema = schemas.AsignacionAtletaResponse(
-            id_asignacion=a.id_asignacion,
-            fecha_asignacion=a.fecha_asignacion,
-            fecha_completado=a.fecha_completado,
-            estado=a.estado,
-            feedback=a.feedback,
-            calificacion=a.calificacion,
-            entrenamiento=entrenamiento_schema
+    # Un solo model_validate sobre los objetos ORM (asignaciones y entrenamientos
+    # incluidos) y directo a bytes, en vez de armar cada schema y re-validar el total
+    atleta_response = schemas.AtletaResponse.model_validate({
+        "id_atleta": perfil.id_atleta,
+        "usuario": usuario,
+        "email": usuario.email,
+        "tipo": usuario.tipo,
+        "nombre_completo": perfil.nombre_completo,
+        "fecha_nacimiento": perfil.fecha_nacimiento,
+        "altura": perfil.altura,
+        "peso": perfil.peso,
+        "deporte": perfil.deporte,
+        "id_entrenador": perfil.id_entrenador,
+        "frecuencia_cardiaca_minima": perfil.frecuencia_cardiaca_minima,
+        "frecuencia_cardiaca_maxima": perfil.frecuencia_cardiaca_maxima,
+        "zonas_frecuencia": perfil.zonas_frecuencia,
+        "asignaciones": perfil.asignaciones,
+    })
+    return respuesta_modelo(atleta_response)
+
+
+@router.get("/{id_atleta}/analytics", response_model=AnaliticaAtletaResponse)
+async def get_analytics_atleta(
+    id_atleta: int,
+    semanas: int = Query(8, ge=1, le=52),
+    hasta: Optional[date] = None,
+    usuario: TokenPayload = Depends(require_tipo("atleta", "entrenador", "administrador")),
+    db=Depends(get_session_lectura),
+):
+    # NumPy no se importa en el loop: ver app/precarga.py
+    analytics = await cargar_analytics()
+    hasta = hasta or date.today()
+
+    def consulta(db: Session):
+        fila = db.query(PerfilAtleta.id_entrenador).filter(PerfilAtleta.id_atleta == id_atleta).first()
+        if not fila:
+            raise HTTPException(status_code=404, detail="Atleta no encontrado")
+        verificar_atleta(usuario, id_atleta, fila.id_entrenador)
+        # Mismo calculo que el del roster del coach, con un roster de uno
+        historial = analytics.cargar_historial(db, [id_atleta], hasta, semanas)
+        return analytics.metricas_atletas(historial, analytics.calcular(historial, semanas))[0]
+
+    metricas = await run_db(db, consulta)
+    return respuesta_modelo(AnaliticaAtletaResponse.model_validate({**metricas, "hasta": hasta, "semanas": semanas}))
+
+
+@router.get("/{id_atleta}/resumen", response_model=ResumenAtletaResponse)
+async def get_resumen_atleta(
+    id_atleta: int,
+    usuario: TokenPayload = Depends(require_tipo("atleta", "entrenador", "administrador")),
+    db=Depends(get_session_lectura),
+):
+    def consulta(db: Session):
+        fila = db.query(PerfilAtleta.id_entrenador).filter(PerfilAtleta.id_atleta == id_atleta).first()
+        if not fila:
+            raise HTTPException(status_code=404, detail="Atleta no encontrado")
+        verificar_atleta(usuario, id_atleta, fila.id_entrenador)
+        # Una fila por PK en vez de contar sobre asignaciones_atletas
+        return db.get(ResumenAtleta, id_atleta)
+
+    resumen = await run_db(db, consulta)
+    return respuesta_modelo(ResumenAtletaResponse.model_validate({**resumen_a_dict(resumen), "id_atleta": id_atleta}))
+
+
+@router.get("/{id_atleta}/asignaciones", response_model=List[AsignacionDetalleResponse])
+async def get_asignaciones_atleta(
+    id_atleta: int,
+    response: Response,
+    usuario: TokenPayload = Depends(require_tipo("atleta", "entrenador", "administrador")),
+    db=Depends(get_session_lectura),
+    filtros: FiltrosAsignaciones = Depends(),
+):
+    """Asignaciones del atleta filtradas, ordenadas y paginadas en la base (X-Next-Cursor para la siguiente)"""
+
+    def consulta(db: Session):
+        # El coach actual hace falta para el permiso, asi que el 404 sale de la misma lectura
+        fila = db.query(PerfilAtleta.id_entrenador).filter(PerfilAtleta.id_atleta == id_atleta).first()
+        if not fila:
+            raise HTTPException(status_code=404, detail="Atleta no encontrado")
+        verificar_atleta(usuario, id_atleta, fila.id_entrenador)
+        return listar_asignaciones(db, filtros, AsignacionAtleta.id_atleta == id_atleta)
+
+    asignaciones, siguiente = await run_db(db, consulta)
+    poner_cursor(response, siguiente)
+    return asignaciones
+
+
+@router.put("/asignaciones/{id_asignacion}", response_model=AsignacionResponse)
+async def actualizar_asignacion(
+    id_asignacion: int,
+    data: AsignacionEstadoUpdate,
+    usuario: TokenPayload = Depends(require_tipo("atleta", "entrenador")),
+    db=Depends(get_session),
+):
+    def actualizar(db: Session):
+        # FOR UPDATE: dos cambios simultaneos de la misma asignacion restarian dos veces el estado anterior
+        asignacion = (
+            db.query(AsignacionAtleta)
+            .filter(AsignacionAtleta.id_asignacion == id_asignacion)
+            .with_for_update()
+            .first()
         )
-        asignaciones.append(asignacion_schema)
-
-    usuario_schema = schemas.UsuarioBase.from_orm(usuario)
-
-    atleta_response = schemas.AtletaResponse(
-        id_atleta=perfil.id_atleta,
-        usuario=usuario_schema,
-        email=usuario.email,
-        tipo=usuario.tipo,
-        nombre_completo=perfil.nombre_completo,
-        fecha_nacimiento=perfil.fecha_nacimiento,
-        altura=perfil.altura,
-        peso=perfil.peso,
-        deporte=perfil.deporte,
-        id_entrenador=perfil.id_entrenador,
-        frecuencia_cardiaca_minima=perfil.frecuencia_cardiaca_minima,
-        frecuencia_cardiaca_maxima=perfil.frecuencia_cardiaca_maxima,
-        asignaciones=asignaciones,
-    )
-    return atleta_response
-
-
-@router.put("/editar/{id_atleta}")
-def actualizar_atleta(id_atleta: int, atleta_data: AtletaUpdateSchema, db: Session = Depends(get_db)):
-    atleta = db.query(PerfilAtleta).filter(PerfilAtleta.id_atleta == id_atleta).first()
+        if not asignacion:
+            raise HTTPException(status_code=404, detail="Asignacion no encontrada")
+        # Solo el atleta asignado o el coach dueño del entrenamiento
+        duenio = asignacion.id_atleta if usuario.tipo == "atleta" else asignacion.entrenamiento.id_entrenador
+        if duenio != usuario.id_perfil:
+            raise HTTPException(status_code=403, detail="No autorizado para este recurso")
 
-    if not atleta:
-        raise HTTPException(status_code=404, detail="Atleta no encontrado")
+        antes = (asignacion.estado, asignacion.calificacion, asignacion.fecha_completado)
+        for key, value in data.model_dump(mode="json", exclude_unset=True).items():
+            setattr(asignacion, key, value)
+        # fecha_completado la pone el servidor al completar y se borra si se reabre
+        if asignacion.estado != "completado":
+            asignacion.fecha_completado = None
+        elif antes[0] != "completado":
+            asignacion.fecha_completado = date.today()
+
+        cambios = CambiosResumen()
+        cambios.agregar(
+            asignacion.id_atleta,
+            asignacion.entrenamiento.id_entrenador,
+            antes=antes,
+            despues=(asignacion.estado, asignacion.calificacion, asignacion.fecha_completado),
+        )
+        # Los UPDATE del resumen son core y no hacen autoflush; el recalculo de
+        # ultima_completada tiene que ver ya el estado nuevo
+        db.flush()
+        cambios.aplicar(db)
+        db.commit()
+        db.refresh(asignacion)
+        return asignacion, claves_dashboard_atletas(asignacion.atleta.id_usuario)
+
+    asignacion, claves = await run_db(db, actualizar)
+    await cache.delete(*claves)
+    return respuesta_modelo(AsignacionResponse.model_validate(asignacion))
+
+
+@router.put("/editar/{id_atleta}", response_model=AtletaActualizadoResponse)
+async def actualizar_atleta(
+    id_atleta: int,
+    atleta_data: AtletaUpdateSchema,
+    usuario: TokenPayload = Depends(require_tipo("atleta", "entrenador", "administrador")),
+    db=Depends(get_session),
+):
+    # El schema acepta null pero estas columnas son NOT NULL (y la edad sale de fecha_nacimiento)
+    nulos = [
+        campo for campo, valor in atleta_data.model_dump(exclude_unset=True).items()
+        if valor is None and campo in ("nombre_completo", "fecha_nacimiento", "deporte")
+    ]
+    if nulos:
+        raise HTTPException(status_code=400, detail=f"{', '.join(nulos)}: no puede ser null")
+
+    def actualizar(db: Session):
+        atleta = db.query(PerfilAtleta).filter(PerfilAtleta.id_atleta == id_atleta).first()
+
+        if not atleta:
+            raise HTTPException(status_code=404, detail="Atleta no encontrado")
+        # El propio atleta o su coach actual (ademas de un administrador)
+        verificar_atleta(usuario, atleta.id_atleta, atleta.id_entrenador)
+
+        entrenador_anterior = atleta.id_entrenador
+        cambios = atleta_data.model_dump(exclude_unset=True)
+        for key, value in cambios.items():
+            if key != "frecuencia_cardiaca_maxima":
+                setattr(atleta, key, value)
+        # La maxima la decide aplicar_a_perfil (estimada o manual) y de paso rehace las zonas
+        aplicar_a_perfil(atleta, cambios)
+        if atleta.id_entrenador != entrenador_anterior:
+            refrescar_coaches(db, entrenador_anterior, atleta.id_entrenador)
 
-    for key, value in atleta_data.dict(exclude_unset=True).items():
-        setattr(atleta, key, value)
+        db.commit()
+        db.refresh(atleta)
 
-    db.commit()
-    db.refresh(atleta)
+        # Su dashboard y el de los coaches que lo listan (el anterior si cambio de coach)
+        claves = claves_dashboard_atletas(atleta.id_usuario)
+        claves += claves_dashboard_coaches(db, entrenador_anterior, atleta.id_entrenador)
+        return atleta, claves
 
-    return {"mensaje": "Perfil actualizado correctamente", "atleta": atleta}
\ No newline at end of file
+    atleta, claves = await run_db(db, actualizar)
+    await cache.delete(*claves)
+    return respuesta_modelo(AtletaActualizadoResponse(
+        mensaje="Perfil actualizado correctamente",
+        atleta=AtletaEditado.model_validate(atleta),
+    ))
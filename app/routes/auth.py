@@ -1,32 +1,89 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from app.db import get_db
-from app.models import Usuario
-from passlib.context import CryptContext
+from app.db import get_session, run_db
+from app.models import Usuario, PerfilAtleta, PerfilEntrenador
+from app.schemas import RefreshInput
+from app.security import crear_tokens, decodificar_token
+from app.hashing import verify_and_update, credential_cache
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 class LoginInput(BaseModel):
     email: str
     password: str
 
 @router.post("/login")
-def login(data: LoginInput, db: Session = Depends(get_db)):  # <-- Aquí está el cambio importante
-    usuario = db.query(Usuario).filter(Usuario.email == data.email).first()
+async def login(data: LoginInput, db=Depends(get_session)):
+    def consulta(db: Session):
+        usuario = db.query(Usuario).filter(Usuario.email == data.email).first()
+        if not usuario:
+            return None, None
+        return usuario, _id_perfil(db, usuario)
+
+    usuario, id_perfil = await run_db(db, consulta)
     if not usuario:
         raise HTTPException(status_code=401, detail="Correo no encontrado")
 
-    if not pwd_context.verify(data.password, usuario.contrasena_hash):
-        raise HTTPException(status_code=401, detail="Contraseña incorrecta")
+    # Si ya se verifico hace poco contra este mismo hash no hace falta volver a pasar por bcrypt
+    if not credential_cache.hit(data.email, data.password, usuario.contrasena_hash):
+        valida, nuevo_hash = await verify_and_update(data.password, usuario.contrasena_hash)
+        if not valida:
+            raise HTTPException(status_code=401, detail="Contraseña incorrecta")
+
+        # El hash tenia otro costo que BCRYPT_ROUNDS: se guarda el recalculado
+        if nuevo_hash:
+            def rehash(db: Session):
+                usuario.contrasena_hash = nuevo_hash
+                db.commit()
+
+            await run_db(db, rehash)
+
+        credential_cache.put(data.email, data.password, usuario.contrasena_hash)
+
+    # Despues de la contraseña: a quien no la sabe no se le cuenta si la cuenta esta dada de baja
+    if not _activo(usuario):
+        raise HTTPException(status_code=403, detail="Usuario inactivo")
 
     return {
         "mensaje": "Login exitoso",
         "usuario": {
             "id_usuario": usuario.id_usuario,
             "email": usuario.email,
-            "tipo": usuario.tipo
-        }
+            "tipo": usuario.tipo,
+            "id_perfil": id_perfil
+        },
+        **crear_tokens(usuario.id_usuario, usuario.tipo, id_perfil),
     }
+
+
+@router.post("/refresh")
+async def refresh(data: RefreshInput, db=Depends(get_session)):
+    token = decodificar_token(data.refresh_token, token_type="refresh")
+
+    # El refresh vive una semana: tipo y perfil salen de la base, no de sus claims,
+    # y un usuario dado de baja (o borrado) ya no renueva
+    def consulta(db: Session):
+        usuario = db.get(Usuario, token.id_usuario)
+        if not usuario or not _activo(usuario):
+            return None, None
+        return usuario, _id_perfil(db, usuario)
+
+    usuario, perfil = await run_db(db, consulta)
+    if not usuario:
+        raise HTTPException(status_code=401, detail="Usuario inactivo o inexistente", headers={"WWW-Authenticate": "Bearer"})
+    return crear_tokens(usuario.id_usuario, usuario.tipo, perfil)
+
+
+def _activo(usuario: Usuario) -> bool:
+    # NULL en filas viejas (antes del default) cuenta como activo
+    return usuario.activo is not False
+
+
+def _id_perfil(db: Session, usuario: Usuario):
+    """El id del perfil va en el token para que los dashboards no lo tengan que buscar"""
+    if usuario.tipo == "atleta":
+        return db.query(PerfilAtleta.id_atleta).filter(PerfilAtleta.id_usuario == usuario.id_usuario).scalar()
+    if usuario.tipo == "entrenador":
+        return db.query(PerfilEntrenador.id_entrenador).filter(PerfilEntrenador.id_usuario == usuario.id_usuario).scalar()
+    return None
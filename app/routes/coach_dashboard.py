@@ -1,124 +1,490 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+from datetime import datetime, date
 
-from app.db import get_db
-from app.models import PerfilEntrenador, Entrenamiento, PerfilAtleta, AsignacionAtleta
+from app.db import get_session, get_session_lectura, run_db, es_replica
+from app.models import (
+    PerfilEntrenador,
+    Entrenador,
+    Entrenamiento,
+    PerfilAtleta,
+    AsignacionAtleta,
+    ResumenAtleta,
+    ResumenEntrenador,
+)
 from app.schemas import (
     CoachOut,
     EntrenamientoOut,
     PostEntrenamiento as PostEntrenamientoSchema,
     AsignacionCreate,
     AsignacionResponse,
+    AsignacionDetalleResponse,
+    AsignacionBulkCreate,
+    AsignacionBulkResponse,
     AtletaOut,
+    AnaliticaCoachResponse,
+    ResumenCoachResponse,
+    TokenPayload,
+)
+from app.security import require_tipo, verificar_coach
+from app.cache import cache, cache_key
+from app.invalidation import (
+    claves_dashboard_atletas,
+    claves_dashboard_atletas_de_coach,
+    claves_entrenamientos,
 )
+from app.etag import calcular_etag, coincide, no_modificado
+from app.responses import respuesta_json, respuesta_modelo
+from app.aggregates import CambiosResumen, resumen_a_dict
+from app.coach_read_model import refrescar as refrescar_coaches
+from app.assignment_filters import FiltrosAsignaciones, listar as listar_asignaciones
+from app.pagination import (
+    Paginacion,
+    columnas_proyectadas,
+    paginar,
+    filas_a_dicts,
+    poner_cursor,
+    cabeceras_cursor,
+    respuesta_proyectada,
+)
+from app.precarga import analytics as cargar_analytics
 
 router = APIRouter(prefix="/coaches", tags=["Coaches"])
 
 
+# Dashboard del coach autenticado: id y rol salen del token, sin consultar Usuario
+@router.get("/me", response_model=CoachOut)
+async def get_mi_dashboard(
+    request: Request,
+    usuario: TokenPayload = Depends(require_tipo("entrenador")),
+    db=Depends(get_session_lectura),
+    paginacion: Paginacion = Depends(),
+):
+    return await get_coach_dashboard(usuario.id_usuario, request, db, paginacion)
+
+
 @router.get("/{id_usuario}", response_model=CoachOut)
-def get_coach_dashboard(id_usuario: int, db: Session = Depends(get_db)):
-    coach = db.query(PerfilEntrenador).filter(PerfilEntrenador.id_usuario == id_usuario).first()
-    if not coach:
+async def get_coach_dashboard(
+    id_usuario: int,
+    request: Request,
+    db=Depends(get_session_lectura),
+    paginacion: Paginacion = Depends(),
+):
+    # limit/cursor/fields aplican a la lista de atletas asignados
+    columnas = columnas_proyectadas(paginacion.fields, PerfilAtleta, AtletaOut, PerfilAtleta.id_atleta)
+
+    # Solo se cachea la respuesta completa; las paginas y proyecciones van directo a la base
+    clave = cache_key("coach_dashboard", id_usuario) if paginacion.sin_parametros() else None
+    if clave:
+        cacheado = await cache.get(clave)
+        if cacheado is not None:
+            if coincide(request, cacheado["etag"]):
+                return no_modificado(cacheado["etag"])
+            return respuesta_json(cacheado["datos"], headers={"ETag": cacheado["etag"]})
+
+    def version(db: Session):
+        # Una sola consulta: el coach + los pares (id, version) de sus atletas en orden.
+        # Sumas o conteos chocan (cambiar {1,4} por {2,3} da lo mismo); los pares no
+        return [
+            tuple(fila) for fila in (
+                db.query(PerfilEntrenador.id_entrenador, PerfilAtleta.id_atleta, PerfilAtleta.version)
+                .outerjoin(PerfilAtleta, PerfilAtleta.id_entrenador == PerfilEntrenador.id_entrenador)
+                .filter(PerfilEntrenador.id_usuario == id_usuario)
+                .order_by(PerfilAtleta.id_atleta)
+                .all()
+            )
+        ]
+
+    filas_version = await run_db(db, version)
+    if not filas_version:
         raise HTTPException(status_code=404, detail="Coach no encontrado")
 
-    atletas = db.query(PerfilAtleta).filter(PerfilAtleta.id_entrenador == coach.id_entrenador).all()
+    etag = calcular_etag(
+        "coach_dashboard", filas_version, paginacion.limit, paginacion.cursor, paginacion.fields
+    )
+    if coincide(request, etag):
+        return no_modificado(etag)
+
+    def consulta(db: Session):
+        coach = db.query(PerfilEntrenador).filter(PerfilEntrenador.id_usuario == id_usuario).first()
+        if not coach:
+            raise HTTPException(status_code=404, detail="Coach no encontrado")
 
-    # Usar from_orm para convertir cada atleta a AtletaOut
-    atletas_asignados = [AtletaOut.from_orm(a) for a in atletas]
+        query = db.query(*columnas) if columnas else db.query(PerfilAtleta)
+        query = query.filter(PerfilAtleta.id_entrenador == coach.id_entrenador)
+        atletas, siguiente = paginar(query, PerfilAtleta.id_atleta, paginacion)
+        return coach, filas_a_dicts(atletas, columnas), siguiente
 
-    return {
+    coach, atletas, siguiente = await run_db(db, consulta)
+
+    datos_coach = {
         "id_entrenador": coach.id_entrenador,
         "nombre_completo": coach.nombre_completo,
         "fecha_nacimiento": coach.fecha_nacimiento,
         "especialidad": coach.especialidad,
         "experiencia": coach.experiencia,
-        "atletas_asignados": atletas_asignados,
     }
+    if columnas:
+        proyectada = respuesta_proyectada({**datos_coach, "atletas_asignados": atletas}, siguiente)
+        proyectada.headers["ETag"] = etag
+        return proyectada
+
+    # Los atletas ORM se validan una vez dentro de CoachOut; FastAPI no lo re-valida
+    dashboard = CoachOut.model_validate({**datos_coach, "atletas_asignados": atletas}).model_dump(mode="json")
+    if clave and not es_replica(db):
+        await cache.set(clave, {"etag": etag, "datos": dashboard})
+    return respuesta_json(dashboard, headers={"ETag": etag, **cabeceras_cursor(siguiente)})
 
 
 @router.get("/{id_entrenador}/atletas", response_model=List[AtletaOut])
-def get_atletas_by_entrenador(id_entrenador: int, db: Session = Depends(get_db)):
-    atletas = db.query(PerfilAtleta).filter(PerfilAtleta.id_entrenador == id_entrenador).all()
-    if not atletas:
+async def get_atletas_by_entrenador(
+    id_entrenador: int,
+    response: Response,
+    db=Depends(get_session_lectura),
+    paginacion: Paginacion = Depends(),
+):
+    columnas = columnas_proyectadas(paginacion.fields, PerfilAtleta, AtletaOut, PerfilAtleta.id_atleta)
+
+    def consulta(db: Session):
+        query = db.query(*columnas) if columnas else db.query(PerfilAtleta)
+        query = query.filter(PerfilAtleta.id_entrenador == id_entrenador)
+        atletas, siguiente = paginar(query, PerfilAtleta.id_atleta, paginacion)
+        return filas_a_dicts(atletas, columnas), siguiente
+
+    atletas, siguiente = await run_db(db, consulta)
+    # En paginas siguientes una lista vacia solo significa que ya no hay mas
+    if not atletas and paginacion.cursor is None:
+        raise HTTPException(status_code=404, detail="No se encontraron atletas para este entrenador")
+    if columnas:
+        return respuesta_proyectada(atletas, siguiente)
+
+    poner_cursor(response, siguiente)
+    return atletas  # FastAPI los convierte automáticamente gracias a from_attributes
+
+
+@router.get("/{id_entrenador}/analytics", response_model=AnaliticaCoachResponse)
+async def get_analytics_coach(
+    id_entrenador: int,
+    semanas: int = Query(8, ge=1, le=52),
+    hasta: Optional[date] = None,
+    usuario: TokenPayload = Depends(require_tipo("entrenador", "administrador")),
+    db=Depends(get_session_lectura),
+):
+    """Carga aguda/cronica, volumen semanal, completado y calificaciones de todo el roster"""
+    verificar_coach(usuario, id_entrenador)
+    # NumPy no se importa en el loop: ver app/precarga.py
+    analytics = await cargar_analytics()
+    hasta = hasta or date.today()
+
+    def consulta(db: Session):
+        # Un SELECT para el historial del roster y el resto en NumPy, sin loops por atleta
+        historial = analytics.cargar_historial_coach(db, id_entrenador, hasta, semanas)
+        return historial, analytics.calcular(historial, semanas)
+
+    historial, metricas = await run_db(db, consulta)
+    if not len(historial.ids):
         raise HTTPException(status_code=404, detail="No se encontraron atletas para este entrenador")
-    return atletas  # FastAPI los convierte automáticamente gracias a orm_mode
+
+    return respuesta_modelo(AnaliticaCoachResponse.model_validate({
+        "id_entrenador": id_entrenador,
+        "hasta": hasta,
+        "semanas": semanas,
+        "escuadra": analytics.metricas_escuadra(metricas),
+        "atletas": analytics.metricas_atletas(historial, metricas),
+    }))
+
+
+@router.get("/{id_entrenador}/resumen", response_model=ResumenCoachResponse)
+async def get_resumen_coach(
+    id_entrenador: int,
+    usuario: TokenPayload = Depends(require_tipo("entrenador", "administrador")),
+    db=Depends(get_session_lectura),
+):
+    """Contadores de asignaciones del coach y de cada atleta del roster, leidos de las tablas de resumen"""
+    verificar_coach(usuario, id_entrenador)
+
+    def consulta(db: Session):
+        if not db.query(Entrenador.id_entrenador).filter_by(id_entrenador=id_entrenador).first():
+            raise HTTPException(status_code=404, detail="Entrenador no encontrado")
+        total = db.get(ResumenEntrenador, id_entrenador)
+        roster = (
+            db.query(PerfilAtleta.id_atleta, PerfilAtleta.nombre_completo, ResumenAtleta)
+            .outerjoin(ResumenAtleta, ResumenAtleta.id_atleta == PerfilAtleta.id_atleta)
+            .filter(PerfilAtleta.id_entrenador == id_entrenador)
+            .order_by(PerfilAtleta.id_atleta)
+            .all()
+        )
+        return total, roster
+
+    total, roster = await run_db(db, consulta)
+    return respuesta_modelo(ResumenCoachResponse.model_validate({
+        **resumen_a_dict(total),
+        "id_entrenador": id_entrenador,
+        "atletas": [
+            {**resumen_a_dict(resumen), "id_atleta": id_atleta, "nombre_completo": nombre}
+            for id_atleta, nombre, resumen in roster
+        ],
+    }))
+
+
+@router.get("/{id_entrenador}/asignaciones", response_model=List[AsignacionDetalleResponse])
+async def get_asignaciones_coach(
+    id_entrenador: int,
+    response: Response,
+    usuario: TokenPayload = Depends(require_tipo("entrenador", "administrador")),
+    db=Depends(get_session_lectura),
+    filtros: FiltrosAsignaciones = Depends(),
+):
+    """Asignaciones de todos los entrenamientos del coach, con los mismos filtros que las del atleta"""
+    verificar_coach(usuario, id_entrenador)
+
+    def consulta(db: Session):
+        asignaciones, siguiente = listar_asignaciones(db, filtros, Entrenamiento.id_entrenador == id_entrenador)
+        if not asignaciones and filtros.cursor is None:
+            if not db.query(Entrenador.id_entrenador).filter_by(id_entrenador=id_entrenador).first():
+                raise HTTPException(status_code=404, detail="Entrenador no encontrado")
+        return asignaciones, siguiente
+
+    asignaciones, siguiente = await run_db(db, consulta)
+    poner_cursor(response, siguiente)
+    return asignaciones
 
 
 @router.post("/entrenamientos")
-def crear_entrenamiento(data: PostEntrenamientoSchema, db: Session = Depends(get_db)):
-    nuevo = Entrenamiento(
-        id_entrenador=data.id_entrenador,
-        titulo=data.titulo,
-        descripcion=data.descripcion,
-        duracion_estimada=data.duracion_estimada,
-        nivel_dificultad=data.nivel_dificultad,
-        fecha_creacion=datetime.now()
-    )
+async def crear_entrenamiento(
+    data: PostEntrenamientoSchema,
+    usuario: TokenPayload = Depends(require_tipo("entrenador", "administrador")),
+    db=Depends(get_session),
+):
+    # Un coach solo crea entrenamientos a su nombre
+    verificar_coach(usuario, data.id_entrenador)
 
-    try:
-        db.add(nuevo)
-        db.commit()
-        db.refresh(nuevo)
-        return {"mensaje": "Entrenamiento creado", "id_entrenamiento": nuevo.id_entrenamiento}
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al crear entrenamiento: {e}")
+    def crear(db: Session):
+        nuevo = Entrenamiento(
+            id_entrenador=data.id_entrenador,
+            titulo=data.titulo,
+            descripcion=data.descripcion,
+            duracion_estimada=data.duracion_estimada,
+            nivel_dificultad=data.nivel_dificultad,
+            fecha_creacion=datetime.now()
+        )
+
+        try:
+            db.add(nuevo)
+            refrescar_coaches(db, data.id_entrenador)
+            db.commit()
+            db.refresh(nuevo)
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error al crear entrenamiento: {e}")
+
+        claves = claves_entrenamientos(nuevo.id_entrenador)
+        claves += claves_dashboard_atletas_de_coach(db, nuevo.id_entrenador)
+        return {"mensaje": "Entrenamiento creado", "id_entrenamiento": nuevo.id_entrenamiento}, claves
+
+    respuesta, claves = await run_db(db, crear)
+    await cache.delete(*claves)
+    return respuesta
 
 
 @router.get("/entrenamientos/coach/{id_entrenador}", response_model=List[EntrenamientoOut])
-def get_entrenamientos_by_coach(id_entrenador: int, db: Session = Depends(get_db)):
-    entrenamientos = db.query(Entrenamiento).filter(Entrenamiento.id_entrenador == id_entrenador).all()
-    return entrenamientos
+async def get_entrenamientos_by_coach(
+    id_entrenador: int,
+    db=Depends(get_session_lectura),
+    paginacion: Paginacion = Depends(),
+):
+    columnas = columnas_proyectadas(
+        paginacion.fields, Entrenamiento, EntrenamientoOut, Entrenamiento.id_entrenamiento
+    )
+
+    clave = cache_key("entrenamientos_coach", id_entrenador) if paginacion.sin_parametros() else None
+    if clave:
+        cacheado = await cache.get(clave)
+        if cacheado is not None:
+            return respuesta_json(cacheado)
+
+    def consulta(db: Session):
+        query = db.query(*columnas) if columnas else db.query(Entrenamiento)
+        query = query.filter(Entrenamiento.id_entrenador == id_entrenador)
+        entrenamientos, siguiente = paginar(query, Entrenamiento.id_entrenamiento, paginacion)
+        return filas_a_dicts(entrenamientos, columnas), siguiente
+
+    entrenamientos, siguiente = await run_db(db, consulta)
+    if columnas:
+        return respuesta_proyectada(entrenamientos, siguiente)
+
+    entrenamientos = [EntrenamientoOut.model_validate(e).model_dump(mode="json") for e in entrenamientos]
+    if clave and not es_replica(db):
+        await cache.set(clave, entrenamientos)
+    return respuesta_json(entrenamientos, headers=cabeceras_cursor(siguiente))
 
 
 @router.get("/entrenamientos/{id_entrenamiento}", response_model=EntrenamientoOut)
-def get_entrenamiento_by_id(id_entrenamiento: int, db: Session = Depends(get_db)):
-    entrenamiento = db.query(Entrenamiento).filter(Entrenamiento.id_entrenamiento == id_entrenamiento).first()
+async def get_entrenamiento_by_id(id_entrenamiento: int, db=Depends(get_session_lectura)):
+    clave = cache_key("entrenamiento", id_entrenamiento)
+    cacheado = await cache.get(clave)
+    if cacheado is not None:
+        return respuesta_json(cacheado)
+
+    def consulta(db: Session):
+        return db.query(Entrenamiento).filter(Entrenamiento.id_entrenamiento == id_entrenamiento).first()
+
+    entrenamiento = await run_db(db, consulta)
     if not entrenamiento:
         raise HTTPException(status_code=404, detail="Entrenamiento no encontrado")
-    return entrenamiento
+
+    entrenamiento = EntrenamientoOut.model_validate(entrenamiento).model_dump(mode="json")
+    if not es_replica(db):
+        await cache.set(clave, entrenamiento)
+    return respuesta_json(entrenamiento)
 
 
 @router.put("/entrenamientos/{id_entrenamiento}")
-def update_entrenamiento(id_entrenamiento: int, data: PostEntrenamientoSchema, db: Session = Depends(get_db)):
-    entrenamiento = db.query(Entrenamiento).filter(Entrenamiento.id_entrenamiento == id_entrenamiento).first()
-    if not entrenamiento:
-        raise HTTPException(status_code=404, detail="Entrenamiento no encontrado")
+async def update_entrenamiento(
+    id_entrenamiento: int,
+    data: PostEntrenamientoSchema,
+    usuario: TokenPayload = Depends(require_tipo("entrenador", "administrador")),
+    db=Depends(get_session),
+):
+    def actualizar(db: Session):
+        entrenamiento = db.query(Entrenamiento).filter(Entrenamiento.id_entrenamiento == id_entrenamiento).first()
+        if not entrenamiento:
+            raise HTTPException(status_code=404, detail="Entrenamiento no encontrado")
+        verificar_coach(usuario, entrenamiento.id_entrenador)
 
-    entrenamiento.titulo = data.titulo
-    entrenamiento.descripcion = data.descripcion
-    entrenamiento.duracion_estimada = data.duracion_estimada
-    entrenamiento.nivel_dificultad = data.nivel_dificultad
+        entrenamiento.titulo = data.titulo
+        entrenamiento.descripcion = data.descripcion
+        entrenamiento.duracion_estimada = data.duracion_estimada
+        entrenamiento.nivel_dificultad = data.nivel_dificultad
 
-    try:
-        db.commit()
-        return {"mensaje": "Entrenamiento actualizado correctamente"}
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al actualizar: {e}")
+        try:
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error al actualizar: {e}")
+
+        claves = claves_entrenamientos(entrenamiento.id_entrenador, id_entrenamiento)
+        claves += claves_dashboard_atletas_de_coach(db, entrenamiento.id_entrenador)
+        return claves
+
+    claves = await run_db(db, actualizar)
+    await cache.delete(*claves)
+    return {"mensaje": "Entrenamiento actualizado correctamente"}
 
 
 @router.post("/asignaciones", response_model=AsignacionResponse)
-def asignar_entrenamiento(data: AsignacionCreate, db: Session = Depends(get_db)):
-    # Validar que el entrenamiento y el atleta existan
-    entrenamiento = db.query(Entrenamiento).filter_by(id_entrenamiento=data.id_entrenamiento).first()
-    if not entrenamiento:
-        raise HTTPException(status_code=404, detail="Entrenamiento no encontrado")
+async def asignar_entrenamiento(
+    data: AsignacionCreate,
+    usuario: TokenPayload = Depends(require_tipo("entrenador", "administrador")),
+    db=Depends(get_session),
+):
+    def asignar(db: Session):
+        # Validar que el entrenamiento y el atleta existan
+        entrenamiento = db.query(Entrenamiento).filter_by(id_entrenamiento=data.id_entrenamiento).first()
+        if not entrenamiento:
+            raise HTTPException(status_code=404, detail="Entrenamiento no encontrado")
+        verificar_coach(usuario, entrenamiento.id_entrenador)
 
-    atleta = db.query(PerfilAtleta).filter_by(id_atleta=data.id_atleta).first()
-    if not atleta:
-        raise HTTPException(status_code=404, detail="Atleta no encontrado")
+        atleta = db.query(PerfilAtleta).filter_by(id_atleta=data.id_atleta).first()
+        if not atleta:
+            raise HTTPException(status_code=404, detail="Atleta no encontrado")
+        # Un coach solo asigna a atletas de su roster
+        if usuario.tipo == "entrenador" and atleta.id_entrenador != usuario.id_perfil:
+            raise HTTPException(status_code=403, detail="No autorizado para este recurso")
 
-    # Crear asignación
-    asignacion = AsignacionAtleta(
-        id_entrenamiento=data.id_entrenamiento,
-        id_atleta=data.id_atleta,
-        estado="pendiente"
-    )
-    db.add(asignacion)
-    db.commit()
-    db.refresh(asignacion)
+        # Crear asignación
+        asignacion = AsignacionAtleta(
+            id_entrenamiento=data.id_entrenamiento,
+            id_atleta=data.id_atleta,
+            fecha_asignacion=date.today(),
+            estado="pendiente"
+        )
+        db.add(asignacion)
+        cambios = CambiosResumen()
+        cambios.agregar(data.id_atleta, entrenamiento.id_entrenador, despues=("pendiente", None, None))
+        cambios.aplicar(db)
+        db.commit()
+        db.refresh(asignacion)
+        return asignacion, claves_dashboard_atletas(atleta.id_usuario)
+
+    asignacion, claves = await run_db(db, asignar)
+    await cache.delete(*claves)
+    return asignacion
+
+
+@router.post("/asignaciones/bulk", response_model=AsignacionBulkResponse)
+async def asignar_entrenamiento_bulk(
+    data: AsignacionBulkCreate,
+    usuario: TokenPayload = Depends(require_tipo("entrenador", "administrador")),
+    db=Depends(get_session),
+):
+    if not data.ids_atletas and not data.todo_el_roster:
+        raise HTTPException(status_code=400, detail="Indica ids_atletas o todo_el_roster")
+
+    def asignar(db: Session):
+        entrenamiento = db.query(Entrenamiento).filter_by(id_entrenamiento=data.id_entrenamiento).first()
+        if not entrenamiento:
+            raise HTTPException(status_code=404, detail="Entrenamiento no encontrado")
+        verificar_coach(usuario, entrenamiento.id_entrenador)
+
+        # Validacion por conjuntos: un IN para los atletas y otro para los ya asignados.
+        # Con todo_el_roster se ignora ids_atletas y se toma el roster del coach
+        solicitados = list(dict.fromkeys(data.ids_atletas))
+        query = db.query(PerfilAtleta.id_atleta, PerfilAtleta.id_usuario)
+        if data.todo_el_roster:
+            query = query.filter(PerfilAtleta.id_entrenador == entrenamiento.id_entrenador)
+        else:
+            query = query.filter(PerfilAtleta.id_atleta.in_(solicitados))
+            # Para un coach los atletas de otros roster cuentan como no encontrados
+            if usuario.tipo == "entrenador":
+                query = query.filter(PerfilAtleta.id_entrenador == usuario.id_perfil)
+        existentes = dict(query.all())  # id_atleta -> id_usuario
+        if data.todo_el_roster:
+            solicitados = sorted(existentes)
+
+        ya_asignados = set()
+        if existentes:
+            ya_asignados = {
+                id_atleta
+                for (id_atleta,) in db.query(AsignacionAtleta.id_atleta).filter(
+                    AsignacionAtleta.id_entrenamiento == data.id_entrenamiento,
+                    AsignacionAtleta.id_atleta.in_(list(existentes)),
+                )
+            }
+
+        resultados = []
+        nuevas = []
+        hoy = date.today()
+        for id_atleta in solicitados:
+            if id_atleta not in existentes:
+                resultados.append({"id_atleta": id_atleta, "resultado": "no_encontrado"})
+            elif id_atleta in ya_asignados:
+                resultados.append({"id_atleta": id_atleta, "resultado": "ya_asignado"})
+            else:
+                resultados.append({"id_atleta": id_atleta, "resultado": "asignado"})
+                nuevas.append({
+                    "id_entrenamiento": data.id_entrenamiento,
+                    "id_atleta": id_atleta,
+                    "fecha_asignacion": hoy,
+                    "estado": "pendiente",
+                })
+
+        # Un solo executemany para todas las asignaciones nuevas
+        claves = []
+        if nuevas:
+            db.execute(insert(AsignacionAtleta), nuevas)
+            cambios = CambiosResumen()
+            for n in nuevas:
+                cambios.agregar(n["id_atleta"], entrenamiento.id_entrenador, despues=("pendiente", None, None))
+            cambios.aplicar(db)
+            db.commit()
+            claves = claves_dashboard_atletas(*(existentes[n["id_atleta"]] for n in nuevas))
+
+        respuesta = {"id_entrenamiento": data.id_entrenamiento, "asignados": len(nuevas), "resultados": resultados}
+        return respuesta, claves
 
-    return asignacion
\ No newline at end of file
+    respuesta, claves = await run_db(db, asignar)
+    await cache.delete(*claves)
+    return respuesta
@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from app.db import SessionLocal
+from app.models import PerfilAtleta, Entrenamiento, AsignacionAtleta
+from app.schemas import TokenPayload
+from app.security import require_tipo
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+# Filas que se traen del cursor del servidor por vuelta; la memoria queda acotada a esto
+YIELD_PER = 1000
+
+RECURSOS = {
+    "atletas": PerfilAtleta,
+    "entrenamientos": Entrenamiento,
+    "asignaciones": AsignacionAtleta,
+}
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _valor(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def _valor_csv(valor):
+    # Columnas JSON (zonas_frecuencia): en la celda va JSON, no el repr de Python
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, ensure_ascii=False)
+    return _valor(valor)
+
+
+def _consulta(recurso: str, id_entrenador=None):
+    modelo = RECURSOS[recurso]
+    columnas = list(modelo.__table__.columns)
+    stmt = select(*columnas).order_by(*modelo.__table__.primary_key.columns)
+
+    if id_entrenador is not None:
+        if modelo is AsignacionAtleta:
+            stmt = stmt.join(Entrenamiento, Entrenamiento.id_entrenamiento == AsignacionAtleta.id_entrenamiento)
+            stmt = stmt.where(Entrenamiento.id_entrenador == id_entrenador)
+        else:
+            stmt = stmt.where(modelo.id_entrenador == id_entrenador)
+
+    # stream_results usa un cursor del lado del servidor (SSCursor en MySQL)
+    stmt = stmt.execution_options(stream_results=True, yield_per=YIELD_PER)
+    return stmt, [c.name for c in columnas]
+
+
+def _filas(stmt):
+    # Sesion propia: la del Depends ya se cerro cuando empieza a mandarse el cuerpo
+    db = SessionLocal()
+    try:
+        for particion in db.execute(stmt).partitions():
+            yield particion
+    finally:
+        db.close()
+
+
+def _generar_ndjson(stmt, nombres):
+    for particion in _filas(stmt):
+        yield "".join(
+            json.dumps(dict(zip(nombres, map(_valor, fila))), ensure_ascii=False) + "\n"
+            for fila in particion
+        )
+
+
+def _generar_csv(stmt, nombres):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(nombres)
+    for particion in _filas(stmt):
+        writer.writerows([map(_valor_csv, fila) for fila in particion])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _respuesta(recurso: str, formato: str, id_entrenador=None):
+    if recurso not in RECURSOS:
+        raise HTTPException(status_code=404, detail="Recurso de exportación no encontrado")
+
+    stmt, nombres = _consulta(recurso, id_entrenador)
+    generador = _generar_ndjson if formato == "ndjson" else _generar_csv
+    nombre_archivo = f"{recurso}.{formato}"
+    return StreamingResponse(
+        generador(stmt, nombres),
+        media_type=MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre_archivo}"'},
+    )
+
+
+@router.get("/coach/{id_entrenador}/{recurso}")
+def exportar_coach(
+    id_entrenador: int,
+    recurso: str,
+    formato: Literal["ndjson", "csv"] = "ndjson",
+    usuario: TokenPayload = Depends(require_tipo("entrenador", "administrador")),
+):
+    # Un coach solo exporta lo suyo; el administrador puede exportar cualquiera
+    if usuario.tipo == "entrenador" and usuario.id_perfil != id_entrenador:
+        raise HTTPException(status_code=403, detail="No autorizado para este recurso")
+    return _respuesta(recurso, formato, id_entrenador)
+
+
+@router.get("/{recurso}")
+def exportar_todo(
+    recurso: str,
+    formato: Literal["ndjson", "csv"] = "ndjson",
+    usuario: TokenPayload = Depends(require_tipo("administrador")),
+):
+    return _respuesta(recurso, formato)
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app import db
+from app.pool_metrics import pool_metrics, estado_pool
+from app.cache import cache
+from app.query_metrics import route_metrics
+from app.security import require_tipo
+
+# include_in_schema solo los saca de /docs: el acceso lo cierra el token de administrador
+solo_admin = [Depends(require_tipo("administrador"))]
+
+router = APIRouter(prefix="/internal", tags=["Interno"], include_in_schema=False, dependencies=solo_admin)
+# /metrics va en la raiz, que es donde lo busca Prometheus por defecto (con bearer token en el scrape)
+metrics_router = APIRouter(tags=["Interno"], include_in_schema=False, dependencies=solo_admin)
+
+
+@router.get("/pool")
+def get_pool_metrics():
+    """Contadores e histograma de espera del pool para dimensionarlo con datos reales"""
+    respuesta = {
+        "config": {
+            "pool_size": db.DB_POOL_SIZE,
+            "max_overflow": db.DB_MAX_OVERFLOW,
+            "pool_timeout": db.DB_POOL_TIMEOUT,
+            "pool_recycle": db.DB_POOL_RECYCLE,
+            "pool_pre_ping": db.DB_POOL_PRE_PING,
+        },
+        "metricas": pool_metrics.snapshot(),
+        "pool": estado_pool(db.engine),
+    }
+    if db.async_engine is not None:
+        respuesta["pool_async"] = estado_pool(db.async_engine.sync_engine)
+    if db.replicas is not None:
+        respuesta["replicas"] = [
+            {**r, "pool": estado_pool(replica.engine)}
+            for r, replica in zip(db.replicas.estado(), db.replicas.replicas)
+        ]
+    return respuesta
+
+
+@router.get("/cache")
+def get_cache_stats():
+    return cache.stats()
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Histogramas por ruta de duracion, tiempo de DB y consultas por peticion"""
+    return PlainTextResponse(route_metrics.prometheus(), media_type="text/plain; version=0.0.4")
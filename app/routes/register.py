@@ -1,74 +1,312 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+import json
+import os
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from passlib.hash import bcrypt
-from app.db import SessionLocal
+from app.db import get_session, run_db, run_db_reintentando
+from app.hashing import hash_password, hash_passwords
 from app import models, schemas
-from datetime import date
+from app.heart_rate import calcular as calcular_frecuencia
+from app.security import require_tipo
+from app.cache import cache
+from app.invalidation import claves_dashboard_coaches
+from app.coach_read_model import refrescar as refrescar_coaches, crear_entrenadores
 
 router = APIRouter(prefix="/registro", tags=["Registro"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Tope de filas por peticion de /registro/bulk y cuantas van en cada transaccion
+REGISTRO_BULK_MAX_FILAS = int(os.getenv("REGISTRO_BULK_MAX_FILAS", "5000"))
+REGISTRO_BULK_LOTE = int(os.getenv("REGISTRO_BULK_LOTE", "500"))
 
+TIPOS_NDJSON = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines")
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def registrar_usuario(data: schemas.RegistroUsuario, db: Session = Depends(get_db)):
-    # Validar email único
-    if db.query(models.Usuario).filter_by(email=data.email).first():
-        raise HTTPException(status_code=400, detail="Email ya registrado")
-
+async def registrar_usuario(data: schemas.RegistroUsuario, db=Depends(get_session)):
     if data.tipo not in ("atleta", "entrenador"):
         raise HTTPException(status_code=400, detail="Tipo de usuario inválido")
 
-    # Crear usuario
-    usuario = models.Usuario(
-        email=data.email,
-        contrasena_hash=bcrypt.hash(data.contrasena),
-        tipo=data.tipo
-    )
-    db.add(usuario)
-    db.commit()
-    db.refresh(usuario)
-
-    # Crear perfil según tipo
-    if data.tipo == "atleta":
-        crear_perfil_atleta(usuario.id_usuario, data, db)
-    elif data.tipo == "entrenador":
-        crear_perfil_entrenador(usuario.id_usuario, data, db)
-
-    return {"mensaje": "Registro exitoso", "id_usuario": usuario.id_usuario, "tipo": usuario.tipo}
-
-
-def crear_perfil_atleta(user_id: int, data: schemas.RegistroUsuario, db: Session):
-    edad = (date.today() - data.fecha_nacimiento).days // 365
-    frecuencia_max = 220 - edad
-
-    perfil = models.PerfilAtleta(
-        id_usuario=user_id,
-        nombre_completo=data.nombre_completo,
-        fecha_nacimiento=data.fecha_nacimiento,
-        altura=data.altura,
-        peso=data.peso,
-        deporte=data.deporte,
-        frecuencia_cardiaca_minima=data.frecuencia_cardiaca_minima,
-        frecuencia_cardiaca_maxima=frecuencia_max,
-        id_entrenador=data.id_entrenador if data.id_entrenador else None
-    )
-    db.add(perfil)
-    db.commit()
+    problemas = _problemas_perfil(data)
+    if problemas:
+        raise HTTPException(status_code=400, detail=problemas[0])
+
+    # bcrypt es CPU pura: se calcula en el pool de hashing, fuera de la sesion
+    contrasena_hash = await hash_password(data.contrasena)
+
+    def registrar(db: Session):
+        # Usuario y perfil en una sola transaccion: o quedan los dos o ninguno
+        usuario = models.Usuario(
+            email=data.email,
+            contrasena_hash=contrasena_hash,
+            tipo=data.tipo
+        )
+        db.add(usuario)
+        try:
+            # El INSERT da el id_usuario; el UNIQUE del email hace de validacion sin SELECT previo
+            # y sin carrera entre dos registros simultaneos
+            db.flush()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Email ya registrado")
+
+        try:
+            if data.tipo == "atleta":
+                db.add(models.PerfilAtleta(id_usuario=usuario.id_usuario, **datos_perfil_atleta(data)))
+                id_entrenador = data.id_entrenador
+            else:
+                # Primero la fila en entrenadores (a la que apuntan atletas y entrenamientos) y el perfil con su id
+                [id_entrenador] = crear_entrenadores(db, [data.nombre_completo])
+                db.add(models.PerfilEntrenador(
+                    id_entrenador=id_entrenador, id_usuario=usuario.id_usuario, **datos_perfil_entrenador(data)
+                ))
+            refrescar_coaches(db, id_entrenador)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            if data.id_entrenador:  # FK del perfil: lo unico que puede fallar aqui
+                raise HTTPException(status_code=400, detail="Entrenador no encontrado")
+            raise
+
+        claves = claves_dashboard_coaches(db, data.id_entrenador) if data.tipo == "atleta" else []
+        return {"mensaje": "Registro exitoso", "id_usuario": usuario.id_usuario, "tipo": usuario.tipo}, claves
+
+    # Deadlock o lock wait en MySQL: se repite la transaccion entera
+    respuesta, claves = await run_db_reintentando(db, registrar)
+    await cache.delete(*claves)
+    return respuesta
+
+
+@router.post("/bulk", response_model=schemas.RegistroBulkResponse)
+async def registrar_usuarios_bulk(
+    request: Request,
+    usuario: schemas.TokenPayload = Depends(require_tipo("entrenador", "administrador")),
+    db=Depends(get_session),
+):
+    """Alta masiva desde CSV (con encabezado) o NDJSON segun el Content-Type.
+
+    Un coach solo da de alta atletas propios (sin id_entrenador quedan con el
+    suyo); crear coaches o atletas de otro coach pide token de administrador.
+    Las filas invalidas se reportan una por una y no frenan a las demas.
+    """
+    inicio = time.perf_counter()
+    filas = _leer_filas(request.headers.get("content-type", ""), await request.body())
+    if len(filas) > REGISTRO_BULK_MAX_FILAS:
+        raise HTTPException(status_code=413, detail=f"Máximo {REGISTRO_BULK_MAX_FILAS} filas por petición")
+
+    errores = []
+    validas = []  # (fila, RegistroUsuario)
+    vistos = set()
+    for n, fila in enumerate(filas, 1):
+        if isinstance(fila, str):
+            errores.append({"fila": n, "errores": [fila]})
+            continue
+        try:
+            data = schemas.RegistroUsuario.model_validate(fila)
+        except ValidationError as e:
+            errores.append({"fila": n, "email": _texto(fila.get("email")), "errores": [_mensaje(err) for err in e.errors()]})
+            continue
+        problemas = _problemas_perfil(data)
+        if data.email.lower() in vistos:
+            problemas.append("Email repetido en el archivo")
+        vistos.add(data.email.lower())
+        if problemas:
+            errores.append({"fila": n, "email": data.email, "errores": problemas})
+        else:
+            validas.append((n, data))
+
+    if usuario.tipo == "entrenador":
+        ajenas = [
+            n for n, d in validas
+            if d.tipo != "atleta" or (d.id_entrenador or usuario.id_perfil) != usuario.id_perfil
+        ]
+        if ajenas:
+            raise HTTPException(
+                status_code=403,
+                detail=f"No autorizado: las filas {', '.join(map(str, ajenas[:20]))} crean coaches o son de otro coach",
+            )
+        validas = [(n, d.model_copy(update={"id_entrenador": usuario.id_perfil})) for n, d in validas]
+
+    def contra_la_base(db: Session):
+        # Un IN para los emails ya registrados y otro para los coaches referenciados
+        emails = [d.email for _, d in validas]
+        registrados = set()
+        if emails:
+            registrados = {
+                e.lower() for e in db.execute(select(models.Usuario.email).where(models.Usuario.email.in_(emails))).scalars()
+            }
+        ids_coach = {d.id_entrenador for _, d in validas if d.id_entrenador}
+        coaches = set()
+        if ids_coach:
+            coaches = set(db.execute(
+                select(models.Entrenador.id_entrenador).where(models.Entrenador.id_entrenador.in_(ids_coach))
+            ).scalars())
+        return registrados, coaches
+
+    registrados, coaches = await run_db(db, contra_la_base)
+    pendientes = []
+    for n, data in validas:
+        problemas = []
+        if data.email.lower() in registrados:
+            problemas.append("Email ya registrado")
+        if data.id_entrenador and data.id_entrenador not in coaches:
+            problemas.append("Entrenador no encontrado")
+        if problemas:
+            errores.append({"fila": n, "email": data.email, "errores": problemas})
+        else:
+            pendientes.append((n, data))
+
+    # bcrypt en paralelo en todos los procesos del pool, antes de abrir transacciones.
+    # Lo que no entro en la cola de bcrypt (None) vuelve como error de su fila para reenviarla
+    hashes = await hash_passwords([d.contrasena for _, d in pendientes])
+    errores += [{"fila": n, "email": d.email, "errores": ["Servidor ocupado, reintenta esta fila"]}
+                for (n, d), h in zip(pendientes, hashes) if h is None]
+    pendientes = [(n, d, h) for (n, d), h in zip(pendientes, hashes) if h is not None]
+
+    def insertar(db: Session):
+        creados, fallidos = [], []
+        for i in range(0, len(pendientes), REGISTRO_BULK_LOTE):
+            lote = pendientes[i:i + REGISTRO_BULK_LOTE]
+            try:
+                creados += _insertar_lote(db, lote)
+                continue
+            except IntegrityError:
+                db.rollback()
+            # Otro registro se llevo algun email mientras tanto: se sacan esos y se reintenta una vez
+            tomados = {
+                e.lower() for e in db.execute(
+                    select(models.Usuario.email).where(models.Usuario.email.in_([d.email for _, d, _ in lote]))
+                ).scalars()
+            }
+            fallidos += [{"fila": n, "email": d.email, "errores": ["Email ya registrado"]}
+                         for n, d, _ in lote if d.email.lower() in tomados]
+            lote = [x for x in lote if x[1].email.lower() not in tomados]
+            try:
+                creados += _insertar_lote(db, lote)
+            except IntegrityError as e:
+                db.rollback()
+                fallidos += [{"fila": n, "email": d.email, "errores": [f"No se pudo registrar: {e.orig}"]}
+                             for n, d, _ in lote]
 
+        ids_coach = {d.id_entrenador for _, d, _ in pendientes if d.tipo == "atleta" and d.id_entrenador}
+        return creados, fallidos, claves_dashboard_coaches(db, *ids_coach)
 
-def crear_perfil_entrenador(user_id: int, data: schemas.RegistroUsuario, db: Session):
-    perfil = models.PerfilEntrenador(
-        id_usuario=user_id,
-        nombre_completo=data.nombre_completo,
-        fecha_nacimiento=data.fecha_nacimiento,
-        especialidad=data.especialidad,
-        experiencia=data.experiencia
-    )
-    db.add(perfil)
+    creados, fallidos, claves = await run_db(db, insertar) if pendientes else ([], [], [])
+    await cache.delete(*claves)
+
+    errores = sorted(errores + fallidos, key=lambda e: e["fila"])
+    segundos = time.perf_counter() - inicio
+    return {
+        "recibidas": len(filas),
+        "registradas": len(creados),
+        "con_error": len(errores),
+        "segundos": round(segundos, 3),
+        "filas_por_segundo": round(len(creados) / segundos, 1) if segundos else 0.0,
+        "registrados": creados,
+        "errores": errores,
+    }
+
+
+def _leer_filas(content_type: str, cuerpo: bytes) -> list:
+    """Dicts por fila; un str en lugar del dict es el error de esa fila"""
+    tipo = content_type.split(";")[0].strip().lower()
+    try:
+        texto = cuerpo.decode("utf-8-sig")  # las planillas de Excel traen BOM
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El archivo debe estar en UTF-8")
+
+    if tipo == "text/csv":
+        # Celda vacia = campo no enviado, asi aplican los defaults del schema
+        return [
+            {k.strip(): v.strip() for k, v in fila.items() if k and isinstance(v, str) and v.strip()}
+            for fila in csv.DictReader(io.StringIO(texto))
+        ]
+    if tipo in TIPOS_NDJSON:
+        filas = []
+        for linea in texto.splitlines():
+            if not linea.strip():
+                continue
+            try:
+                fila = json.loads(linea)
+            except ValueError as e:
+                filas.append(f"JSON inválido: {e}")
+                continue
+            filas.append(fila if isinstance(fila, dict) else "Cada línea debe ser un objeto JSON")
+        return filas
+    raise HTTPException(status_code=415, detail="Envía text/csv o application/x-ndjson")
+
+
+def _mensaje(error: dict) -> str:
+    campo = ".".join(str(p) for p in error["loc"])
+    return f"{campo}: {error['msg']}" if campo else error["msg"]
+
+
+def _texto(valor):
+    return valor if isinstance(valor, str) else None
+
+
+def _problemas_perfil(data: schemas.RegistroUsuario) -> list:
+    # Lo que el schema deja pasar pero la tabla del perfil no
+    if data.tipo == "atleta" and not data.deporte:
+        return ["deporte: obligatorio para atletas"]
+    return []
+
+
+def _insertar_lote(db: Session, lote: list) -> list:
+    """Usuarios y perfiles de un lote con un executemany por tabla y un commit"""
+    if not lote:
+        return []
+    db.execute(insert(models.Usuario), [
+        {"email": d.email, "contrasena_hash": h, "tipo": d.tipo} for _, d, h in lote
+    ])
+    # MySQL no tiene RETURNING: los ids salen con un SELECT por los emails del lote
+    ids = dict(db.execute(
+        select(models.Usuario.email, models.Usuario.id_usuario).where(models.Usuario.email.in_([d.email for _, d, _ in lote]))
+    ).all())
+    ids = {e.lower(): i for e, i in ids.items()}
+
+    atletas = [{"id_usuario": ids[d.email.lower()], **datos_perfil_atleta(d)} for _, d, _ in lote if d.tipo == "atleta"]
+    entrenadores = [
+        {"id_usuario": ids[d.email.lower()], **datos_perfil_entrenador(d)} for _, d, _ in lote if d.tipo == "entrenador"
+    ]
+    if atletas:
+        db.execute(insert(models.PerfilAtleta), atletas)
+    ids_coach = {a["id_entrenador"] for a in atletas}
+    if entrenadores:
+        ids_nuevos = crear_entrenadores(db, [e["nombre_completo"] for e in entrenadores])
+        db.execute(insert(models.PerfilEntrenador), [
+            {"id_entrenador": i, **e} for i, e in zip(ids_nuevos, entrenadores)
+        ])
+        ids_coach.update(ids_nuevos)
+    refrescar_coaches(db, *ids_coach)
     db.commit()
+    return [{"fila": n, "id_usuario": ids[d.email.lower()], "email": d.email} for n, d, _ in lote]
+
+
+def datos_perfil_atleta(data: schemas.RegistroUsuario) -> dict:
+    # Maxima por edad y zonas de Karvonen quedan guardadas desde el alta
+    frecuencia = calcular_frecuencia(data.fecha_nacimiento, data.frecuencia_cardiaca_minima, None, manual=False)
+    return {
+        "nombre_completo": data.nombre_completo,
+        "fecha_nacimiento": data.fecha_nacimiento,
+        "altura": data.altura,
+        "peso": data.peso,
+        "deporte": data.deporte,
+        "frecuencia_cardiaca_minima": data.frecuencia_cardiaca_minima,
+        **frecuencia,
+        "id_entrenador": data.id_entrenador if data.id_entrenador else None,
+    }
+
+
+def datos_perfil_entrenador(data: schemas.RegistroUsuario) -> dict:
+    return {
+        "nombre_completo": data.nombre_completo,
+        "fecha_nacimiento": data.fecha_nacimiento,
+        "especialidad": data.especialidad,
+        "experiencia": data.experiencia,
+    }
+
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, constr
+from pydantic import BaseModel, ConfigDict, EmailStr, conint, constr
 from datetime import date, datetime  
 from typing import Optional, Literal, List
 from enum import Enum
@@ -8,9 +8,7 @@ class UsuarioBase(BaseModel):
     email: EmailStr
     tipo: str
 
-    class Config:
-        orm_mode = True
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class EstadoAsignacion(str, Enum):
     pendiente = "pendiente"
@@ -21,6 +19,23 @@ class AsignacionCreate(BaseModel):
     id_entrenamiento: int
     id_atleta: int
 
+class AsignacionBulkCreate(BaseModel):
+    id_entrenamiento: int
+    ids_atletas: List[int] = []
+    todo_el_roster: bool = False  # asigna a todos los atletas del coach del entrenamiento
+
+
+class AsignacionBulkResultado(BaseModel):
+    id_atleta: int
+    resultado: Literal["asignado", "ya_asignado", "no_encontrado"]
+
+
+class AsignacionBulkResponse(BaseModel):
+    id_entrenamiento: int
+    asignados: int
+    resultados: List[AsignacionBulkResultado]
+
+
 class AsignacionResponse(BaseModel):
     id_asignacion: int
     id_entrenamiento: int
@@ -31,8 +46,7 @@ class AsignacionResponse(BaseModel):
     feedback: Optional[str]
     calificacion: Optional[int]
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AtletaCreate(BaseModel):
@@ -53,8 +67,13 @@ class EntrenamientoAsignadoResponse(BaseModel):
     duracion_estimada: Optional[int]
     nivel_dificultad: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+class ZonaFrecuencia(BaseModel):
+    zona: int
+    minima: int
+    maxima: int
+
 
 class AsignacionAtletaResponse(BaseModel):
     id_asignacion: int
@@ -65,8 +84,14 @@ class AsignacionAtletaResponse(BaseModel):
     calificacion: Optional[int]
     entrenamiento: Optional[EntrenamientoAsignadoResponse] = None  # Puede ser None si no hay entrenamiento asignado
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AsignacionDetalleResponse(AsignacionResponse):
+    # Listados filtrados: la asignacion con su entrenamiento, cargado en el mismo JOIN
+    entrenamiento: EntrenamientoAsignadoResponse
+
+
 class AtletaResponse(BaseModel):
     id_atleta: int  # 
     usuario: UsuarioBase  # Relación con Usuario
@@ -80,10 +105,10 @@ class AtletaResponse(BaseModel):
     id_entrenador: Optional[int]  # Nuevo campo
     frecuencia_cardiaca_minima: Optional[int]  # Nuevo campo
     frecuencia_cardiaca_maxima: Optional[int]  # Nuevo campo
+    zonas_frecuencia: Optional[List[ZonaFrecuencia]] = None
     asignaciones: List[AsignacionAtletaResponse]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # En schemas.py
 class AtletaUpdate(BaseModel):
@@ -124,8 +149,7 @@ class EntrenadorResponse(BaseModel):
     activo: bool
     atletas_asignados: List[int] = []  # Lista de IDs de atletas asignados
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 #schemas nuevos
 class RegistroUsuario(BaseModel):
@@ -146,6 +170,28 @@ class RegistroUsuario(BaseModel):
     especialidad: Optional[str] = None
     experiencia: Optional[str] = None
 
+
+class RegistroBulkError(BaseModel):
+    fila: int  # 1 = primera fila de datos (sin contar el encabezado del CSV)
+    email: Optional[str] = None
+    errores: List[str]
+
+
+class RegistroBulkCreado(BaseModel):
+    fila: int
+    id_usuario: int
+    email: str
+
+
+class RegistroBulkResponse(BaseModel):
+    recibidas: int
+    registradas: int
+    con_error: int
+    segundos: float
+    filas_por_segundo: float
+    registrados: List[RegistroBulkCreado]
+    errores: List[RegistroBulkError]
+
 #nuevos sisisi
 class EntrenamientoSchema(BaseModel):
     id: int
@@ -156,8 +202,7 @@ class EntrenamientoSchema(BaseModel):
     dificultad: Optional[str]
     estado: str = "pendiente"  # por defecto
 
-    class Config:
-        from_attributes = True  # si usas SQLAlchemy 2.0 o más reciente
+    model_config = ConfigDict(from_attributes=True)
 
 class PerfilAtletaDashboardResponse(BaseModel):
     id_atleta: int
@@ -169,11 +214,11 @@ class PerfilAtletaDashboardResponse(BaseModel):
     deporte: str
     frecuencia_cardiaca_maxima: Optional[int]
     frecuencia_cardiaca_minima: Optional[int]
+    zonas_frecuencia: Optional[List[ZonaFrecuencia]] = None
     nombre_entrenador: Optional[str]
     entrenamientos: List[EntrenamientoSchema]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Debe estar en app/schemas.py
 
@@ -187,22 +232,30 @@ class AtletaOut(BaseModel):
     deporte: str
     frecuencia_cardiaca_maxima: Optional[int]
     frecuencia_cardiaca_minima: Optional[int]
+    zonas_frecuencia: Optional[List[ZonaFrecuencia]] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
-class AtletaUpdateSchema(BaseModel):
-    nombre_completo: Optional[str]
-    fecha_nacimiento: Optional[date]
-    altura: Optional[float]
-    peso: Optional[float]
-    deporte: Optional[str]
-    frecuencia_cardiaca_minima: Optional[int]
-    frecuencia_cardiaca_maxima: Optional[int]
+class AtletaEditado(AtletaOut):
     id_entrenador: Optional[int] = None
+    frecuencia_cardiaca_maxima_manual: bool
+    version: int
 
-    class Config:
-        orm_mode = True
+
+class AtletaActualizadoResponse(BaseModel):
+    mensaje: str
+    atleta: AtletaEditado
+
+class AtletaUpdateSchema(BaseModel):
+    # Edicion parcial: solo se tocan los campos que vienen en el cuerpo (exclude_unset)
+    nombre_completo: Optional[str] = None
+    fecha_nacimiento: Optional[date] = None
+    altura: Optional[float] = None
+    peso: Optional[float] = None
+    deporte: Optional[str] = None
+    frecuencia_cardiaca_minima: Optional[int] = None
+    frecuencia_cardiaca_maxima: Optional[int] = None
+    id_entrenador: Optional[int] = None
 
 class CoachOut(BaseModel):
     id_entrenador: int
@@ -212,8 +265,7 @@ class CoachOut(BaseModel):
     experiencia: Optional[str]
     atletas_asignados: List[AtletaOut]  # Lista de diccionarios con datos de atletas asignados
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class NivelDificultad(str, Enum):
@@ -228,9 +280,6 @@ class PostEntrenamiento(BaseModel):  # ✅ Este es solo para recibir datos
     duracion_estimada: int
     nivel_dificultad: NivelDificultad
 
-    class Config:
-        orm_mode = True
-
 
 class EntrenamientoOut(BaseModel):
     id_entrenamiento: int
@@ -241,5 +290,83 @@ class EntrenamientoOut(BaseModel):
     nivel_dificultad: Optional[str]
     fecha_creacion: Optional[datetime]
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class AnaliticaAtleta(BaseModel):
+    id_atleta: int
+    carga_aguda: float  # minutos * factor de nivel, ultimos 7 dias
+    carga_cronica: float  # promedio semanal de las ultimas 4 semanas
+    acwr: Optional[float]
+    volumen_semanal: List[float]  # minutos completados, de la semana mas vieja a la actual
+    tasa_completado: Optional[float]
+    calificacion_promedio: Optional[float]
+    tendencia_calificacion: Optional[float]  # cambio de calificacion por semana
+    asignadas: int
+    completadas: int
+
+
+class AnaliticaEscuadra(BaseModel):
+    atletas: int
+    carga_aguda: float
+    carga_cronica: float
+    acwr: Optional[float]
+    volumen_semanal: List[float]
+    tasa_completado: Optional[float]
+    calificacion_promedio: Optional[float]
+    tendencia_calificacion: Optional[float]
+    atletas_acwr_bajo: int
+    atletas_acwr_alto: int
+
+
+class AnaliticaCoachResponse(BaseModel):
+    id_entrenador: int
+    hasta: date
+    semanas: int
+    escuadra: AnaliticaEscuadra
+    atletas: List[AnaliticaAtleta]
+
+
+class AnaliticaAtletaResponse(AnaliticaAtleta):
+    hasta: date
+    semanas: int
+
+
+class AsignacionEstadoUpdate(BaseModel):
+    estado: EstadoAsignacion
+    # Escala de 1 a 5: fuera de ahi descuadra promedios y tendencias
+    calificacion: Optional[conint(ge=1, le=5)] = None
+    feedback: Optional[str] = None
+
+
+class ResumenAsignaciones(BaseModel):
+    pendientes: int
+    en_progreso: int
+    completadas: int
+    calificadas: int
+    calificacion_promedio: Optional[float]
+    ultima_completada: Optional[date]
+
+
+class ResumenAtletaResponse(ResumenAsignaciones):
+    id_atleta: int
+
+
+class ResumenAtletaCoach(ResumenAtletaResponse):
+    nombre_completo: str
+
+
+class ResumenCoachResponse(ResumenAsignaciones):
+    # Los totales son de los entrenamientos del coach; las filas, de su roster actual
+    id_entrenador: int
+    atletas: List[ResumenAtletaCoach]
+
+
+class TokenPayload(BaseModel):
+    id_usuario: int
+    tipo: str
+    id_perfil: Optional[int] = None
+    token_type: Literal["access", "refresh"]
+
+
+class RefreshInput(BaseModel):
+    refresh_token: str
@@ -0,0 +1,97 @@
+import os
+import time
+
+import jwt
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+from app.schemas import TokenPayload
+
+# Sin valor por defecto: con una llave conocida cualquiera firma tokens (tipo=administrador incluido)
+JWT_SECRET = os.getenv("JWT_SECRET")
+if not JWT_SECRET:
+    raise RuntimeError("Falta JWT_SECRET en el entorno: la app no arranca sin la llave para firmar tokens")
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+ACCESS_TOKEN_TTL = int(os.getenv("ACCESS_TOKEN_TTL", str(15 * 60)))
+REFRESH_TOKEN_TTL = int(os.getenv("REFRESH_TOKEN_TTL", str(7 * 24 * 3600)))
+
+bearer = HTTPBearer(auto_error=False)
+
+
+def crear_token(id_usuario: int, tipo: str, id_perfil, token_type: str) -> str:
+    ahora = int(time.time())
+    ttl = ACCESS_TOKEN_TTL if token_type == "access" else REFRESH_TOKEN_TTL
+    payload = {
+        "sub": str(id_usuario),
+        "tipo": tipo,
+        "id_perfil": id_perfil,
+        "token_type": token_type,
+        "iat": ahora,
+        "exp": ahora + ttl,
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+
+def crear_tokens(id_usuario: int, tipo: str, id_perfil) -> dict:
+    return {
+        "access_token": crear_token(id_usuario, tipo, id_perfil, "access"),
+        "refresh_token": crear_token(id_usuario, tipo, id_perfil, "refresh"),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_TTL,
+    }
+
+
+def decodificar_token(token: str, token_type: str = "access") -> TokenPayload:
+    """Valida firma y expiracion; no toca la base de datos"""
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expirado", headers={"WWW-Authenticate": "Bearer"})
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Token inválido", headers={"WWW-Authenticate": "Bearer"})
+
+    if payload.get("token_type") != token_type:
+        raise HTTPException(status_code=401, detail="Tipo de token inválido", headers={"WWW-Authenticate": "Bearer"})
+
+    return TokenPayload(
+        id_usuario=int(payload["sub"]),
+        tipo=payload["tipo"],
+        id_perfil=payload.get("id_perfil"),
+        token_type=payload["token_type"],
+    )
+
+
+def get_current_user(credenciales: HTTPAuthorizationCredentials = Depends(bearer)) -> TokenPayload:
+    if credenciales is None:
+        raise HTTPException(status_code=401, detail="No autenticado", headers={"WWW-Authenticate": "Bearer"})
+    return decodificar_token(credenciales.credentials)
+
+
+def require_tipo(*tipos: str):
+    """Dependencia que valida el rol solo con los claims del token"""
+
+    def dependencia(usuario: TokenPayload = Depends(get_current_user)) -> TokenPayload:
+        if usuario.tipo not in tipos:
+            raise HTTPException(status_code=403, detail="No autorizado para este recurso")
+        return usuario
+
+    return dependencia
+
+
+def verificar_coach(usuario: TokenPayload, id_entrenador: int):
+    """403 salvo que el token sea de ese coach o de un administrador"""
+    if usuario.tipo == "administrador":
+        return
+    if usuario.tipo != "entrenador" or usuario.id_perfil != id_entrenador:
+        raise HTTPException(status_code=403, detail="No autorizado para este recurso")
+
+
+def verificar_atleta(usuario: TokenPayload, id_atleta: int, id_entrenador):
+    """403 salvo el propio atleta, su coach actual (id_entrenador) o un administrador"""
+    if usuario.tipo == "administrador":
+        return
+    if usuario.tipo == "atleta" and usuario.id_perfil == id_atleta:
+        return
+    if usuario.tipo == "entrenador" and id_entrenador is not None and usuario.id_perfil == id_entrenador:
+        return
+    raise HTTPException(status_code=403, detail="No autorizado para este recurso")
@@ -0,0 +1,235 @@
+"""Lanzador de produccion: N workers uvicorn con la app precargada.
+
+El maestro importa la app una sola vez, abre el socket y hace fork de cada
+worker (todo lo importado se comparte copy-on-write). Cada worker suelta el
+pool de conexiones heredado, arma el suyo con su parte de --db-conexiones y
+atiende sobre el socket compartido. Solo Linux/macOS (usa fork).
+
+    python -m app.serve --workers 8 --db-conexiones 80
+
+Senales al maestro:
+    TERM / INT  apagado ordenado: cada worker termina lo que tiene en curso
+    HUP         reinicio gradual: arranca workers nuevos y despues apaga los
+                viejos (la app ya esta precargada: codigo nuevo pide reiniciar el maestro)
+Un worker que se cae se reemplaza solo.
+
+Cache: con CACHE_BACKEND=memory cada worker tendria su propia copia y las
+invalidaciones de uno no llegan a los demas (lecturas viejas y 304 contra ETags
+que ya no valen). Con mas de un worker el launcher la cambia a "none" y lo
+avisa en el log; para tener cache compartida usar CACHE_BACKEND=redis.
+"""
+import argparse
+import logging
+import os
+import signal
+import sys
+import time
+import traceback
+from importlib import import_module
+
+# Pool por defecto de app.db (5 + 10): la base es un tercio del limite y el resto overflow
+PROPORCION_POOL = 3
+# Tiempo que conviven workers nuevos y viejos en un HUP antes de apagar los viejos
+ESPERA_REINICIO = 1.0
+# Un worker que muere antes de esto se reintenta con pausa, para no hacer fork en loop
+VIDA_MINIMA = 1.0
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def pool_por_worker(presupuesto: int, workers: int, engines: int = 1):
+    """(pool_size, max_overflow) de cada engine para no pasar presupuesto conexiones en total"""
+    limite = presupuesto // (workers * engines)
+    if limite < 1:
+        raise ValueError(
+            f"{presupuesto} conexiones no alcanzan para {workers} workers con {engines} engine(s) cada uno"
+        )
+    pool_size = max(1, limite // PROPORCION_POOL)
+    return pool_size, limite - pool_size
+
+
+def _worker(config, sock, pool, hash_workers: int):
+    import uvicorn
+
+    from app import db, hashing
+
+    # El maestro maneja HUP; TERM/INT los vuelve a poner uvicorn para su apagado ordenado
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, signal.SIG_DFL)
+
+    db.reiniciar_engines(*pool)
+    # Cada worker tendria su pool de bcrypt de cpu_count procesos; se reparte
+    hashing.HASH_WORKERS = hash_workers
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Maestro:
+    def __init__(self, config, sock, workers: int, pool, hash_workers: int, timeout_apagado: float):
+        self.config = config
+        self.sock = sock
+        self.cantidad = workers
+        self.pool = pool
+        self.hash_workers = hash_workers
+        self.timeout_apagado = timeout_apagado
+        self.workers = {}  # pid -> (generacion, inicio)
+        self.generacion = 0
+        self.senales = []
+        self.limite_apagado = None
+
+    def _senal(self, signum, frame):
+        self.senales.append(signum)
+
+    def arrancar_worker(self):
+        pid = os.fork()
+        if pid == 0:
+            codigo = 0
+            try:
+                _worker(self.config, self.sock, self.pool, self.hash_workers)
+            except BaseException:
+                traceback.print_exc()
+                codigo = 1
+            finally:
+                os._exit(codigo)
+        self.workers[pid] = (self.generacion, time.monotonic())
+        logger.info("Worker %s arrancado (generacion %s)", pid, self.generacion)
+
+    def terminar(self, pids):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def reiniciar(self):
+        viejos = list(self.workers)
+        self.generacion += 1
+        logger.info("Reinicio gradual: generacion %s", self.generacion)
+        for _ in range(self.cantidad):
+            self.arrancar_worker()
+        # Comparten el socket: mientras los nuevos arrancan los viejos siguen aceptando
+        time.sleep(ESPERA_REINICIO)
+        self.terminar(viejos)
+
+    def apagar(self):
+        if self.limite_apagado is None:
+            logger.info("Apagando %s workers", len(self.workers))
+            self.limite_apagado = time.monotonic() + self.timeout_apagado + 5
+            self.terminar(list(self.workers))
+
+    def recoger(self):
+        """Recoge a los workers que terminaron y reemplaza a los de la generacion actual"""
+        while self.workers:
+            try:
+                pid, estado = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.workers.clear()
+                return
+            if pid == 0:
+                return
+            if pid not in self.workers:
+                continue
+            generacion, inicio = self.workers.pop(pid)
+            if self.limite_apagado is not None or generacion != self.generacion:
+                continue
+            logger.warning("Worker %s termino (estado %s), se reemplaza", pid, os.waitstatus_to_exitcode(estado))
+            if time.monotonic() - inicio < VIDA_MINIMA:
+                time.sleep(VIDA_MINIMA)
+            self.arrancar_worker()
+
+    def run(self) -> int:
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(sig, self._senal)
+        for _ in range(self.cantidad):
+            self.arrancar_worker()
+
+        while self.workers:
+            while self.senales:
+                sig = self.senales.pop(0)
+                if sig == signal.SIGHUP and self.limite_apagado is None:
+                    self.reiniciar()
+                elif sig in (signal.SIGTERM, signal.SIGINT):
+                    self.apagar()
+            self.recoger()
+            if self.limite_apagado is not None and time.monotonic() > self.limite_apagado:
+                logger.warning("Workers sin terminar despues de %ss, se matan", self.timeout_apagado)
+                for pid in list(self.workers):
+                    os.kill(pid, signal.SIGKILL)
+                self.limite_apagado = float("inf")
+            time.sleep(0.1)
+
+        self.sock.close()
+        return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app.main:app")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_WORKERS", str(os.cpu_count() or 1))))
+    parser.add_argument(
+        "--db-conexiones",
+        type=int,
+        default=int(os.getenv("DB_CONEXIONES", "0")) or None,
+        help="conexiones a la base entre todos los workers (pool + overflow); sin esto cada uno usa DB_POOL_SIZE/DB_MAX_OVERFLOW",
+    )
+    parser.add_argument("--timeout-apagado", type=float, default=30, help="segundos para terminar lo que esta en curso")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        raise SystemExit("app.serve necesita fork (Linux/macOS); en Windows usar uvicorn --workers")
+    if args.workers < 1:
+        raise SystemExit("--workers tiene que ser al menos 1")
+    # app.cache lee CACHE_BACKEND al importarse: se corrige antes de precargar la app
+    sin_cache = args.workers > 1 and os.getenv("CACHE_BACKEND", "memory") == "memory"
+    if sin_cache:
+        os.environ["CACHE_BACKEND"] = "none"
+
+    import uvicorn
+    from uvicorn.importer import import_from_string
+
+    from app import db, hashing, precarga
+
+    # Precarga: todo lo que importa la app queda en el maestro antes del fork,
+    # NumPy de las analiticas incluido (si no, cada worker carga su propia copia)
+    app = import_from_string(args.app)
+    import_module(precarga.MODULO)
+
+    pool = (None, None)
+    if args.db_conexiones:
+        # Con DB_ASYNC cada worker puede abrir los dos engines (export usa siempre el sync)
+        engines = 2 if db.DB_ASYNC and not db.DATABASE_URL.startswith("sqlite") else 1
+        try:
+            pool = pool_por_worker(args.db_conexiones, args.workers, engines)
+        except ValueError as e:
+            raise SystemExit(str(e))
+    hash_workers = min(hashing.HASH_WORKERS, max(1, (os.cpu_count() or 1) // args.workers))
+
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        backlog=args.backlog,
+        timeout_graceful_shutdown=args.timeout_apagado,
+        log_level=args.log_level,
+    )
+    sock = config.bind_socket()
+    if sin_cache:
+        logger.warning(
+            "CACHE_BACKEND=memory no se comparte entre %s workers: se usa 'none' (para cache usar redis)",
+            args.workers,
+        )
+    logger.info(
+        "Maestro %s: %s workers, pool por worker %s + %s, %s procesos de bcrypt por worker",
+        os.getpid(), args.workers, *(p if p is not None else "default" for p in pool), hash_workers,
+    )
+    # Las conexiones que haya abierto la precarga no se heredan usadas: se cierran aqui
+    db.engine.dispose()
+    return Maestro(config, sock, args.workers, pool, hash_workers, args.timeout_apagado).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
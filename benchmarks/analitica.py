@@ -0,0 +1,86 @@
+"""Tiempo de /coaches/{id}/analytics para un roster grande, por etapa.
+
+Siembra un solo coach con N atletas y mide por separado el SELECT del
+historial, el calculo vectorizado y el armado de la respuesta. Imprime JSON.
+
+    python -m benchmarks.analitica --atletas 10000 --asignaciones 300000
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+from datetime import date
+
+
+def medir(fn, repeticiones: int):
+    fn()  # calentar
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = fn()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return resultado, {
+        "p50_ms": round(statistics.median(tiempos), 3),
+        "max_ms": round(max(tiempos), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:///bench_analitica.db")
+    parser.add_argument("--atletas", type=int, default=10000)
+    parser.add_argument("--entrenamientos", type=int, default=2000)
+    parser.add_argument("--asignaciones", type=int, default=300000)
+    parser.add_argument("--semanas", type=int, default=8)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.url.startswith("sqlite:///") and os.path.exists(args.url[len("sqlite:///"):]):
+        os.remove(args.url[len("sqlite:///"):])
+    os.environ["DATABASE_URL"] = args.url
+
+    from app import db, models  # noqa: F401
+    from app.analytics import cargar_historial_coach, calcular, metricas_atletas, metricas_escuadra
+    from app.schemas import AnaliticaCoachResponse
+    from benchmarks.datos import sembrar
+
+    db.Base.metadata.create_all(db.engine)
+    # Los INSERT de la siembra pasan de SLOW_QUERY_MS; no interesan aqui
+    logging.getLogger("app.sql").setLevel(logging.ERROR)
+    sembrar(db.engine, 1, args.atletas, args.entrenamientos, args.asignaciones)
+    hoy = date.today()
+
+    sesion = db.SessionLocal()
+    try:
+        historial, carga = medir(lambda: cargar_historial_coach(sesion, 1, hoy, args.semanas), args.repeticiones)
+    finally:
+        sesion.close()
+    metricas, calculo = medir(lambda: calcular(historial, args.semanas), args.repeticiones)
+
+    def armar():
+        return AnaliticaCoachResponse.model_validate({
+            "id_entrenador": 1,
+            "hasta": hoy,
+            "semanas": args.semanas,
+            "escuadra": metricas_escuadra(metricas),
+            "atletas": metricas_atletas(historial, metricas),
+        }).model_dump_json()
+
+    cuerpo, respuesta = medir(armar, args.repeticiones)
+
+    print(json.dumps({
+        "url": db.engine.url.render_as_string(hide_password=True),
+        "atletas": len(historial.ids),
+        "filas_historial": len(historial.idx),
+        "semanas": args.semanas,
+        "bytes_respuesta": len(cuerpo),
+        "select_historial": carga,
+        "calculo_numpy": calculo,
+        "armado_respuesta": respuesta,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Tiempo de arranque de un worker (import de app.main) con presupuesto.
+
+Corre `python -X importtime -c "import app.main"` en procesos nuevos (uno de
+calentamiento para los .pyc y despues --repeticiones), toma la mediana del
+tiempo acumulado de app.main y lo compara con el presupuesto. Tambien falla si
+al arrancar se cargo alguna dependencia pesada que solo usa una funcion
+(NumPy para las analiticas, redis con CACHE_BACKEND=redis, etc.). Imprime JSON
+y sale con 1 si se pasa. Los routers los carga app.main con import_module, que
+importtime no desglosa: su tiempo propio aparece dentro del de app.main.
+
+    python -m benchmarks.arranque
+    python -m benchmarks.arranque --presupuesto-ms 600 --repeticiones 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Mediana medida con -X importtime (que suma su propio costo) mas un margen por el ruido
+# entre corridas; si hay que subirlo, el commit explica que lo justifica
+PRESUPUESTO_MS = 1200
+# Paquetes que no deben entrar al importar la app; se cargan dentro de la funcion que los usa
+PESADOS = ("numpy", "pandas", "scipy", "sklearn", "matplotlib", "flet", "redis")
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir_una_vez(modulo: str) -> list:
+    """[(modulo, propio_us, acumulado_us, profundidad)] de un proceso nuevo, en orden de importtime"""
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ,
+        env={"JWT_SECRET": "benchmark", **os.environ, "PYTHONPATH": RAIZ},
+        capture_output=True,
+        text=True,
+    )
+    if proceso.returncode != 0:
+        raise SystemExit(f"Fallo el import de {modulo}:\n{proceso.stderr[-2000:]}")
+
+    filas = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        profundidad = (len(nombre) - len(nombre.lstrip()) - 1) // 2
+        filas.append((nombre.strip(), int(propio), int(acumulado), profundidad))
+    return filas
+
+
+def imports_directos(filas: list, modulo: str) -> list:
+    """Lo que importa el modulo en su primer nivel: importtime lista a los hijos justo antes del padre"""
+    i = next(i for i, f in enumerate(filas) if f[0] == modulo)
+    profundidad = filas[i][3]
+    hijos = []
+    for nombre, _, acumulado, p in reversed(filas[:i]):
+        if p <= profundidad:
+            break
+        if p == profundidad + 1:
+            hijos.append((nombre, None, acumulado))
+    return hijos[::-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modulo", default="app.main")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--presupuesto-ms", type=float, default=PRESUPUESTO_MS)
+    parser.add_argument("--top", type=int, default=15, help="modulos con mas tiempo propio a listar")
+    args = parser.parse_args()
+
+    medir_una_vez(args.modulo)  # calentamiento: compila los .pyc
+
+    corridas = []
+    for _ in range(args.repeticiones):
+        filas = medir_una_vez(args.modulo)
+        total = next(acumulado for nombre, _, acumulado, _ in filas if nombre == args.modulo)
+        corridas.append((total, filas))
+    corridas.sort(key=lambda c: c[0])
+    total_mediana, filas = corridas[len(corridas) // 2]
+
+    cargados = {nombre for nombre, *_ in filas}
+    pesados = sorted(p for p in PESADOS if p in cargados)
+    mediana_ms = total_mediana / 1000
+    resultado = {
+        "modulo": args.modulo,
+        "python": sys.version.split()[0],
+        "repeticiones": args.repeticiones,
+        "mediana_ms": round(mediana_ms, 1),
+        "min_ms": round(corridas[0][0] / 1000, 1),
+        "max_ms": round(corridas[-1][0] / 1000, 1),
+        "desviacion_ms": round(statistics.pstdev(c[0] for c in corridas) / 1000, 1),
+        "presupuesto_ms": args.presupuesto_ms,
+        "modulos_importados": len(filas),
+        "pesados_al_arrancar": pesados,
+        # De la corrida mediana: donde se va el tiempo
+        "top_propio": [
+            {"modulo": nombre, "propio_ms": round(propio / 1000, 1), "acumulado_ms": round(acumulado / 1000, 1)}
+            for nombre, propio, acumulado, _ in sorted(filas, key=lambda f: f[1], reverse=True)[:args.top]
+        ],
+        "imports_directos": [
+            {"modulo": nombre, "acumulado_ms": round(acumulado / 1000, 1)}
+            for nombre, _, acumulado in imports_directos(filas, args.modulo)
+            if acumulado >= 1000
+        ],
+    }
+    resultado["ok"] = mediana_ms <= args.presupuesto_ms and not pesados
+    print(json.dumps(resultado, indent=2))
+    return 0 if resultado["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""Prueba de carga reproducible de toda la API (ASGI en proceso, sin red).
+
+Siembra datos sinteticos, lanza clientes concurrentes contra cada endpoint de
+register, auth, atletas_dashboard y coach_dashboard y escribe un JSON con
+p50/p95/p99, throughput y queries por peticion, para comparar entre commits.
+
+    python -m benchmarks.carga --salida antes.json
+    python -m benchmarks.carga --clientes 100 --peticiones 2000 --async --cache none
+"""
+import argparse
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+CONTRASENA = "bench123"
+
+# (nombre, metodo, plantilla de ruta, cuerpo, autenticacion)
+ESCENARIOS = [
+    ("registro", "POST", "/registro/", "registro", None),
+    ("login", "POST", "/auth/login", "login", None),
+    ("refresh", "POST", "/auth/refresh", "refresh", None),
+    ("atleta_dashboard", "GET", "/atletas/{id_usuario_atleta}", None, None),
+    ("atleta_me", "GET", "/atletas/me", None, "atleta"),
+    ("atleta_basico", "GET", "/atletas/basico/{id_atleta}", None, None),
+    ("atleta_por_usuario", "GET", "/atletas/usuario/{id_usuario_atleta}", None, None),
+    ("atleta_perfil", "GET", "/atletas/perfil/{id_atleta}", None, None),
+    ("atleta_editar", "PUT", "/atletas/editar/{id_atleta}", "editar_atleta", "administrador"),
+    ("coach_dashboard", "GET", "/coaches/{id_entrenador}", None, None),
+    ("coach_me", "GET", "/coaches/me", None, "entrenador"),
+    ("coach_atletas", "GET", "/coaches/{id_entrenador}/atletas", None, None),
+    ("coach_atletas_pagina", "GET", "/coaches/{id_entrenador}/atletas?limit=50", None, None),
+    ("entrenamiento_crear", "POST", "/coaches/entrenamientos", "entrenamiento", "administrador"),
+    ("entrenamientos_coach", "GET", "/coaches/entrenamientos/coach/{id_entrenador}", None, None),
+    ("entrenamiento_detalle", "GET", "/coaches/entrenamientos/{id_entrenamiento}", None, None),
+    ("entrenamiento_editar", "PUT", "/coaches/entrenamientos/{id_entrenamiento}", "entrenamiento", "administrador"),
+    ("asignar", "POST", "/coaches/asignaciones", "asignacion", "administrador"),
+    ("asignar_bulk", "POST", "/coaches/asignaciones/bulk", "asignacion_bulk", "administrador"),
+]
+
+consultas_actuales = contextvars.ContextVar("consultas_actuales", default=None)
+
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    indice = min(len(valores) - 1, max(0, round(p / 100 * len(valores)) - 1))
+    return valores[indice]
+
+
+def commit_actual():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+class Generador:
+    """Parametros aleatorios (con semilla) para cada peticion"""
+
+    def __init__(self, tamanos: dict, semilla: int):
+        self.t = tamanos
+        self.rnd = random.Random(semilla)
+        self.registros = itertools.count()
+
+    def ids(self):
+        coach = self.rnd.randint(1, self.t["coaches"])
+        atleta = self.rnd.randint(1, self.t["atletas"])
+        return {
+            "id_entrenador": coach,
+            "id_atleta": atleta,
+            "id_usuario_atleta": self.t["coaches"] + atleta,
+            "id_entrenamiento": self.rnd.randint(1, self.t["entrenamientos"]),
+        }
+
+    def cuerpo(self, tipo, ids, tokens):
+        from benchmarks.datos import email
+
+        if tipo == "registro":
+            return {
+                "email": f"nuevo{os.getpid()}-{next(self.registros)}@bench.example.com",
+                "contrasena": CONTRASENA,
+                "tipo": "atleta",
+                "nombre_completo": "Atleta Nuevo",
+                "fecha_nacimiento": "2000-01-01",
+                "deporte": "running",
+                "id_entrenador": ids["id_entrenador"],
+            }
+        if tipo == "login":
+            return {"email": email(ids["id_usuario_atleta"]), "password": CONTRASENA}
+        if tipo == "refresh":
+            return {"refresh_token": tokens["atleta"]["refresh_token"]}
+        if tipo == "editar_atleta":
+            return {
+                "nombre_completo": f"Atleta {ids['id_atleta']}",
+                "fecha_nacimiento": "2000-01-01",
+                "altura": 1.75,
+                "peso": round(self.rnd.uniform(55, 90), 1),
+                "deporte": "running",
+                "frecuencia_cardiaca_minima": 55,
+                "frecuencia_cardiaca_maxima": 190,
+            }
+        if tipo == "entrenamiento":
+            return {
+                "id_entrenador": ids["id_entrenador"],
+                "titulo": "Series",
+                "descripcion": "bench",
+                "duracion_estimada": 45,
+                "nivel_dificultad": "intermedio",
+            }
+        if tipo == "asignacion":
+            return {"id_entrenamiento": ids["id_entrenamiento"], "id_atleta": ids["id_atleta"]}
+        if tipo == "asignacion_bulk":
+            atletas = [self.rnd.randint(1, self.t["atletas"]) for _ in range(20)]
+            return {"id_entrenamiento": ids["id_entrenamiento"], "ids_atletas": atletas}
+        return None
+
+
+async def correr_escenario(cliente, escenario, generador, tokens, clientes, peticiones):
+    nombre, metodo, ruta, tipo_cuerpo, auth = escenario
+    latencias, consultas, errores = [], [], {}
+    restantes = itertools.count()
+
+    async def trabajador():
+        while next(restantes) < peticiones:
+            ids = generador.ids()
+            headers = {}
+            if auth:
+                headers["Authorization"] = "Bearer " + tokens[auth]["access_token"]
+            contador = [0]
+            consultas_actuales.set(contador)
+
+            inicio = time.perf_counter()
+            r = await cliente.request(
+                metodo, ruta.format(**ids), json=generador.cuerpo(tipo_cuerpo, ids, tokens), headers=headers
+            )
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            consultas.append(contador[0])
+            if r.status_code >= 400:
+                errores[r.status_code] = errores.get(r.status_code, 0) + 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(clientes)))
+    duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    return nombre, {
+        "metodo": metodo,
+        "ruta": ruta,
+        "peticiones": len(latencias),
+        "rps": round(len(latencias) / duracion, 1),
+        "p50_ms": round(percentil(latencias, 50), 3),
+        "p95_ms": round(percentil(latencias, 95), 3),
+        "p99_ms": round(percentil(latencias, 99), 3),
+        "max_ms": round(latencias[-1], 3),
+        "queries_por_peticion": round(sum(consultas) / len(consultas), 2),
+        "errores": errores,
+    }
+
+
+async def correr(args):
+    import httpx
+    from sqlalchemy import event
+
+    from app import db, models  # noqa: F401
+    from app.hashing import pwd_context
+    from app.main import app
+    from app.security import crear_tokens
+    from benchmarks.datos import email, sembrar
+
+    tamanos = {"coaches": args.coaches, "atletas": args.atletas, "entrenamientos": args.entrenamientos}
+    db.Base.metadata.create_all(db.engine)
+    inicio = time.perf_counter()
+    sembrar(db.engine, args.coaches, args.atletas, args.entrenamientos, args.asignaciones,
+            contrasena_hash=pwd_context.hash(CONTRASENA))
+    siembra = time.perf_counter() - inicio
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        contador = consultas_actuales.get()
+        if contador is not None:
+            contador[0] += 1
+
+    event.listen(db.engine, "before_cursor_execute", contar)
+    if db.DB_ASYNC:
+        db.get_async_sessionmaker()
+        event.listen(db.async_engine.sync_engine, "before_cursor_execute", contar)
+
+    # Un 500 cuenta como error del endpoint, no corta la corrida
+    transporte = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        tokens = {
+            "atleta": (await cliente.post(
+                "/auth/login", json={"email": email(args.coaches + 1), "password": CONTRASENA})).json(),
+            "entrenador": (await cliente.post(
+                "/auth/login", json={"email": email(1), "password": CONTRASENA})).json(),
+            # Las escrituras van con ids al azar de cualquier coach: solo un administrador puede con todas
+            "administrador": crear_tokens(0, "administrador", None),
+        }
+        generador = Generador(tamanos, args.semilla)
+        seleccion = [e for e in ESCENARIOS if not args.solo or e[0] in args.solo]
+        resultados = {}
+        for escenario in seleccion:
+            # bcrypt domina registro/login: menos peticiones para que la corrida no dure horas
+            peticiones = args.peticiones if escenario[3] not in ("registro", "login") else args.peticiones_hash
+            nombre, resultado = await correr_escenario(
+                cliente, escenario, generador, tokens, args.clientes, peticiones
+            )
+            resultados[nombre] = resultado
+            print(f"{nombre:24s} {resultado['rps']:>9} rps  p95 {resultado['p95_ms']:>9} ms", file=sys.stderr)
+
+    # ASGITransport no corre el lifespan: se cierra a mano lo que haria el shutdown
+    await db.dispose_async_engine()
+
+    return {
+        "commit": commit_actual(),
+        "config": {
+            "url": db.engine.url.render_as_string(hide_password=True),
+            "db_async": db.DB_ASYNC,
+            "cache": os.environ.get("CACHE_BACKEND", "memory"),
+            "clientes": args.clientes,
+            "semilla": args.semilla,
+            **tamanos,
+            "asignaciones": args.asignaciones,
+        },
+        "siembra_s": round(siembra, 2),
+        "endpoints": resultados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:///bench_carga.db")
+    parser.add_argument("--coaches", type=int, default=50)
+    parser.add_argument("--atletas", type=int, default=2000)
+    parser.add_argument("--entrenamientos", type=int, default=1000)
+    parser.add_argument("--asignaciones", type=int, default=50000)
+    parser.add_argument("--clientes", type=int, default=50)
+    parser.add_argument("--peticiones", type=int, default=1000, help="peticiones por endpoint")
+    parser.add_argument("--peticiones-hash", type=int, default=100, help="peticiones para registro y login")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--async", dest="modo_async", action="store_true", help="DB_ASYNC=1")
+    parser.add_argument("--cache", choices=["memory", "redis", "none"], default=None)
+    parser.add_argument("--bcrypt-rounds", type=int, default=None)
+    parser.add_argument("--solo", nargs="*", help="nombres de escenarios a correr")
+    parser.add_argument("--salida", help="archivo JSON (por defecto stdout)")
+    args = parser.parse_args()
+
+    # La configuracion de app.db y compania se lee al importar: se fija antes
+    if args.url.startswith("sqlite:///") and os.path.exists(args.url[len("sqlite:///"):]):
+        os.remove(args.url[len("sqlite:///"):])
+    os.environ["DATABASE_URL"] = args.url
+    # app.security no arranca sin llave; la de la corrida solo firma tokens de usuarios sinteticos
+    os.environ.setdefault("JWT_SECRET", "benchmark")
+    if args.modo_async:
+        os.environ["DB_ASYNC"] = "1"
+    if args.cache:
+        os.environ["CACHE_BACKEND"] = args.cache
+    if args.bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+
+    resultado = asyncio.run(correr(args))
+    texto = json.dumps(resultado, indent=2)
+    if args.salida:
+        with open(args.salida, "w") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Datos sinteticos compartidos por los benchmarks."""
+import random
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+
+
+def email(id_usuario: int) -> str:
+    return f"u{id_usuario}@bench.example.com"
+
+
+def sembrar(
+    engine,
+    coaches: int,
+    atletas: int,
+    entrenamientos: int,
+    asignaciones: int,
+    contrasena_hash: str = "x",
+    lote: int = 20000,
+):
+    """Usuarios 1..coaches son entrenadores (perfil y entrenador con el mismo id),
+    el resto atletas repartidos al azar entre ellos. Semilla fija: mismos datos siempre."""
+    rnd = random.Random(42)
+    hoy = date.today()
+    estados = ("pendiente", "en_progreso", "completado")
+    niveles = ("principiante", "intermedio", "avanzado")
+
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO usuarios (id_usuario, email, contrasena_hash, tipo, activo) VALUES (:i, :e, :h, :t, 1)"),
+            [{"i": i, "e": email(i), "h": contrasena_hash, "t": "entrenador" if i <= coaches else "atleta"}
+             for i in range(1, coaches + atletas + 1)],
+        )
+        conn.execute(
+            text("INSERT INTO entrenadores (id_entrenador, nombre) VALUES (:i, :n)"),
+            [{"i": i, "n": f"Coach {i}"} for i in range(1, coaches + 1)],
+        )
+        conn.execute(
+            text("INSERT INTO perfiles_entrenadores (id_entrenador, id_usuario, nombre_completo) VALUES (:i, :i, :n)"),
+            [{"i": i, "n": f"Coach {i}"} for i in range(1, coaches + 1)],
+        )
+        conn.execute(
+            text(
+                "INSERT INTO perfiles_atletas (id_atleta, id_usuario, nombre_completo, fecha_nacimiento, deporte, id_entrenador) "
+                "VALUES (:i, :u, :n, :f, 'running', :c)"
+            ),
+            [{"i": i, "u": coaches + i, "n": f"Atleta {i}", "f": date(2000, 1, 1), "c": rnd.randint(1, coaches)}
+             for i in range(1, atletas + 1)],
+        )
+        conn.execute(
+            text(
+                "INSERT INTO entrenamientos (id_entrenamiento, id_entrenador, titulo, duracion_estimada, fecha_creacion, nivel_dificultad) "
+                "VALUES (:i, :c, :t, :d, :f, :n)"
+            ),
+            [{"i": i, "c": rnd.randint(1, coaches), "t": f"Entrenamiento {i}", "d": rnd.randint(20, 120),
+              "f": datetime.now() - timedelta(days=rnd.randint(0, 365)), "n": rnd.choice(niveles)}
+             for i in range(1, entrenamientos + 1)],
+        )
+
+    insert = text(
+        "INSERT INTO asignaciones_atletas (id_entrenamiento, id_atleta, fecha_asignacion, fecha_completado, estado, calificacion) "
+        "VALUES (:e, :a, :f, :fc, :s, :r)"
+    )
+
+    def asignacion():
+        fila = {"e": rnd.randint(1, entrenamientos), "a": rnd.randint(1, atletas),
+                "f": hoy - timedelta(days=rnd.randint(0, 365)), "s": rnd.choice(estados), "fc": None, "r": None}
+        # Las completadas llevan fecha (unos dias despues, nunca en el futuro) y calificacion
+        if fila["s"] == "completado":
+            fila["fc"] = min(hoy, fila["f"] + timedelta(days=rnd.randint(0, 3)))
+            fila["r"] = rnd.randint(1, 5)
+        return fila
+
+    for inicio in range(0, asignaciones, lote):
+        filas = [asignacion() for _ in range(min(lote, asignaciones - inicio))]
+        with engine.begin() as conn:
+            conn.execute(insert, filas)
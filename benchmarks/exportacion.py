@@ -0,0 +1,123 @@
+"""Memoria del servidor al exportar muchas filas por /export.
+
+Siembra --filas asignaciones, levanta la app con uvicorn en otro proceso y
+descarga /export/asignaciones (token de administrador) tirando los bytes.
+Compara el pico de RSS del servidor (VmHWM de /proc, solo Linux) antes y
+despues de la descarga: el streaming con yield_per tiene que dejarlo plano
+sin importar cuantas filas haya. Imprime JSON y sale con 1 si el pico sube
+mas de --limite-mb.
+
+    python -m benchmarks.exportacion
+    python -m benchmarks.exportacion --filas 200000 --formato csv --limite-mb 50
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.carga import commit_actual
+from benchmarks.escalado import esperar_servidor
+
+# Holgura para lo que el servidor carga una sola vez en la primera peticion
+# (imports perezosos, buffers de uvicorn); no depende del numero de filas
+LIMITE_MB = 64
+
+
+def memoria_mb(pid: int) -> dict:
+    """RSS actual y pico (VmHWM) del proceso, en MB"""
+    valores = {}
+    with open(f"/proc/{pid}/status") as f:
+        for linea in f:
+            if linea.startswith(("VmRSS:", "VmHWM:")):
+                clave, kb, _ = linea.split()
+                valores[clave[:-1]] = int(kb) / 1024
+    return {"rss_mb": round(valores["VmRSS"], 1), "pico_mb": round(valores["VmHWM"], 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:///bench_exportacion.db")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--formato", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--limite-mb", type=float, default=LIMITE_MB, help="cuanto puede subir el pico de RSS")
+    parser.add_argument("--puerto", type=int, default=8766)
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/status"):
+        raise SystemExit("benchmarks.exportacion lee la memoria de /proc: solo Linux")
+
+    # La configuracion de app.db y app.security se lee al importar: se fija antes
+    if args.url.startswith("sqlite:///") and os.path.exists(args.url[len("sqlite:///"):]):
+        os.remove(args.url[len("sqlite:///"):])
+    env = {**os.environ, "DATABASE_URL": args.url, "CACHE_BACKEND": "none"}
+    env.setdefault("JWT_SECRET", "benchmark")
+    os.environ.update(env)
+
+    import httpx
+
+    from app import db, models  # noqa: F401
+    from app.security import crear_tokens
+    from benchmarks.datos import sembrar
+
+    db.Base.metadata.create_all(db.engine)
+    # Los executemany de la siembra pasan el umbral de consulta lenta: no es lo que se mide
+    logging.getLogger("app.sql").setLevel(logging.ERROR)
+    inicio = time.perf_counter()
+    sembrar(db.engine, 10, 1000, 1000, args.filas)
+    siembra = time.perf_counter() - inicio
+    db.engine.dispose()
+
+    base_url = f"http://127.0.0.1:{args.puerto}"
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(args.puerto), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        esperar_servidor(base_url, servidor)
+        antes = memoria_mb(servidor.pid)
+        token = crear_tokens(0, "administrador", None)["access_token"]
+        filas = -1 if args.formato == "csv" else 0  # el CSV trae encabezado
+        total_bytes = 0
+        inicio = time.perf_counter()
+        with httpx.stream(
+            "GET", f"{base_url}/export/asignaciones?formato={args.formato}",
+            headers={"Authorization": "Bearer " + token}, timeout=None,
+        ) as r:
+            if r.status_code != 200:
+                raise SystemExit(f"/export/asignaciones respondio {r.status_code}: {r.read()[:200]!r}")
+            for bloque in r.iter_bytes():
+                total_bytes += len(bloque)
+                filas += bloque.count(b"\n")
+        segundos = time.perf_counter() - inicio
+        despues = memoria_mb(servidor.pid)
+    finally:
+        servidor.terminate()
+        servidor.wait(timeout=60)
+
+    crecimiento = despues["pico_mb"] - antes["pico_mb"]
+    resultado = {
+        "commit": commit_actual(),
+        "url": db.engine.url.render_as_string(hide_password=True),
+        "formato": args.formato,
+        "filas_sembradas": args.filas,
+        "filas_exportadas": filas,
+        "mb_exportados": round(total_bytes / 2**20, 1),
+        "siembra_s": round(siembra, 1),
+        "exportacion_s": round(segundos, 1),
+        "filas_por_segundo": round(filas / segundos) if segundos else None,
+        "servidor_antes": antes,
+        "servidor_despues": despues,
+        "crecimiento_pico_mb": round(crecimiento, 1),
+        "limite_mb": args.limite_mb,
+    }
+    resultado["ok"] = filas == args.filas and crecimiento <= args.limite_mb
+    print(json.dumps(resultado, indent=2))
+    return 0 if resultado["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""Throughput de /auth/login con y sin el pool de procesos de bcrypt.
+
+Para cada valor de --hash-workers levanta la app con uvicorn (un proceso,
+HASH_WORKERS=k; 0 = threadpool de siempre) y le manda logins concurrentes
+durante un tiempo fijo. Al mismo tiempo un cliente aparte pide un dashboard
+liviano, para ver cuanto se resienten las lecturas en una tormenta de logins.
+La cache de credenciales verificadas se apaga: cada login paga su bcrypt.
+
+    python -m benchmarks.login
+    python -m benchmarks.login --hash-workers 0 2 4 8 --conexiones 64 --duracion 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from benchmarks.carga import CONTRASENA, commit_actual, percentil
+from benchmarks.escalado import esperar_servidor
+
+
+async def _tormenta(base_url: str, usuarios: list, conexiones: int, calentamiento: float, duracion: float):
+    import httpx
+
+    from benchmarks.datos import email
+
+    rnd = random.Random(1)
+    inicio_medicion = time.perf_counter() + calentamiento
+    fin = inicio_medicion + duracion
+    logins, lecturas, errores = [], [], {}
+
+    async def medir(lista, peticion):
+        t0 = time.perf_counter()
+        try:
+            r = await peticion()
+            codigo = r.status_code
+        except httpx.HTTPError:
+            codigo = "error"
+        t1 = time.perf_counter()
+        if t0 >= inicio_medicion and t1 <= fin:
+            lista.append((t1 - t0) * 1000)
+            if codigo != 200:
+                errores[codigo] = errores.get(codigo, 0) + 1
+
+    limites = httpx.Limits(max_connections=conexiones + 1, max_keepalive_connections=conexiones + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limites, timeout=60) as cliente:
+        async def login():
+            while time.perf_counter() < fin:
+                cuerpo = {"email": email(rnd.choice(usuarios)), "password": CONTRASENA}
+                await medir(logins, lambda: cliente.post("/auth/login", json=cuerpo))
+
+        async def lectura():
+            while time.perf_counter() < fin:
+                ruta = f"/atletas/basico/{rnd.randint(1, len(usuarios))}"
+                await medir(lecturas, lambda: cliente.get(ruta))
+
+        await asyncio.gather(lectura(), *(login() for _ in range(conexiones)))
+
+    logins.sort()
+    lecturas.sort()
+    return {
+        "logins": len(logins),
+        "rps": round(len(logins) / duracion, 1),
+        "p50_ms": round(percentil(logins, 50), 1) if logins else None,
+        "p95_ms": round(percentil(logins, 95), 1) if logins else None,
+        "lectura_p50_ms": round(percentil(lecturas, 50), 1) if lecturas else None,
+        "lectura_p95_ms": round(percentil(lecturas, 95), 1) if lecturas else None,
+        "errores": errores,
+    }
+
+
+def medir(args, hash_workers: int, usuarios: list, env: dict) -> dict:
+    base_url = f"http://127.0.0.1:{args.puerto}"
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(args.puerto), "--log-level", "warning"],
+        env={**env, "HASH_WORKERS": str(hash_workers)},
+    )
+    try:
+        esperar_servidor(base_url, servidor)
+        resultado = asyncio.run(_tormenta(base_url, usuarios, args.conexiones, args.calentamiento, args.duracion))
+    finally:
+        servidor.terminate()
+        servidor.wait(timeout=60)
+    return {"hash_workers": hash_workers, **resultado}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:///bench_login.db")
+    parser.add_argument("--hash-workers", type=int, nargs="+", default=None, help="por defecto 0 y cpu_count")
+    parser.add_argument("--usuarios", type=int, default=500)
+    parser.add_argument("--conexiones", type=int, default=32, help="logins concurrentes")
+    parser.add_argument("--duracion", type=float, default=15)
+    parser.add_argument("--calentamiento", type=float, default=3)
+    parser.add_argument("--bcrypt-rounds", type=int, default=None, help="por defecto el de app.hashing (12)")
+    parser.add_argument("--puerto", type=int, default=8767)
+    parser.add_argument("--salida", help="archivo JSON (por defecto stdout)")
+    args = parser.parse_args()
+    if args.hash_workers is None:
+        args.hash_workers = [0, os.cpu_count() or 1]
+
+    # La configuracion de app.db y app.hashing se lee al importar: se fija antes
+    if args.url.startswith("sqlite:///") and os.path.exists(args.url[len("sqlite:///"):]):
+        os.remove(args.url[len("sqlite:///"):])
+    env = {**os.environ, "DATABASE_URL": args.url, "CACHE_BACKEND": "none", "LOGIN_CACHE_TTL": "0"}
+    env.setdefault("JWT_SECRET", "benchmark")
+    if args.bcrypt_rounds:
+        env["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    os.environ.update(env)
+
+    from app import db, models  # noqa: F401
+    from app.hashing import BCRYPT_ROUNDS, pwd_context
+    from benchmarks.datos import sembrar
+
+    db.Base.metadata.create_all(db.engine)
+    # Usuario 1 es el coach; el resto son atletas con la misma contraseña
+    sembrar(db.engine, 1, args.usuarios, 1, 0, contrasena_hash=pwd_context.hash(CONTRASENA))
+    db.engine.dispose()
+    usuarios = list(range(2, args.usuarios + 2))
+
+    resultados = []
+    for k in args.hash_workers:
+        resultado = medir(args, k, usuarios, env)
+        resultados.append(resultado)
+        print(f"HASH_WORKERS={k:<3} {resultado['rps']:>8} logins/s  p95 {resultado['p95_ms']} ms  "
+              f"lectura p95 {resultado['lectura_p95_ms']} ms", file=sys.stderr)
+
+    texto = json.dumps({
+        "commit": commit_actual(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "url": db.engine.url.render_as_string(hide_password=True),
+            "bcrypt_rounds": BCRYPT_ROUNDS,
+            "conexiones": args.conexiones,
+            "duracion_s": args.duracion,
+            "usuarios": args.usuarios,
+        },
+        "resultados": resultados,
+    }, indent=2)
+    if args.salida:
+        with open(args.salida, "w") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
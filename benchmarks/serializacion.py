@@ -0,0 +1,140 @@
+"""Tiempo de serializacion de un AtletaResponse con N asignaciones, por camino.
+
+No toca la base: arma objetos ORM en memoria (perfil + usuario + asignaciones
+con su entrenamiento) y mide solo la parte de schemas -> bytes. Imprime JSON.
+
+    python -m benchmarks.serializacion --asignaciones 500
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app import models, schemas
+from app.responses import RespuestaJSON
+
+
+def perfil_en_memoria(asignaciones: int):
+    usuario = models.Usuario(id_usuario=1, email="atleta@bench.example.com", tipo="atleta")
+    perfil = models.PerfilAtleta(
+        id_atleta=1, id_usuario=1, nombre_completo="Atleta Bench", fecha_nacimiento=date(2000, 1, 1),
+        altura=1.75, peso=70, deporte="running", id_entrenador=1,
+        frecuencia_cardiaca_minima=50, frecuencia_cardiaca_maxima=190,
+    )
+    perfil.usuario = usuario
+    for i in range(1, asignaciones + 1):
+        entrenamiento = models.Entrenamiento(
+            id_entrenamiento=i, id_entrenador=1, titulo=f"Entrenamiento {i}", descripcion="Series de 400 m",
+            duracion_estimada=45, nivel_dificultad="intermedio", fecha_creacion=datetime(2024, 1, 1),
+        )
+        perfil.asignaciones.append(models.AsignacionAtleta(
+            id_asignacion=i, id_entrenamiento=i, id_atleta=1,
+            fecha_asignacion=date(2024, 1, 1) + timedelta(days=i % 365), estado="pendiente",
+            entrenamiento=entrenamiento,
+        ))
+    return perfil
+
+
+def _datos(perfil):
+    usuario = perfil.usuario
+    return {
+        "id_atleta": perfil.id_atleta,
+        "usuario": usuario,
+        "email": usuario.email,
+        "tipo": usuario.tipo,
+        "nombre_completo": perfil.nombre_completo,
+        "fecha_nacimiento": perfil.fecha_nacimiento,
+        "altura": perfil.altura,
+        "peso": perfil.peso,
+        "deporte": perfil.deporte,
+        "id_entrenador": perfil.id_entrenador,
+        "frecuencia_cardiaca_minima": perfil.frecuencia_cardiaca_minima,
+        "frecuencia_cardiaca_maxima": perfil.frecuencia_cardiaca_maxima,
+        "asignaciones": perfil.asignaciones,
+    }
+
+
+_adaptador = TypeAdapter(schemas.AtletaResponse)
+
+
+def camino_anterior(perfil) -> bytes:
+    # Lo que hacia obtener_atleta: un schema por asignacion, luego FastAPI vuelca el
+    # modelo a dict, lo re-valida contra response_model, lo serializa y json.dumps
+    asignaciones = [
+        schemas.AsignacionAtletaResponse(
+            id_asignacion=a.id_asignacion, fecha_asignacion=a.fecha_asignacion,
+            fecha_completado=a.fecha_completado, estado=a.estado, feedback=a.feedback,
+            calificacion=a.calificacion,
+            entrenamiento=schemas.EntrenamientoAsignadoResponse.model_validate(a.entrenamiento),
+        )
+        for a in perfil.asignaciones
+    ]
+    modelo = schemas.AtletaResponse(**{
+        **_datos(perfil),
+        "usuario": schemas.UsuarioBase.model_validate(perfil.usuario),
+        "asignaciones": asignaciones,
+    })
+    revalidado = _adaptador.validate_python(modelo.model_dump())
+    contenido = jsonable_encoder(_adaptador.dump_python(revalidado, mode="json"))
+    return json.dumps(contenido, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def camino_model_dump_json(perfil) -> bytes:
+    # obtener_atleta ahora: un model_validate sobre el ORM y pydantic-core a bytes
+    return schemas.AtletaResponse.model_validate(_datos(perfil)).model_dump_json().encode()
+
+
+def camino_orjson(perfil) -> bytes:
+    # Dashboards cacheados: model_dump(mode="json") (lo que se guarda) + orjson
+    datos = schemas.AtletaResponse.model_validate(_datos(perfil)).model_dump(mode="json")
+    return RespuestaJSON(datos).body
+
+
+CAMINOS = {
+    "anterior_revalidacion_json": camino_anterior,
+    "model_validate_model_dump_json": camino_model_dump_json,
+    "model_validate_orjson": camino_orjson,
+}
+
+
+def medir(fn, perfil, repeticiones: int):
+    fn(perfil)  # calentar
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        fn(perfil)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return {
+        "p50_ms": round(statistics.median(tiempos), 3),
+        "p95_ms": round(tiempos[int(len(tiempos) * 0.95) - 1], 3),
+        "min_ms": round(tiempos[0], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--asignaciones", type=int, default=500)
+    parser.add_argument("--repeticiones", type=int, default=200)
+    args = parser.parse_args()
+
+    perfil = perfil_en_memoria(args.asignaciones)
+    # Los tres caminos tienen que producir el mismo documento
+    esperado = orjson.loads(camino_anterior(perfil))
+    for nombre, fn in CAMINOS.items():
+        assert orjson.loads(fn(perfil)) == esperado, nombre
+
+    print(json.dumps({
+        "asignaciones": args.asignaciones,
+        "bytes": len(camino_model_dump_json(perfil)),
+        "caminos": {nombre: medir(fn, perfil, args.repeticiones) for nombre, fn in CAMINOS.items()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
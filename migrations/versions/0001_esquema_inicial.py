@@ -0,0 +1,99 @@
+"""esquema inicial
+
+Tablas tal como estaban antes de usar Alembic. En una base que ya existe
+no se corre: se marca con `alembic stamp 0001` y se sigue desde ahi.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "usuarios",
+        sa.Column("id_usuario", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("email", sa.String(100), nullable=False, unique=True),
+        sa.Column("contrasena_hash", sa.String(255), nullable=False),
+        sa.Column("tipo", sa.Enum("atleta", "entrenador", "administrador"), nullable=False),
+        sa.Column("fecha_registro", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("ultimo_login", sa.DateTime(), nullable=True),
+        sa.Column("activo", sa.Boolean()),
+    )
+    op.create_table(
+        "entrenadores",
+        sa.Column("id_entrenador", sa.Integer(), primary_key=True),
+        sa.Column("nombre", sa.String(100)),
+    )
+    op.create_index("ix_entrenadores_id_entrenador", "entrenadores", ["id_entrenador"])
+    op.create_table(
+        "perfiles_atletas",
+        sa.Column("id_atleta", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("id_usuario", sa.Integer(), sa.ForeignKey("usuarios.id_usuario"), nullable=False),
+        sa.Column("nombre_completo", sa.String(100), nullable=False),
+        sa.Column("fecha_nacimiento", sa.Date(), nullable=False),
+        sa.Column("altura", sa.DECIMAL(5, 2), nullable=True),
+        sa.Column("peso", sa.DECIMAL(5, 2), nullable=True),
+        sa.Column("deporte", sa.String(50), nullable=False),
+        sa.Column("id_entrenador", sa.Integer(), sa.ForeignKey("entrenadores.id_entrenador"), nullable=True),
+        sa.Column("frecuencia_cardiaca_maxima", sa.Integer(), nullable=True),
+        sa.Column("frecuencia_cardiaca_minima", sa.Integer(), nullable=True),
+    )
+    op.create_table(
+        "entrenamientos",
+        sa.Column("id_entrenamiento", sa.Integer(), primary_key=True),
+        sa.Column("id_entrenador", sa.Integer(), sa.ForeignKey("entrenadores.id_entrenador"), nullable=False),
+        sa.Column("titulo", sa.String(100), nullable=False),
+        sa.Column("descripcion", sa.Text()),
+        sa.Column("duracion_estimada", sa.Integer()),
+        sa.Column("fecha_creacion", sa.DateTime()),
+        sa.Column("nivel_dificultad", sa.Enum("principiante", "intermedio", "avanzado")),
+    )
+    op.create_index("ix_entrenamientos_id_entrenamiento", "entrenamientos", ["id_entrenamiento"])
+    op.create_table(
+        "perfiles_entrenadores",
+        sa.Column("id_entrenador", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("id_usuario", sa.Integer(), sa.ForeignKey("usuarios.id_usuario"), nullable=False),
+        sa.Column("nombre_completo", sa.String(100), nullable=False),
+        sa.Column("fecha_nacimiento", sa.Date(), nullable=True),
+        sa.Column("especialidad", sa.String(50), nullable=True),
+        sa.Column("experiencia", sa.Text(), nullable=True),
+    )
+    op.create_table(
+        "asignaciones_atletas",
+        sa.Column("id_asignacion", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "id_entrenamiento", sa.Integer(), sa.ForeignKey("entrenamientos.id_entrenamiento"), nullable=False
+        ),
+        sa.Column("id_atleta", sa.Integer(), sa.ForeignKey("perfiles_atletas.id_atleta"), nullable=False),
+        sa.Column("fecha_asignacion", sa.Date(), nullable=False),
+        sa.Column("fecha_completado", sa.Date(), nullable=True),
+        sa.Column("estado", sa.Enum("pendiente", "en_progreso", "completado"), nullable=False),
+        sa.Column("feedback", sa.Text(), nullable=True),
+        sa.Column("calificacion", sa.Integer(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("asignaciones_atletas")
+    op.drop_table("perfiles_entrenadores")
+    op.drop_index("ix_entrenamientos_id_entrenamiento", table_name="entrenamientos")
+    op.drop_table("entrenamientos")
+    op.drop_table("perfiles_atletas")
+    op.drop_index("ix_entrenadores_id_entrenador", table_name="entrenadores")
+    op.drop_table("entrenadores")
+    op.drop_table("usuarios")
@@ -0,0 +1,33 @@
+"""columnas version para ETags
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLAS = ("perfiles_atletas", "entrenamientos", "asignaciones_atletas")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for tabla in TABLAS:
+        op.add_column(tabla, sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabla in TABLAS:
+        with op.batch_alter_table(tabla) as batch:
+            batch.drop_column("version")
@@ -0,0 +1,58 @@
+"""indices para las busquedas de los routers
+
+Indices para cada filtro de las rutas: perfiles por id_usuario (unicos) y
+por id_entrenador, entrenamientos por (id_entrenador, fecha_creacion) y
+asignaciones por (id_atleta, estado) e id_entrenamiento. Falla si ya hay
+usuarios con mas de un perfil; hay que limpiarlos antes de migrar.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("perfiles_atletas") as batch:
+        batch.create_unique_constraint("uq_perfiles_atletas_id_usuario", ["id_usuario"])
+    with op.batch_alter_table("perfiles_entrenadores") as batch:
+        batch.create_unique_constraint("uq_perfiles_entrenadores_id_usuario", ["id_usuario"])
+
+    op.create_index("ix_perfiles_atletas_id_entrenador", "perfiles_atletas", ["id_entrenador"])
+    op.create_index("ix_entrenamientos_entrenador_fecha", "entrenamientos", ["id_entrenador", "fecha_creacion"])
+    op.create_index("ix_asignaciones_atleta_estado", "asignaciones_atletas", ["id_atleta", "estado"])
+    op.create_index("ix_asignaciones_id_entrenamiento", "asignaciones_atletas", ["id_entrenamiento"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name == "mysql":
+        # InnoDB exige un indice en cada FK y descarta el implicito cuando se crea
+        # uno que le sirva; se recrean los simples antes de quitar los nuestros
+        op.create_index("id_usuario", "perfiles_atletas", ["id_usuario"])
+        op.create_index("id_usuario", "perfiles_entrenadores", ["id_usuario"])
+        op.create_index("id_entrenador", "entrenamientos", ["id_entrenador"])
+        op.create_index("id_atleta", "asignaciones_atletas", ["id_atleta"])
+        op.create_index("id_entrenamiento", "asignaciones_atletas", ["id_entrenamiento"])
+        op.create_index("id_entrenador", "perfiles_atletas", ["id_entrenador"])
+
+    op.drop_index("ix_asignaciones_id_entrenamiento", table_name="asignaciones_atletas")
+    op.drop_index("ix_asignaciones_atleta_estado", table_name="asignaciones_atletas")
+    op.drop_index("ix_entrenamientos_entrenador_fecha", table_name="entrenamientos")
+    op.drop_index("ix_perfiles_atletas_id_entrenador", table_name="perfiles_atletas")
+
+    with op.batch_alter_table("perfiles_entrenadores") as batch:
+        batch.drop_constraint("uq_perfiles_entrenadores_id_usuario", type_="unique")
+    with op.batch_alter_table("perfiles_atletas") as batch:
+        batch.drop_constraint("uq_perfiles_atletas_id_usuario", type_="unique")
@@ -0,0 +1,64 @@
+"""tablas de resumen de asignaciones
+
+resumen_atletas y resumen_entrenadores con los contadores por estado, las
+calificaciones y la ultima fecha completada. Se rellenan aqui desde
+asignaciones_atletas; despues las mantiene app/aggregates.py.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:03
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CONTADORES = ("pendientes", "en_progreso", "completadas", "calificadas", "suma_calificaciones")
+
+AGREGADO = """
+    SUM(CASE WHEN a.estado = 'pendiente' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN a.estado = 'en_progreso' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN a.estado = 'completado' THEN 1 ELSE 0 END),
+    COUNT(a.calificacion),
+    COALESCE(SUM(a.calificacion), 0),
+    MAX(CASE WHEN a.estado = 'completado' THEN a.fecha_completado END)
+"""
+
+
+def _columnas(llave: str, referencia: str):
+    return [
+        sa.Column(llave, sa.Integer(), sa.ForeignKey(referencia), primary_key=True, autoincrement=False),
+        *(sa.Column(c, sa.Integer(), nullable=False, server_default="0") for c in CONTADORES),
+        sa.Column("ultima_completada", sa.Date(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table("resumen_atletas", *_columnas("id_atleta", "perfiles_atletas.id_atleta"))
+    op.create_table("resumen_entrenadores", *_columnas("id_entrenador", "entrenadores.id_entrenador"))
+
+    columnas = ", ".join((*CONTADORES, "ultima_completada"))
+    op.execute(
+        f"INSERT INTO resumen_atletas (id_atleta, {columnas}) "
+        f"SELECT a.id_atleta, {AGREGADO} FROM asignaciones_atletas a GROUP BY a.id_atleta"
+    )
+    op.execute(
+        f"INSERT INTO resumen_entrenadores (id_entrenador, {columnas}) "
+        f"SELECT e.id_entrenador, {AGREGADO} FROM asignaciones_atletas a "
+        "JOIN entrenamientos e ON e.id_entrenamiento = a.id_entrenamiento GROUP BY e.id_entrenador"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("resumen_entrenadores")
+    op.drop_table("resumen_atletas")
@@ -0,0 +1,130 @@
+"""zonas de frecuencia cardiaca precalculadas
+
+Agrega perfiles_atletas.zonas_frecuencia (JSON) y
+frecuencia_cardiaca_maxima_manual. Una maxima que no coincide con la que
+calculaba el registro (220 - edad al registrarse) la edito el atleta y queda
+como manual; el resto se re-estima con la edad de hoy y se rellenan las zonas.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:04
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+atletas = sa.table(
+    "perfiles_atletas",
+    sa.column("id_atleta", sa.Integer),
+    sa.column("id_usuario", sa.Integer),
+    sa.column("fecha_nacimiento", sa.Date),
+    sa.column("frecuencia_cardiaca_minima", sa.Integer),
+    sa.column("frecuencia_cardiaca_maxima", sa.Integer),
+    sa.column("frecuencia_cardiaca_maxima_manual", sa.Boolean),
+    sa.column("zonas_frecuencia", sa.JSON(none_as_null=True)),
+)
+usuarios = sa.table("usuarios", sa.column("id_usuario", sa.Integer), sa.column("fecha_registro", sa.DateTime))
+
+# Copia congelada del calculo de app.heart_rate al momento de esta revision: la
+# migracion no importa la app, asi sigue dando lo mismo aunque el codigo cambie
+LIMITES_ZONAS = (0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+LOTE = 1000
+
+
+def _maxima_estimada(fecha_nacimiento: date, hoy: date) -> int:
+    edad = hoy.year - fecha_nacimiento.year - ((hoy.month, hoy.day) < (fecha_nacimiento.month, fecha_nacimiento.day))
+    return 220 - edad
+
+
+def _zonas(reposo, maxima):
+    if reposo is None or maxima is None or maxima <= reposo:
+        return None
+    limites = [round(reposo + p * (maxima - reposo)) for p in LIMITES_ZONAS]
+    return [{"zona": i + 1, "minima": limites[i], "maxima": limites[i + 1]} for i in range(len(limites) - 1)]
+
+
+def _rellenar(conn) -> None:
+    """Maxima por edad (salvo las manuales) y zonas para todos, en lotes por id"""
+    hoy = date.today()
+    leer = (
+        sa.select(
+            atletas.c.id_atleta,
+            atletas.c.fecha_nacimiento,
+            atletas.c.frecuencia_cardiaca_minima,
+            atletas.c.frecuencia_cardiaca_maxima,
+            atletas.c.frecuencia_cardiaca_maxima_manual,
+        )
+        .where(atletas.c.id_atleta > sa.bindparam("desde"))
+        .order_by(atletas.c.id_atleta)
+        .limit(LOTE)
+    )
+    escribir = (
+        atletas.update()
+        .where(atletas.c.id_atleta == sa.bindparam("b_id"))
+        .values(
+            frecuencia_cardiaca_maxima=sa.bindparam("b_maxima"),
+            zonas_frecuencia=sa.bindparam("b_zonas", type_=atletas.c.zonas_frecuencia.type),
+        )
+    )
+    desde = 0
+    while True:
+        filas = conn.execute(leer, {"desde": desde}).all()
+        if not filas:
+            break
+        desde = filas[-1].id_atleta
+        cambios = []
+        for f in filas:
+            maxima = f.frecuencia_cardiaca_maxima
+            if not f.frecuencia_cardiaca_maxima_manual and f.fecha_nacimiento is not None:
+                maxima = _maxima_estimada(f.fecha_nacimiento, hoy)
+            cambios.append({"b_id": f.id_atleta, "b_maxima": maxima, "b_zonas": _zonas(f.frecuencia_cardiaca_minima, maxima)})
+        conn.execute(escribir, cambios)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "perfiles_atletas",
+        sa.Column("frecuencia_cardiaca_maxima_manual", sa.Boolean(), nullable=False, server_default="0"),
+    )
+    op.add_column("perfiles_atletas", sa.Column("zonas_frecuencia", sa.JSON(none_as_null=True), nullable=True))
+
+    conn = op.get_bind()
+    filas = conn.execute(
+        sa.select(atletas.c.id_atleta, atletas.c.fecha_nacimiento, atletas.c.frecuencia_cardiaca_maxima, usuarios.c.fecha_registro)
+        .join(usuarios, usuarios.c.id_usuario == atletas.c.id_usuario)
+        .where(atletas.c.frecuencia_cardiaca_maxima.isnot(None))
+    )
+    manuales = [
+        {"b_id": f.id_atleta}
+        for f in filas
+        # Misma cuenta que hacia crear_perfil_atleta el dia del registro
+        if f.fecha_registro is None
+        or f.frecuencia_cardiaca_maxima != 220 - (f.fecha_registro.date() - f.fecha_nacimiento).days // 365
+    ]
+    if manuales:
+        conn.execute(
+            atletas.update()
+            .where(atletas.c.id_atleta == sa.bindparam("b_id"))
+            .values(frecuencia_cardiaca_maxima_manual=True),
+            manuales,
+        )
+
+    _rellenar(conn)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("perfiles_atletas") as batch:
+        batch.drop_column("zonas_frecuencia")
+        batch.drop_column("frecuencia_cardiaca_maxima_manual")
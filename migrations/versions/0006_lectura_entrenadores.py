@@ -0,0 +1,92 @@
+"""modelo de lectura de coaches
+
+Crea lectura_entrenadores (identidad + perfil + conteos de atletas y
+entrenamientos). Antes, el registro de un coach solo creaba su fila en
+perfiles_entrenadores; desde aqui cada perfil tiene su fila en entrenadores
+con el mismo id, amarrada con una FK. Si el id del perfil esta libre en
+entrenadores se crea ahi. Si ya lo ocupa una fila cargada aparte no hay como
+saber si es el mismo coach: el perfil pasa a una fila nueva y la vieja se
+queda con sus atletas y entrenamientos (se listan en el log para revisarlos).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:05
+
+"""
+from typing import Sequence, Union
+
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "lectura_entrenadores",
+        sa.Column("id_entrenador", sa.Integer(), sa.ForeignKey("entrenadores.id_entrenador"),
+                  primary_key=True, autoincrement=False),
+        sa.Column("id_usuario", sa.Integer(), nullable=True),
+        sa.Column("nombre_completo", sa.String(100), nullable=True),
+        sa.Column("especialidad", sa.String(50), nullable=True),
+        sa.Column("atletas", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("entrenamientos", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    conn = op.get_bind()
+    # Perfiles cuyo id ya estaba en entrenadores antes de crear las filas que faltan
+    ocupados = conn.execute(sa.text(
+        "SELECT p.id_entrenador, p.nombre_completo FROM perfiles_entrenadores p "
+        "JOIN entrenadores e ON e.id_entrenador = p.id_entrenador ORDER BY p.id_entrenador"
+    )).all()
+    op.execute(
+        "INSERT INTO entrenadores (id_entrenador, nombre) "
+        "SELECT p.id_entrenador, p.nombre_completo FROM perfiles_entrenadores p "
+        "WHERE NOT EXISTS (SELECT 1 FROM entrenadores e WHERE e.id_entrenador = p.id_entrenador)"
+    )
+    # Ahora todos los ids de perfil estan en entrenadores: el autoincremental da ids que ningun perfil usa
+    entrenadores = sa.Table(
+        "entrenadores", sa.MetaData(),
+        sa.Column("id_entrenador", sa.Integer, primary_key=True), sa.Column("nombre", sa.String(100)),
+    )
+    for id_viejo, nombre in ocupados:
+        id_nuevo = conn.execute(sa.insert(entrenadores).values(nombre=nombre)).inserted_primary_key[0]
+        conn.execute(
+            sa.text("UPDATE perfiles_entrenadores SET id_entrenador = :nuevo WHERE id_entrenador = :viejo"),
+            {"nuevo": id_nuevo, "viejo": id_viejo},
+        )
+        logger.warning("perfil de entrenador %s pasa a entrenadores.id_entrenador=%s: el %s ya existia",
+                       id_viejo, id_nuevo, id_viejo)
+
+    with op.batch_alter_table("perfiles_entrenadores") as batch:
+        batch.create_foreign_key(
+            "fk_perfiles_entrenadores_id_entrenador", "entrenadores", ["id_entrenador"], ["id_entrenador"]
+        )
+
+    op.execute(
+        "INSERT INTO lectura_entrenadores "
+        "(id_entrenador, id_usuario, nombre_completo, especialidad, atletas, entrenamientos) "
+        "SELECT e.id_entrenador, p.id_usuario, COALESCE(p.nombre_completo, e.nombre), p.especialidad, "
+        "(SELECT COUNT(*) FROM perfiles_atletas a WHERE a.id_entrenador = e.id_entrenador), "
+        "(SELECT COUNT(*) FROM entrenamientos t WHERE t.id_entrenador = e.id_entrenador) "
+        "FROM entrenadores e LEFT JOIN perfiles_entrenadores p ON p.id_entrenador = e.id_entrenador"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Las filas agregadas a entrenadores (y los perfiles movidos) se quedan:
+    # las pueden referenciar atletas y entrenamientos
+    with op.batch_alter_table("perfiles_entrenadores") as batch:
+        batch.drop_constraint("fk_perfiles_entrenadores_id_entrenador", type_="foreignkey")
+    op.drop_table("lectura_entrenadores")
@@ -0,0 +1,47 @@
+"""indices de los listados de asignaciones
+
+Los listados filtrados de asignaciones (por atleta y por coach) ordenan por
+fecha_asignacion. Se agregan (id_atleta, fecha_asignacion) y se extienden
+(id_atleta, estado) e (id_entrenamiento) con fecha_asignacion; los viejos
+quedan cubiertos por el prefijo de los nuevos y se borran.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:06
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Primero los nuevos: en MySQL las FK siempre tienen que tener un indice que les sirva
+    op.create_index("ix_asignaciones_atleta_fecha", "asignaciones_atletas", ["id_atleta", "fecha_asignacion"])
+    op.create_index(
+        "ix_asignaciones_atleta_estado_fecha", "asignaciones_atletas", ["id_atleta", "estado", "fecha_asignacion"]
+    )
+    op.create_index(
+        "ix_asignaciones_entrenamiento_estado_fecha",
+        "asignaciones_atletas",
+        ["id_entrenamiento", "estado", "fecha_asignacion"],
+    )
+    op.drop_index("ix_asignaciones_atleta_estado", table_name="asignaciones_atletas")
+    op.drop_index("ix_asignaciones_id_entrenamiento", table_name="asignaciones_atletas")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index("ix_asignaciones_atleta_estado", "asignaciones_atletas", ["id_atleta", "estado"])
+    op.create_index("ix_asignaciones_id_entrenamiento", "asignaciones_atletas", ["id_entrenamiento"])
+    op.drop_index("ix_asignaciones_entrenamiento_estado_fecha", table_name="asignaciones_atletas")
+    op.drop_index("ix_asignaciones_atleta_estado_fecha", table_name="asignaciones_atletas")
+    op.drop_index("ix_asignaciones_atleta_fecha", table_name="asignaciones_atletas")
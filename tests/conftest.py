@@ -0,0 +1,22 @@
+import os
+import tempfile
+
+# app.db, app.cache y app.security leen su configuracion al importarse: se fija antes
+_DIR = tempfile.mkdtemp(prefix="apipi-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DIR}/tests.db"
+os.environ["DB_ASYNC"] = "0"
+os.environ["CACHE_BACKEND"] = "none"
+os.environ["HASH_WORKERS"] = "0"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ.setdefault("JWT_SECRET", "tests")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from app import db, models  # noqa: F401
+
+    db.Base.metadata.create_all(db.engine)
+    yield db.engine
+    db.engine.dispose()
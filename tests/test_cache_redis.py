@@ -0,0 +1,130 @@
+"""RedisCache contra un servidor falso en proceso (mismo API que redis.asyncio)."""
+import asyncio
+
+import pytest
+
+from app.cache import CACHE_TTL, RedisCache
+
+
+class RedisFalso:
+    """get/set(ex=)/delete con expiracion sobre un reloj que mueve el test"""
+
+    def __init__(self):
+        self.datos = {}
+        self.ttls = {}
+        self.ahora = 0.0
+        self.caido = False
+
+    def _revisar(self):
+        if self.caido:
+            raise ConnectionError("Connection refused")
+
+    async def get(self, clave):
+        self._revisar()
+        valor, expira = self.datos.get(clave, (None, None))
+        if expira is not None and expira <= self.ahora:
+            del self.datos[clave]
+            return None
+        return valor
+
+    async def set(self, clave, valor, ex=None):
+        self._revisar()
+        self.datos[clave] = (valor.encode(), None if ex is None else self.ahora + ex)
+        self.ttls[clave] = ex
+
+    async def delete(self, *claves):
+        self._revisar()
+        return sum(self.datos.pop(c, None) is not None for c in claves)
+
+
+def correr(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def servidor():
+    return RedisFalso()
+
+
+def test_get_set_ttl(servidor):
+    cache = RedisCache(cliente=servidor, prefijo="t:")
+
+    assert correr(cache.get("a")) is None
+    correr(cache.set("a", {"x": [1, 2]}))
+    correr(cache.set("b", 1, ttl=5))
+
+    assert correr(cache.get("a")) == {"x": [1, 2]}
+    assert servidor.ttls == {"t:a": CACHE_TTL, "t:b": 5}
+    servidor.ahora += 5
+    assert correr(cache.get("b")) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_invalidacion_con_prefijo(servidor):
+    cache = RedisCache(cliente=servidor, prefijo="t:")
+    otra = RedisCache(cliente=servidor, prefijo="otra:")
+    correr(cache.set("coach_dashboard:1", 1))
+    correr(cache.set("coach_dashboard:2", 2))
+    correr(otra.set("coach_dashboard:1", 3))
+
+    correr(cache.delete("coach_dashboard:1", None))
+
+    assert correr(cache.get("coach_dashboard:1")) is None
+    assert correr(cache.get("coach_dashboard:2")) == 2
+    # Otro despliegue sobre el mismo servidor no se entera
+    assert correr(otra.get("coach_dashboard:1")) == 3
+    assert set(servidor.datos) == {"t:coach_dashboard:2", "otra:coach_dashboard:1"}
+    assert cache.stats()["invalidaciones"] == 1
+
+
+def test_servidor_caido_es_miss(servidor, caplog):
+    cache = RedisCache(cliente=servidor, prefijo="t:")
+    correr(cache.set("a", 1))
+    servidor.caido = True
+
+    assert correr(cache.get("a")) is None
+    correr(cache.set("a", 2))
+    correr(cache.delete("a"))
+    assert cache.stats()["fallos"] == 3 and cache.stats()["caido"]
+    assert cache.stats()["pendientes"] == 1
+    assert sum("no responde" in r.message for r in caplog.records) == 1
+
+    # La invalidacion que fallo se aplica al volver: nada de leer el 1 de antes
+    servidor.caido = False
+    assert correr(cache.get("a")) is None
+    assert "t:a" not in servidor.datos
+    assert not cache.stats()["caido"] and cache.stats()["pendientes"] == 0
+    correr(cache.set("a", 3))
+    assert correr(cache.get("a")) == 3
+
+
+def test_invalidacion_perdida_se_reintenta_para_los_demas_workers(servidor):
+    # Otro proceso sobre el mismo Redis no sabe que este no pudo borrar
+    este = RedisCache(cliente=servidor, prefijo="t:", reintento=0.01)
+    otro = RedisCache(cliente=servidor, prefijo="t:")
+
+    async def escenario():
+        await este.set("coach_dashboard:1", "viejo")
+        servidor.caido = True
+        await este.delete("coach_dashboard:1")
+        await asyncio.sleep(0.03)
+        servidor.caido = False
+        await asyncio.sleep(0.05)
+        return await otro.get("coach_dashboard:1")
+
+    assert correr(escenario()) is None
+    assert este.stats()["pendientes"] == 0
+
+
+def test_backend_incompleto_falla_al_crearse():
+    from app.cache import CacheBackend
+
+    class SinDelete(CacheBackend):
+        async def _get(self, clave):
+            return None
+
+        async def _set(self, clave, valor, ttl):
+            pass
+
+    with pytest.raises(TypeError):
+        SinDelete()
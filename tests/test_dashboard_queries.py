@@ -0,0 +1,54 @@
+"""GET /atletas/perfil/{id} hace las mismas queries con 1 asignacion que con cientos."""
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+from app import models
+from benchmarks.datos import sembrar
+
+# Perfil + usuario en un JOIN y asignaciones + entrenamientos en un SELECT ... IN
+QUERIES_PERFIL = 2
+
+
+@pytest.fixture(scope="module")
+def cliente(engine):
+    sembrar(engine, coaches=1, atletas=2, entrenamientos=300, asignaciones=0)
+    with engine.begin() as conn:
+        conn.execute(insert(models.AsignacionAtleta), [
+            {"id_entrenamiento": 1, "id_atleta": 1, "fecha_asignacion": date(2024, 1, 1), "estado": "pendiente"},
+            *({"id_entrenamiento": i, "id_atleta": 2, "fecha_asignacion": date(2024, 1, 1), "estado": "pendiente"}
+              for i in range(1, 301)),
+        ])
+
+    from app.main import app
+
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+@pytest.fixture
+def sentencias(engine):
+    ejecutadas = []
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        ejecutadas.append(statement)
+
+    event.listen(engine, "before_cursor_execute", contar)
+    yield ejecutadas
+    event.remove(engine, "before_cursor_execute", contar)
+
+
+@pytest.mark.parametrize("id_atleta, asignaciones", [(1, 1), (2, 300)])
+def test_perfil_atleta_queries_fijas(cliente, sentencias, id_atleta, asignaciones):
+    r = cliente.get(f"/atletas/perfil/{id_atleta}")
+
+    assert r.status_code == 200
+    assert len(r.json()["asignaciones"]) == asignaciones
+    assert len(sentencias) == QUERIES_PERFIL, sentencias
+
+
+def test_perfil_atleta_inexistente(cliente, sentencias):
+    assert cliente.get("/atletas/perfil/999").status_code == 404
+    assert len(sentencias) == 1
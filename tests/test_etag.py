@@ -0,0 +1,58 @@
+"""ETags de los dashboards: cambiar el roster cambia el ETag aunque las sumas den igual."""
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+@pytest.fixture(scope="module")
+def cliente(engine):
+    from app.main import app
+
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+def test_etag_coach_cambia_si_cambia_el_roster(cliente, engine):
+    with Session(engine) as db:
+        usuario = models.Usuario(email="etag.coach@tests.example.com", contrasena_hash="x", tipo="entrenador")
+        entrenador = models.Entrenador(nombre="Coach ETag")
+        otro = models.Entrenador(nombre="Otro ETag")
+        db.add_all([usuario, entrenador, otro])
+        db.flush()
+        db.add(models.PerfilEntrenador(id_entrenador=entrenador.id_entrenador, id_usuario=usuario.id_usuario,
+                                       nombre_completo="Coach ETag"))
+        atletas = []
+        for n in range(4):
+            u = models.Usuario(email=f"etag.atleta{n}@tests.example.com", contrasena_hash="x", tipo="atleta")
+            db.add(u)
+            db.flush()
+            a = models.PerfilAtleta(id_usuario=u.id_usuario, nombre_completo=f"ETag {n}", fecha_nacimiento=date(2000, 1, 1),
+                                    deporte="running", id_entrenador=otro.id_entrenador)
+            db.add(a)
+            atletas.append(a)
+        db.commit()
+        ids = [a.id_atleta for a in atletas]
+        id_usuario, id_entrenador, id_otro = usuario.id_usuario, entrenador.id_entrenador, otro.id_entrenador
+
+    def roster(*en_el_roster):
+        # Misma version para todos: solo cambia quienes estan
+        with engine.begin() as conn:
+            for id_atleta in ids:
+                coach = id_entrenador if id_atleta in en_el_roster else id_otro
+                conn.execute(update(models.PerfilAtleta).where(models.PerfilAtleta.id_atleta == id_atleta)
+                             .values(id_entrenador=coach, version=7))
+        r = cliente.get(f"/coaches/{id_usuario}")
+        assert r.status_code == 200
+        return r.headers["etag"]
+
+    # {1,4} y {2,3}: mismo conteo, misma suma de ids y de versiones
+    antes = roster(ids[0], ids[3])
+    assert cliente.get(f"/coaches/{id_usuario}", headers={"If-None-Match": antes}).status_code == 304
+    despues = roster(ids[1], ids[2])
+    assert despues != antes
+    assert cliente.get(f"/coaches/{id_usuario}", headers={"If-None-Match": antes}).status_code == 200
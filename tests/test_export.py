@@ -0,0 +1,32 @@
+"""Exportacion CSV: las columnas JSON salen como JSON, no como repr de Python."""
+import csv
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+from app.security import crear_tokens
+
+
+def test_csv_zonas_frecuencia_en_json(engine):
+    from app.main import app
+
+    with TestClient(app) as cliente:
+        r = cliente.post("/registro/", json={
+            "email": "export.csv@tests.example.com",
+            "contrasena": "secreta",
+            "tipo": "atleta",
+            "nombre_completo": "Atleta Export CSV",
+            "fecha_nacimiento": "1990-06-01",
+            "deporte": "running",
+            "frecuencia_cardiaca_minima": 60,
+        })
+        assert r.status_code == 201
+
+        token = crear_tokens(0, "administrador", None)["access_token"]
+        r = cliente.get("/export/atletas?formato=csv", headers={"Authorization": "Bearer " + token})
+
+    assert r.status_code == 200
+    fila = next(f for f in csv.DictReader(io.StringIO(r.text)) if f["nombre_completo"] == "Atleta Export CSV")
+    zonas = json.loads(fila["zonas_frecuencia"])
+    assert zonas and isinstance(zonas, (dict, list))
@@ -0,0 +1,95 @@
+"""Maxima estimada vs manual al editar el perfil, y el job que la recalcula."""
+from datetime import date
+
+from sqlalchemy import select
+
+from app import models
+from app.heart_rate import aplicar_a_perfil, fc_maxima_estimada, refrescar, zonas_karvonen
+from app.models import PerfilAtleta
+from app.schemas import AtletaUpdateSchema
+
+NACIMIENTO = date(1990, 6, 1)
+
+
+def perfil(maxima: int, manual: bool = False) -> PerfilAtleta:
+    return PerfilAtleta(fecha_nacimiento=NACIMIENTO, frecuencia_cardiaca_minima=60,
+                        frecuencia_cardiaca_maxima=maxima, frecuencia_cardiaca_maxima_manual=manual)
+
+
+def test_edicion_parcial():
+    assert AtletaUpdateSchema(peso=70).model_dump(exclude_unset=True) == {"peso": 70}
+
+
+def test_devolver_la_estimada_del_ano_pasado_no_la_vuelve_manual():
+    # GET del perfil antes del cumpleaños y PUT entero despues, antes de que corra el job
+    estimada = fc_maxima_estimada(NACIMIENTO)
+    p = perfil(estimada + 1)
+
+    aplicar_a_perfil(p, {"peso": 71, "frecuencia_cardiaca_maxima": estimada + 1})
+
+    assert not p.frecuencia_cardiaca_maxima_manual
+    assert p.frecuencia_cardiaca_maxima == estimada
+
+
+def test_maxima_distinta_queda_manual_y_null_la_devuelve_al_calculo():
+    estimada = fc_maxima_estimada(NACIMIENTO)
+    p = perfil(estimada)
+
+    aplicar_a_perfil(p, {"frecuencia_cardiaca_maxima": 201})
+    assert (p.frecuencia_cardiaca_maxima, p.frecuencia_cardiaca_maxima_manual) == (201, True)
+    assert p.zonas_frecuencia[-1]["maxima"] == 201
+
+    # Ya manual, mandar la misma otra vez la deja como esta
+    aplicar_a_perfil(p, {"frecuencia_cardiaca_maxima": 201})
+    assert (p.frecuencia_cardiaca_maxima, p.frecuencia_cardiaca_maxima_manual) == (201, True)
+
+    aplicar_a_perfil(p, {"frecuencia_cardiaca_maxima": None})
+    assert (p.frecuencia_cardiaca_maxima, p.frecuencia_cardiaca_maxima_manual) == (estimada, False)
+
+
+def test_mandar_la_estimada_no_la_vuelve_manual():
+    p = perfil(190, manual=True)
+
+    aplicar_a_perfil(p, {"frecuencia_cardiaca_maxima": fc_maxima_estimada(NACIMIENTO)})
+    assert (p.frecuencia_cardiaca_maxima, p.frecuencia_cardiaca_maxima_manual) == (fc_maxima_estimada(NACIMIENTO), False)
+
+
+def test_el_job_recalcula_las_estimadas_y_no_toca_las_manuales(engine):
+    hoy = date(2026, 6, 2)  # un dia despues del cumpleaños: la estimada guardada quedo vieja
+    vieja = fc_maxima_estimada(NACIMIENTO, date(2026, 5, 31))
+
+    with engine.connect() as conn:
+        # Todo en una transaccion que se descarta: el job recorre la tabla entera
+        with conn.begin() as transaccion:
+            ids = {}
+            for nombre, maxima, manual in (("estimada", vieja, False), ("manual", 201, True)):
+                id_usuario = conn.execute(models.Usuario.__table__.insert().values(
+                    email=f"fc.job.{nombre}@tests.example.com", contrasena_hash="x", tipo="atleta",
+                )).inserted_primary_key[0]
+                ids[nombre] = conn.execute(PerfilAtleta.__table__.insert().values(
+                    id_usuario=id_usuario, nombre_completo=f"FC {nombre}", fecha_nacimiento=NACIMIENTO,
+                    deporte="running", frecuencia_cardiaca_minima=60, frecuencia_cardiaca_maxima=maxima,
+                    frecuencia_cardiaca_maxima_manual=manual, zonas_frecuencia=zonas_karvonen(60, maxima),
+                )).inserted_primary_key[0]
+
+            def leer(nombre):
+                t = PerfilAtleta.__table__
+                return conn.execute(
+                    select(t.c.id_usuario, t.c.frecuencia_cardiaca_maxima, t.c.zonas_frecuencia).where(t.c.id_atleta == ids[nombre])
+                ).one()
+
+            manual_antes = leer("manual")
+            resultado = refrescar(conn, lote=2, hoy=hoy)
+
+            estimada = leer("estimada")
+            assert estimada.frecuencia_cardiaca_maxima == fc_maxima_estimada(NACIMIENTO, hoy) == vieja - 1
+            assert estimada.zonas_frecuencia == zonas_karvonen(60, vieja - 1)
+            assert estimada.id_usuario in resultado["id_usuarios"]
+
+            assert leer("manual") == manual_antes
+            assert manual_antes.id_usuario not in resultado["id_usuarios"]
+
+            # Otra pasada el mismo dia no tiene nada que escribir para estos dos
+            otra = refrescar(conn, lote=2, hoy=hoy)
+            assert not {estimada.id_usuario, manual_antes.id_usuario} & set(otra["id_usuarios"])
+            transaccion.rollback()
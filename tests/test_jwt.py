@@ -0,0 +1,110 @@
+"""Login, refresh y require_tipo con JWT."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app import models, security
+from app.security import crear_token, crear_tokens, decodificar_token
+
+
+@pytest.fixture(scope="module")
+def cliente(engine):
+    from app.main import app
+
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+@pytest.fixture
+def atleta(cliente):
+    """Atleta nuevo por test: (email, id_usuario, id_atleta)"""
+    atleta.n = getattr(atleta, "n", 0) + 1
+    email = f"auth.atleta{atleta.n}@tests.example.com"
+    r = cliente.post("/registro/", json={"email": email, "contrasena": "secreta", "tipo": "atleta",
+                                         "nombre_completo": "Atleta auth", "fecha_nacimiento": "2000-01-01",
+                                         "deporte": "running"})
+    assert r.status_code == 201
+    login = cliente.post("/auth/login", json={"email": email, "password": "secreta"}).json()
+    return email, login["usuario"]["id_usuario"], login["usuario"]["id_perfil"]
+
+
+def dar_de_baja(engine, id_usuario: int):
+    with Session(engine) as db:
+        db.execute(update(models.Usuario).where(models.Usuario.id_usuario == id_usuario).values(activo=False))
+        db.commit()
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": "Bearer " + token}
+
+
+def test_login_devuelve_el_perfil_en_el_token(cliente, atleta):
+    email, id_usuario, id_atleta = atleta
+    r = cliente.post("/auth/login", json={"email": email, "password": "secreta"})
+    assert r.status_code == 200
+    token = decodificar_token(r.json()["access_token"])
+    assert (token.id_usuario, token.tipo, token.id_perfil) == (id_usuario, "atleta", id_atleta)
+
+    assert cliente.post("/auth/login", json={"email": email, "password": "otra"}).status_code == 401
+
+
+def test_login_rechaza_usuarios_inactivos(cliente, engine, atleta):
+    # El fixture ya hizo login: la credencial esta en el cache y aun asi no entra
+    email, id_usuario, _ = atleta
+    dar_de_baja(engine, id_usuario)
+
+    r = cliente.post("/auth/login", json={"email": email, "password": "secreta"})
+    assert (r.status_code, r.json()["detail"]) == (403, "Usuario inactivo")
+    # Con la contraseña equivocada no se entera de que la cuenta existe dada de baja
+    assert cliente.post("/auth/login", json={"email": email, "password": "otra"}).status_code == 401
+
+
+def test_token_expirado(cliente, atleta, monkeypatch):
+    _, id_usuario, id_atleta = atleta
+    monkeypatch.setattr(security, "ACCESS_TOKEN_TTL", -1)
+
+    r = cliente.get("/atletas/perfil/me", headers=bearer(crear_token(id_usuario, "atleta", id_atleta, "access")))
+    assert (r.status_code, r.json()["detail"]) == (401, "Token expirado")
+
+
+def test_tipo_de_token_equivocado(cliente, atleta):
+    _, id_usuario, id_atleta = atleta
+    tokens = crear_tokens(id_usuario, "atleta", id_atleta)
+
+    r = cliente.get("/atletas/perfil/me", headers=bearer(tokens["refresh_token"]))
+    assert (r.status_code, r.json()["detail"]) == (401, "Tipo de token inválido")
+    r = cliente.post("/auth/refresh", json={"refresh_token": tokens["access_token"]})
+    assert (r.status_code, r.json()["detail"]) == (401, "Tipo de token inválido")
+
+
+def test_require_tipo(cliente, atleta):
+    _, id_usuario, id_atleta = atleta
+    tokens = crear_tokens(id_usuario, "atleta", id_atleta)
+
+    assert cliente.get("/coaches/me").status_code == 401
+    assert cliente.get("/coaches/me", headers=bearer(tokens["access_token"])).status_code == 403
+    assert cliente.get("/atletas/perfil/me", headers=bearer(tokens["access_token"])).status_code == 200
+
+
+def test_refresh_toma_tipo_y_perfil_de_la_base(cliente, atleta):
+    _, id_usuario, id_atleta = atleta
+    # Claims viejos o inventados en el refresh no pasan al par nuevo
+    viejo = crear_token(id_usuario, "administrador", None, "refresh")
+
+    r = cliente.post("/auth/refresh", json={"refresh_token": viejo})
+    assert r.status_code == 200
+    token = decodificar_token(r.json()["access_token"])
+    assert (token.id_usuario, token.tipo, token.id_perfil) == (id_usuario, "atleta", id_atleta)
+
+
+def test_refresh_reusado_despues_de_la_baja(cliente, engine, atleta):
+    _, id_usuario, id_atleta = atleta
+    refresh = crear_tokens(id_usuario, "atleta", id_atleta)["refresh_token"]
+    assert cliente.post("/auth/refresh", json={"refresh_token": refresh}).status_code == 200
+
+    dar_de_baja(engine, id_usuario)
+    assert cliente.post("/auth/refresh", json={"refresh_token": refresh}).status_code == 401
+    # Un usuario que no existe tampoco renueva
+    huerfano = crear_token(10 ** 9, "atleta", id_atleta, "refresh")
+    assert cliente.post("/auth/refresh", json={"refresh_token": huerfano}).status_code == 401
@@ -0,0 +1,95 @@
+"""Keyset con cursor opaco sobre columnas nullable: recorrer todas las paginas da el listado entero."""
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import models
+from app.pagination import codificar_cursor, decodificar_cursor
+from app.security import crear_tokens
+
+ADMIN = {"Authorization": "Bearer " + crear_tokens(0, "administrador", None)["access_token"]}
+
+# (calificacion, fecha_completado): valores repetidos y NULL en las dos columnas
+ASIGNACIONES = [
+    (None, None), (4, date(2026, 3, 2)), (None, None), (2, date(2026, 3, 1)), (4, date(2026, 3, 2)),
+    (None, None), (5, date(2026, 2, 20)), (2, None), (None, date(2026, 3, 9)),
+]
+
+
+@pytest.fixture(scope="module")
+def id_atleta(engine):
+    with Session(engine) as db:
+        usuario = models.Usuario(email="paginacion.atleta@tests.example.com", contrasena_hash="x", tipo="atleta")
+        entrenador = models.Entrenador(nombre="Coach paginacion")
+        db.add_all([usuario, entrenador])
+        db.flush()
+        atleta = models.PerfilAtleta(id_usuario=usuario.id_usuario, nombre_completo="Atleta paginacion",
+                                     fecha_nacimiento=date(2000, 1, 1), deporte="running",
+                                     id_entrenador=entrenador.id_entrenador)
+        entrenamiento = models.Entrenamiento(id_entrenador=entrenador.id_entrenador, titulo="Series")
+        db.add_all([atleta, entrenamiento])
+        db.flush()
+        db.add_all([
+            models.AsignacionAtleta(id_atleta=atleta.id_atleta, id_entrenamiento=entrenamiento.id_entrenamiento,
+                                    fecha_asignacion=date(2026, 1, 1), estado="completado" if fecha else "pendiente",
+                                    calificacion=calificacion, fecha_completado=fecha)
+            for calificacion, fecha in ASIGNACIONES
+        ])
+        db.commit()
+        return atleta.id_atleta
+
+
+@pytest.fixture(scope="module")
+def cliente(engine):
+    from app.main import app
+
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+def recorrer(cliente, id_atleta: int, orden: str, limit: int) -> list:
+    vistos, cursor = [], None
+    for _ in range(len(ASIGNACIONES) + 1):
+        params = {"orden": orden, "limit": limit, **({"cursor": cursor} if cursor else {})}
+        r = cliente.get(f"/atletas/{id_atleta}/asignaciones", params=params, headers=ADMIN)
+        assert r.status_code == 200
+        vistos += r.json()
+        cursor = r.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return vistos
+    pytest.fail("el cursor no termina")
+
+
+@pytest.mark.parametrize("orden", ["calificacion", "-calificacion", "fecha_completado", "-fecha_completado"])
+@pytest.mark.parametrize("limit", [1, 2, 4])
+def test_las_paginas_cubren_todo_con_null_al_final(cliente, id_atleta, orden, limit):
+    campo = orden.lstrip("-")
+    todo = recorrer(cliente, id_atleta, orden, len(ASIGNACIONES))
+    paginado = recorrer(cliente, id_atleta, orden, limit)
+
+    # Sin repetidos ni saltos, en el mismo orden que de una sola vez
+    assert [a["id_asignacion"] for a in paginado] == [a["id_asignacion"] for a in todo]
+    assert len(paginado) == len(ASIGNACIONES)
+
+    # Valores ordenados en el sentido pedido (desempate por id) y los NULL al final en los dos sentidos
+    valores = [a[campo] for a in paginado]
+    con_valor = [v for v in valores if v is not None]
+    assert valores == con_valor + [None] * (len(valores) - len(con_valor))
+    assert con_valor == sorted(con_valor, reverse=orden.startswith("-"))
+    for a, b in zip(paginado, paginado[1:]):
+        if a[campo] == b[campo]:
+            assert (a["id_asignacion"] > b["id_asignacion"]) == orden.startswith("-")
+
+
+def test_cursor_ida_y_vuelta():
+    columna = models.AsignacionAtleta.fecha_completado
+    assert decodificar_cursor(codificar_cursor(date(2026, 3, 2), 7), columna) == (date(2026, 3, 2), 7)
+    assert decodificar_cursor(codificar_cursor(None, 8), columna) == (None, 8)
+    assert decodificar_cursor(codificar_cursor(4, 9), models.AsignacionAtleta.calificacion) == (4, 9)
+
+
+def test_cursor_roto(cliente, id_atleta):
+    r = cliente.get(f"/atletas/{id_atleta}/asignaciones", params={"cursor": "no-es-un-cursor"}, headers=ADMIN)
+    assert r.status_code == 400
@@ -0,0 +1,191 @@
+"""Quien puede escribir y leer que: el coach dueño, el propio atleta o un administrador."""
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import models
+from app.security import crear_tokens
+
+
+def _auth(id_usuario: int, tipo: str, id_perfil) -> dict:
+    return {"Authorization": "Bearer " + crear_tokens(id_usuario, tipo, id_perfil)["access_token"]}
+
+
+@pytest.fixture(scope="module")
+def datos(engine):
+    """Dos coaches con un atleta y un entrenamiento cada uno; ids autoincrementales"""
+    with Session(engine) as db:
+        roster = []
+        for n in (1, 2):
+            usuario_coach = models.Usuario(email=f"permisos.coach{n}@tests.example.com", contrasena_hash="x", tipo="entrenador")
+            usuario_atleta = models.Usuario(email=f"permisos.atleta{n}@tests.example.com", contrasena_hash="x", tipo="atleta")
+            entrenador = models.Entrenador(nombre=f"Permisos {n}")
+            db.add_all([usuario_coach, usuario_atleta, entrenador])
+            db.flush()
+            db.add(models.PerfilEntrenador(id_entrenador=entrenador.id_entrenador, id_usuario=usuario_coach.id_usuario,
+                                           nombre_completo=f"Permisos {n}"))
+            atleta = models.PerfilAtleta(id_usuario=usuario_atleta.id_usuario, nombre_completo=f"Atleta permisos {n}",
+                                         fecha_nacimiento=date(2000, 1, 1), deporte="running",
+                                         id_entrenador=entrenador.id_entrenador)
+            entrenamiento = models.Entrenamiento(id_entrenador=entrenador.id_entrenador, titulo=f"Series {n}")
+            db.add_all([atleta, entrenamiento])
+            db.flush()
+            roster.append({
+                "coach": _auth(usuario_coach.id_usuario, "entrenador", entrenador.id_entrenador),
+                "atleta": _auth(usuario_atleta.id_usuario, "atleta", atleta.id_atleta),
+                "id_entrenador": entrenador.id_entrenador,
+                "id_atleta": atleta.id_atleta,
+                "id_entrenamiento": entrenamiento.id_entrenamiento,
+            })
+        db.commit()
+    return roster
+
+
+@pytest.fixture(scope="module")
+def cliente(engine):
+    from app.main import app
+
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+ADMIN = _auth(0, "administrador", None)
+
+
+def test_entrenamientos_solo_del_coach_dueno(cliente, datos):
+    uno, dos = datos
+    cuerpo = {"id_entrenador": uno["id_entrenador"], "titulo": "Fondo", "duracion_estimada": 40,
+              "nivel_dificultad": "intermedio"}
+
+    assert cliente.post("/coaches/entrenamientos", json=cuerpo).status_code == 401
+    assert cliente.post("/coaches/entrenamientos", json=cuerpo, headers=uno["atleta"]).status_code == 403
+    assert cliente.post("/coaches/entrenamientos", json=cuerpo, headers=dos["coach"]).status_code == 403
+    assert cliente.post("/coaches/entrenamientos", json=cuerpo, headers=uno["coach"]).status_code == 200
+    assert cliente.post("/coaches/entrenamientos", json=cuerpo, headers=ADMIN).status_code == 200
+
+    ruta = f"/coaches/entrenamientos/{uno['id_entrenamiento']}"
+    assert cliente.put(ruta, json=cuerpo).status_code == 401
+    assert cliente.put(ruta, json=cuerpo, headers=dos["coach"]).status_code == 403
+    assert cliente.put(ruta, json=cuerpo, headers=uno["coach"]).status_code == 200
+
+
+def test_asignar_solo_entrenamiento_y_roster_propios(cliente, datos):
+    uno, dos = datos
+
+    def asignar(headers, id_entrenamiento, id_atleta):
+        return cliente.post("/coaches/asignaciones", headers=headers,
+                            json={"id_entrenamiento": id_entrenamiento, "id_atleta": id_atleta}).status_code
+
+    assert asignar({}, uno["id_entrenamiento"], uno["id_atleta"]) == 401
+    assert asignar(dos["coach"], uno["id_entrenamiento"], uno["id_atleta"]) == 403
+    assert asignar(uno["coach"], uno["id_entrenamiento"], dos["id_atleta"]) == 403
+    assert asignar(uno["coach"], uno["id_entrenamiento"], uno["id_atleta"]) == 200
+
+
+def test_asignar_bulk_solo_entrenamiento_y_roster_propios(cliente, datos):
+    uno, dos = datos
+    roster = {"id_entrenamiento": dos["id_entrenamiento"], "todo_el_roster": True}
+
+    assert cliente.post("/coaches/asignaciones/bulk", json=roster).status_code == 401
+    assert cliente.post("/coaches/asignaciones/bulk", json=roster, headers=uno["coach"]).status_code == 403
+
+    r = cliente.post("/coaches/asignaciones/bulk", headers=dos["coach"], json={
+        "id_entrenamiento": dos["id_entrenamiento"], "ids_atletas": [uno["id_atleta"], dos["id_atleta"]],
+    })
+    assert r.status_code == 200
+    assert {x["id_atleta"]: x["resultado"] for x in r.json()["resultados"]} == {
+        uno["id_atleta"]: "no_encontrado", dos["id_atleta"]: "asignado",
+    }
+
+
+def test_editar_atleta_solo_el_propio_o_su_coach(cliente, datos):
+    uno, dos = datos
+    ruta = f"/atletas/editar/{uno['id_atleta']}"
+
+    assert cliente.put(ruta, json={"peso": 71}).status_code == 401
+    assert cliente.put(ruta, json={"peso": 71}, headers=dos["atleta"]).status_code == 403
+    assert cliente.put(ruta, json={"peso": 71}, headers=dos["coach"]).status_code == 403
+
+    r = cliente.put(ruta, json={"peso": 71}, headers=uno["atleta"])
+    assert r.status_code == 200
+    # Parcial: lo que no vino queda igual
+    assert (r.json()["atleta"]["peso"], r.json()["atleta"]["nombre_completo"]) == (71, "Atleta permisos 1")
+    assert cliente.put(ruta, json={"peso": 72}, headers=uno["coach"]).status_code == 200
+
+
+@pytest.mark.parametrize("ruta", ["/internal/pool", "/internal/cache", "/metrics"])
+def test_endpoints_internos_solo_administrador(cliente, datos, ruta):
+    uno, _ = datos
+
+    assert cliente.get(ruta).status_code == 401
+    assert cliente.get(ruta, headers=uno["coach"]).status_code == 403
+    assert cliente.get(ruta, headers=ADMIN).status_code == 200
+
+
+def test_analiticas_solo_el_propio_su_coach_o_admin(cliente, datos):
+    uno, dos = datos
+    ruta = f"/atletas/{uno['id_atleta']}/analytics"
+
+    assert cliente.get(ruta).status_code == 401
+    assert cliente.get(ruta, headers=dos["atleta"]).status_code == 403
+    assert cliente.get(ruta, headers=dos["coach"]).status_code == 403
+    for headers in (uno["atleta"], uno["coach"], ADMIN):
+        assert cliente.get(ruta, headers=headers).status_code == 200
+
+    ruta = f"/coaches/{uno['id_entrenador']}/analytics"
+    assert cliente.get(ruta).status_code == 401
+    assert cliente.get(ruta, headers=uno["atleta"]).status_code == 403
+    assert cliente.get(ruta, headers=dos["coach"]).status_code == 403
+    for headers in (uno["coach"], ADMIN):
+        assert cliente.get(ruta, headers=headers).status_code == 200
+
+
+def test_resumen_solo_el_propio_su_coach_o_admin(cliente, datos):
+    uno, dos = datos
+    ruta = f"/atletas/{uno['id_atleta']}/resumen"
+
+    assert cliente.get(ruta).status_code == 401
+    assert cliente.get(ruta, headers=dos["atleta"]).status_code == 403
+    assert cliente.get(ruta, headers=dos["coach"]).status_code == 403
+    for headers in (uno["atleta"], uno["coach"], ADMIN):
+        assert cliente.get(ruta, headers=headers).status_code == 200
+
+    ruta = f"/coaches/{uno['id_entrenador']}/resumen"
+    assert cliente.get(ruta).status_code == 401
+    assert cliente.get(ruta, headers=uno["atleta"]).status_code == 403
+    assert cliente.get(ruta, headers=dos["coach"]).status_code == 403
+    for headers in (uno["coach"], ADMIN):
+        assert cliente.get(ruta, headers=headers).status_code == 200
+
+
+@pytest.mark.parametrize("calificacion, esperado", [(0, 422), (6, 422), (1, 200), (5, 200)])
+def test_calificacion_en_escala_de_1_a_5(cliente, datos, calificacion, esperado):
+    _, dos = datos
+    asignacion = cliente.post("/coaches/asignaciones", headers=dos["coach"], json={
+        "id_entrenamiento": dos["id_entrenamiento"], "id_atleta": dos["id_atleta"],
+    }).json()
+
+    r = cliente.put(f"/atletas/asignaciones/{asignacion['id_asignacion']}", headers=dos["atleta"],
+                    json={"estado": "completado", "calificacion": calificacion})
+    assert r.status_code == esperado
+
+
+def test_listas_de_asignaciones_solo_el_propio_su_coach_o_admin(cliente, datos):
+    uno, dos = datos
+    ruta = f"/atletas/{uno['id_atleta']}/asignaciones"
+
+    assert cliente.get(ruta).status_code == 401
+    assert cliente.get(ruta, headers=dos["atleta"]).status_code == 403
+    assert cliente.get(ruta, headers=dos["coach"]).status_code == 403
+    for headers in (uno["atleta"], uno["coach"], ADMIN):
+        assert cliente.get(ruta, headers=headers).status_code == 200
+    assert cliente.get("/atletas/999999/asignaciones", headers=ADMIN).status_code == 404
+
+    ruta = f"/coaches/{uno['id_entrenador']}/asignaciones"
+    assert cliente.get(ruta).status_code == 401
+    assert cliente.get(ruta, headers=uno["atleta"]).status_code == 403
+    assert cliente.get(ruta, headers=dos["coach"]).status_code == 403
+    for headers in (uno["coach"], ADMIN):
+        assert cliente.get(ruta, headers=headers).status_code == 200
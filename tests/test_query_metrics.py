@@ -0,0 +1,43 @@
+"""Log de consultas lentas: sin valores de parametros salvo que se pida."""
+import json
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import query_metrics
+
+
+@pytest.fixture
+def lento(monkeypatch):
+    # Todas las consultas cuentan como lentas
+    monkeypatch.setattr(query_metrics, "SLOW_QUERY_MS", 0)
+    engine = create_engine("sqlite://")
+    query_metrics.instrumentar_consultas(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE usuarios (email TEXT, contrasena_hash TEXT)"))
+    yield engine
+    engine.dispose()
+
+
+def consultas_lentas(caplog):
+    return [json.loads(r.message) for r in caplog.records if r.name == "app.sql"]
+
+
+def test_parametros_sin_valores(lento, caplog):
+    with lento.begin() as conn:
+        conn.execute(text("INSERT INTO usuarios VALUES (:e, :h)"),
+                     [{"e": "secreto@tests.example.com", "h": "$2b$12$hash"}] * 3)
+        conn.execute(text("SELECT * FROM usuarios WHERE email = :e"), {"e": "secreto@tests.example.com"})
+
+    insercion, consulta = consultas_lentas(caplog)[-2:]
+    assert "secreto" not in caplog.text and "$2b$" not in caplog.text
+    assert insercion["parametros"] == {"filas": 3, "tipos": ["str", "str"]}
+    assert consulta["parametros"] == {"tipos": ["str"]}
+
+
+def test_valores_con_la_bandera(lento, caplog, monkeypatch):
+    monkeypatch.setattr(query_metrics, "SLOW_QUERY_LOG_VALORES", True)
+    with lento.begin() as conn:
+        conn.execute(text("SELECT * FROM usuarios WHERE email = :e"), {"e": "depurando@tests.example.com"})
+
+    assert "depurando@tests.example.com" in consultas_lentas(caplog)[-1]["parametros"]
@@ -0,0 +1,145 @@
+"""Registro: cada coach nuevo tiene su propia fila en entrenadores, y el alta masiva por filas."""
+import json
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app import hashing, models
+from app.routes import register
+from app.security import crear_tokens
+
+
+@pytest.fixture(scope="module")
+def cliente(engine):
+    from app.main import app
+
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+def coach(email: str, nombre: str) -> dict:
+    return {"email": email, "contrasena": "secreta", "tipo": "entrenador",
+            "nombre_completo": nombre, "fecha_nacimiento": "1980-01-01"}
+
+
+def test_coach_con_el_nombre_de_otro_no_se_queda_sus_atletas(cliente, engine):
+    # Fila cargada aparte (sin perfil) con un atleta, y un coach nuevo que se llama igual
+    with Session(engine) as db:
+        viejo = models.Entrenador(nombre="Coach Repetido")
+        db.add(viejo)
+        db.flush()
+        usuario = models.Usuario(email="atleta.repetido@tests.example.com", contrasena_hash="x", tipo="atleta")
+        db.add(usuario)
+        db.flush()
+        db.add(models.PerfilAtleta(id_usuario=usuario.id_usuario, nombre_completo="Atleta del viejo", fecha_nacimiento=date(2000, 1, 1),
+                                   deporte="running", id_entrenador=viejo.id_entrenador))
+        db.commit()
+        id_viejo = viejo.id_entrenador
+
+    r = cliente.post("/registro/", json=coach("coach.repetido@tests.example.com", "Coach Repetido"))
+    assert r.status_code == 201
+
+    with Session(engine) as db:
+        perfil = db.scalar(select(models.PerfilEntrenador).where(models.PerfilEntrenador.id_usuario == r.json()["id_usuario"]))
+        assert perfil.id_entrenador != id_viejo
+        assert db.get(models.Entrenador, perfil.id_entrenador).nombre == "Coach Repetido"
+        lectura = db.get(models.LecturaEntrenador, perfil.id_entrenador)
+        assert (lectura.id_usuario, lectura.atletas) == (perfil.id_usuario, 0)
+
+
+def test_ids_de_entrenadores_sueltos_no_se_reusan(cliente, engine):
+    # Un hueco de ids en perfiles_entrenadores ocupado en entrenadores: antes el perfil nuevo caia ahi
+    with engine.begin() as conn:
+        siguiente = (conn.scalar(select(models.Entrenador.id_entrenador).order_by(models.Entrenador.id_entrenador.desc())) or 0) + 1
+        conn.execute(insert(models.Entrenador), [{"id_entrenador": siguiente, "nombre": "Suelto"}])
+
+    r = cliente.post("/registro/", json=coach("coach.suelto@tests.example.com", "Coach Nuevo"))
+    assert r.status_code == 201
+
+    with Session(engine) as db:
+        perfil = db.scalar(select(models.PerfilEntrenador).where(models.PerfilEntrenador.id_usuario == r.json()["id_usuario"]))
+        assert perfil.id_entrenador > siguiente
+        assert db.get(models.Entrenador, siguiente).nombre == "Suelto"
+
+
+ADMIN = {"Authorization": "Bearer " + crear_tokens(0, "administrador", None)["access_token"]}
+
+
+def atleta(email: str) -> dict:
+    return {"email": email, "contrasena": "secreta", "tipo": "atleta", "nombre_completo": "Atleta bulk",
+            "fecha_nacimiento": "2000-01-01", "deporte": "running"}
+
+
+def bulk(cliente, *lineas):
+    cuerpo = "\n".join(l if isinstance(l, str) else json.dumps(l) for l in lineas)
+    return cliente.post("/registro/bulk", content=cuerpo, headers={**ADMIN, "Content-Type": "application/x-ndjson"})
+
+
+def test_bulk_reporta_errores_por_fila_sin_frenar_las_demas(cliente):
+    cliente.post("/registro/", json=atleta("bulk.existente@tests.example.com"))
+
+    r = bulk(
+        cliente,
+        atleta("bulk.ok1@tests.example.com"),
+        "{no es json",
+        {**atleta("bulk.sin.deporte@tests.example.com"), "deporte": None},
+        atleta("bulk.existente@tests.example.com"),
+        atleta("bulk.ok2@tests.example.com"),
+        atleta("BULK.OK1@tests.example.com"),
+        atleta("no-es-un-email"),
+    )
+    assert r.status_code == 200
+    cuerpo = r.json()
+    assert (cuerpo["recibidas"], cuerpo["registradas"], cuerpo["con_error"]) == (7, 2, 5)
+    assert [x["fila"] for x in cuerpo["registrados"]] == [1, 5]
+
+    errores = {e["fila"]: e["errores"] for e in cuerpo["errores"]}
+    assert errores[2][0].startswith("JSON inválido")
+    assert errores[3] == ["deporte: obligatorio para atletas"]
+    assert errores[4] == ["Email ya registrado"]
+    assert errores[6] == ["Email repetido en el archivo"]
+    assert [e.split(":")[0] for e in errores[7]] == ["email"]
+
+
+def test_bulk_inserta_en_lotes(cliente, engine, monkeypatch):
+    monkeypatch.setattr(register, "REGISTRO_BULK_LOTE", 2)
+    filas = [atleta(f"bulk.lote{i}@tests.example.com") for i in range(4)]
+    filas.append(coach("bulk.lote.coach@tests.example.com", "Coach Lote"))
+
+    r = bulk(cliente, *filas)
+    assert r.status_code == 200
+    assert r.json()["registradas"] == 5
+
+    with Session(engine) as db:
+        ids = {c["id_usuario"] for c in r.json()["registrados"]}
+        assert db.scalar(select(func.count()).select_from(models.Usuario).where(models.Usuario.id_usuario.in_(ids))) == 5
+        assert db.scalar(select(func.count()).select_from(models.PerfilAtleta).where(models.PerfilAtleta.id_usuario.in_(ids))) == 4
+        perfil = db.scalar(select(models.PerfilEntrenador).where(models.PerfilEntrenador.id_usuario.in_(ids)))
+        assert db.get(models.Entrenador, perfil.id_entrenador).nombre == "Coach Lote"
+
+
+def test_bulk_con_la_cola_de_bcrypt_llena(cliente, monkeypatch):
+    original = hashing._ejecutar
+    cupo = {"quedan": 2}
+
+    async def ejecutar(fn, *args):
+        # Entran las dos primeras y despues la cola esta llena
+        if cupo["quedan"] == 0:
+            raise hashing._ocupado()
+        cupo["quedan"] -= 1
+        return await original(fn, *args)
+
+    monkeypatch.setattr(hashing, "_ejecutar", ejecutar)
+
+    r = bulk(cliente, *(atleta(f"bulk.cola{i}@tests.example.com") for i in range(4)))
+    assert r.status_code == 200
+    assert r.json()["registradas"] == 2
+    assert [e["errores"] for e in r.json()["errores"]] == [["Servidor ocupado, reintenta esta fila"]] * 2
+
+    # Ninguna entra: 503 de entrada, sin nada hecho
+    r = bulk(cliente, atleta("bulk.cola.nada@tests.example.com"))
+    assert (r.status_code, r.headers["Retry-After"]) == (503, "1")
+    assert cliente.post("/auth/login", json={"email": "bulk.cola.nada@tests.example.com", "password": "secreta"}).status_code == 401
@@ -0,0 +1,106 @@
+"""Lecturas a replicas: round-robin, caida al primario y pin despues de escribir.
+
+Las replicas son copias del SQLite de los tests donde el atleta tiene otro nombre,
+asi cada respuesta dice de que base salio.
+"""
+import sqlite3
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import db, models
+from app.security import crear_tokens
+
+ADMIN = {"Authorization": "Bearer " + crear_tokens(0, "administrador", None)["access_token"]}
+
+
+@pytest.fixture(scope="module")
+def id_atleta(engine):
+    with Session(engine) as sesion:
+        usuario = models.Usuario(email="replicas.atleta@tests.example.com", contrasena_hash="x", tipo="atleta")
+        sesion.add(usuario)
+        sesion.flush()
+        atleta = models.PerfilAtleta(id_usuario=usuario.id_usuario, nombre_completo="Primario",
+                                     fecha_nacimiento=date(2000, 1, 1), deporte="running")
+        sesion.add(atleta)
+        sesion.commit()
+        return atleta.id_atleta
+
+
+def copiar_primario(destino, id_atleta: int, nombre: str) -> str:
+    with sqlite3.connect(db.engine.url.database) as origen, sqlite3.connect(destino) as copia:
+        origen.backup(copia)
+        copia.execute("UPDATE perfiles_atletas SET nombre_completo = ? WHERE id_atleta = ?", (nombre, id_atleta))
+    return f"sqlite:///{destino}"
+
+
+@pytest.fixture
+def con_replicas(monkeypatch, tmp_path, id_atleta):
+    """Instala un RouterReplicas con las urls que se le pasen y lo suelta al terminar"""
+    creados = []
+
+    def instalar(*urls):
+        router = db.RouterReplicas(urls)
+        creados.append(router)
+        monkeypatch.setattr(db, "replicas", router)
+        return router
+
+    yield instalar
+    for router in creados:
+        for replica in router.replicas:
+            replica.engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def cliente(engine):
+    from app.main import app
+
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+def nombre(cliente, id_atleta: int, **kwargs) -> str:
+    r = cliente.get(f"/atletas/basico/{id_atleta}", **kwargs)
+    assert r.status_code == 200
+    return r.json()["nombre_completo"]
+
+
+def test_lecturas_van_a_las_replicas_en_round_robin(cliente, con_replicas, tmp_path, id_atleta):
+    con_replicas(copiar_primario(tmp_path / "r1.db", id_atleta, "Replica 1"),
+                 copiar_primario(tmp_path / "r2.db", id_atleta, "Replica 2"))
+
+    leidos = [nombre(cliente, id_atleta) for _ in range(4)]
+    assert set(leidos) == {"Replica 1", "Replica 2"}
+    assert all(a != b for a, b in zip(leidos, leidos[1:]))
+
+
+def test_replica_rota_cae_al_primario(cliente, con_replicas, tmp_path, id_atleta):
+    router = con_replicas(f"sqlite:///{tmp_path}/no/existe.db")
+
+    # La primera lectura falla en la replica con OperationalError y se repite en el primario
+    assert nombre(cliente, id_atleta) == "Primario"
+    assert router.estado()[0]["sana"] is False
+    # Hasta el proximo chequeo ni se intenta
+    assert nombre(cliente, id_atleta) == "Primario"
+
+
+def test_despues_de_escribir_se_lee_del_primario(cliente, con_replicas, tmp_path, id_atleta):
+    con_replicas(copiar_primario(tmp_path / "r1.db", id_atleta, "Replica 1"))
+    cliente.cookies.clear()
+
+    r = cliente.put(f"/atletas/editar/{id_atleta}", json={"nombre_completo": "Primario editado"}, headers=ADMIN)
+    assert r.status_code == 200
+    hasta = r.headers[db.HEADER_PIN_PRIMARIO]
+    assert cliente.cookies.get(db.COOKIE_PIN_PRIMARIO) == hasta
+
+    # Con la cookie de la escritura: sus propios cambios, del primario
+    assert nombre(cliente, id_atleta) == "Primario editado"
+
+    # Sin cookie vuelve a la replica (atrasada); con el header reenviado a mano, al primario
+    cliente.cookies.clear()
+    assert nombre(cliente, id_atleta) == "Replica 1"
+    assert nombre(cliente, id_atleta, headers={db.HEADER_PIN_PRIMARIO: hasta}) == "Primario editado"
+    # Un pin vencido ya no cuenta
+    assert nombre(cliente, id_atleta, headers={db.HEADER_PIN_PRIMARIO: "1"}) == "Replica 1"
@@ -0,0 +1,113 @@
+"""Resumenes incrementales: los deltas de CambiosResumen contra el recalculo completo."""
+import itertools
+from datetime import date
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import models
+from app.aggregates import CambiosResumen, resumen_a_dict, verificar
+
+
+numeros = itertools.count(1)
+
+
+@pytest.fixture
+def db(engine):
+    with Session(engine) as sesion:
+        yield sesion
+
+
+@pytest.fixture
+def roster(db):
+    """Un coach con un atleta y un entrenamiento; ids autoincrementales"""
+    usuario = models.Usuario(email=f"resumenes.{next(numeros)}@tests.example.com", contrasena_hash="x", tipo="atleta")
+    entrenador = models.Entrenador(nombre="Coach resumenes")
+    db.add_all([usuario, entrenador])
+    db.flush()
+    atleta = models.PerfilAtleta(id_usuario=usuario.id_usuario, nombre_completo="Atleta resumenes",
+                                 fecha_nacimiento=date(2000, 1, 1), deporte="running",
+                                 id_entrenador=entrenador.id_entrenador)
+    entrenamiento = models.Entrenamiento(id_entrenador=entrenador.id_entrenador, titulo="Fondo")
+    db.add_all([atleta, entrenamiento])
+    db.commit()
+    return atleta, entrenamiento
+
+
+def asignar(db, roster, estado="pendiente", calificacion=None, fecha_completado=None):
+    atleta, entrenamiento = roster
+    asignacion = models.AsignacionAtleta(id_atleta=atleta.id_atleta, id_entrenamiento=entrenamiento.id_entrenamiento,
+                                         fecha_asignacion=date(2026, 1, 1), estado=estado, calificacion=calificacion,
+                                         fecha_completado=fecha_completado)
+    db.add(asignacion)
+    cambios = CambiosResumen()
+    cambios.agregar(atleta.id_atleta, entrenamiento.id_entrenador,
+                    despues=(estado, calificacion, fecha_completado))
+    db.flush()
+    cambios.aplicar(db)
+    db.commit()
+    return asignacion
+
+
+def cambiar(db, asignacion, **valores):
+    """Igual que actualizar_asignacion: delta antes/despues, flush y aplicar antes del commit"""
+    antes = (asignacion.estado, asignacion.calificacion, asignacion.fecha_completado)
+    for campo, valor in valores.items():
+        setattr(asignacion, campo, valor)
+    cambios = CambiosResumen()
+    cambios.agregar(asignacion.id_atleta, asignacion.entrenamiento.id_entrenador, antes=antes,
+                    despues=(asignacion.estado, asignacion.calificacion, asignacion.fecha_completado))
+    db.flush()
+    cambios.aplicar(db)
+    db.commit()
+
+
+def sin_deriva(db, roster):
+    """Las filas de este atleta y su coach coinciden con lo que armaria reconstruir()"""
+    atleta, entrenamiento = roster
+    reporte = verificar(db, max_ejemplos=10 ** 6)
+    assert [e for e in reporte["resumen_atletas"]["ejemplos"] if e["id_atleta"] == atleta.id_atleta] == []
+    assert [e for e in reporte["resumen_entrenadores"]["ejemplos"]
+            if e["id_entrenador"] == entrenamiento.id_entrenador] == []
+
+
+def resumen(db, roster) -> dict:
+    db.expire_all()
+    return resumen_a_dict(db.get(models.ResumenAtleta, roster[0].id_atleta))
+
+
+def test_deltas_de_altas_y_cambios_de_estado(db, roster):
+    a = asignar(db, roster)
+    b = asignar(db, roster, "en_progreso")
+    asignar(db, roster, "completado", 4, date(2026, 3, 1))
+    cambiar(db, a, estado="completado", calificacion=2, fecha_completado=date(2026, 3, 5))
+    cambiar(db, b, estado="pendiente")
+
+    assert resumen(db, roster) == {
+        "pendientes": 1, "en_progreso": 0, "completadas": 2, "calificadas": 2,
+        "calificacion_promedio": 3.0, "ultima_completada": date(2026, 3, 5),
+    }
+    sin_deriva(db, roster)
+
+
+def test_deshacer_la_ultima_completada_la_recalcula(db, roster):
+    asignar(db, roster, "completado", 5, date(2026, 2, 1))
+    ultima = asignar(db, roster, "completado", 3, date(2026, 2, 10))
+    assert resumen(db, roster)["ultima_completada"] == date(2026, 2, 10)
+
+    # Se reabre la mas reciente: la fecha baja a la anterior y su calificacion sale del promedio
+    cambiar(db, ultima, estado="en_progreso", calificacion=None, fecha_completado=None)
+    assert resumen(db, roster) == {
+        "pendientes": 0, "en_progreso": 1, "completadas": 1, "calificadas": 1,
+        "calificacion_promedio": 5.0, "ultima_completada": date(2026, 2, 1),
+    }
+    sin_deriva(db, roster)
+
+
+def test_deshacer_la_unica_completada_deja_la_fecha_vacia(db, roster):
+    unica = asignar(db, roster, "completado", 4, date(2026, 1, 15))
+    cambiar(db, unica, estado="pendiente", calificacion=None, fecha_completado=None)
+
+    assert resumen(db, roster)["ultima_completada"] is None
+    assert resumen(db, roster)["completadas"] == 0
+    sin_deriva(db, roster)